@@ -0,0 +1,256 @@
+"""Generate deterministic corpora of Python files to benchmark Flake8 with.
+
+Each corpus is generated from a fixed seed so that the same files are
+checked by every run of the benchmarks. Only :meth:`random.Random.random` is
+used to make choices since, unlike the other methods, it produces the same
+sequence on every version of Python we support.
+"""
+import hashlib
+import os
+import random
+
+DEFAULT_SEED = 3
+
+WORDS = (
+    'alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf',
+    'hotel', 'india', 'juliett', 'kilo', 'lima', 'mike', 'november',
+    'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango', 'uniform',
+    'victor', 'whiskey', 'xray', 'yankee', 'zulu',
+)
+
+MODULES = ('collections', 'functools', 'itertools', 'logging', 'os', 're',
+           'sys', 'time')
+
+NOQA_COMMENTS = ('  # noqa', '  # noqa: E501', '  # noqa: E225,E501,F401',
+                 '  # NOQA:E2,W2', '  # noqa:F841')
+
+# Lines which can not be parsed and make the tokenizer or the compiler fail
+SYNTAX_ERRORS = (
+    'def broken(:\n',
+    'x = (1,\n',
+    'print "hello"\n',
+    'class Broken\n',
+    'value = """never closed\n',
+    '    return\n',
+)
+
+
+class Generator(object):
+    """Write plausible Python code using a seeded random number generator."""
+
+    def __init__(self, seed):
+        """Initialize the generator.
+
+        :param int seed:
+            The seed for the random number generator.
+        """
+        self.random = random.Random(seed)
+
+    def chance(self, probability):
+        # type: (float) -> bool
+        """Decide whether something with the given probability happens."""
+        return self.random.random() < probability
+
+    def integer(self, lower, upper):
+        # type: (int, int) -> int
+        """Pick an integer between lower and upper, inclusively."""
+        return lower + int(self.random.random() * (upper - lower + 1))
+
+    def choice(self, sequence):
+        """Pick an item from the sequence."""
+        return sequence[int(self.random.random() * len(sequence))]
+
+    def name(self):
+        # type: () -> str
+        """Generate an identifier."""
+        return '{0}_{1}'.format(self.choice(WORDS), self.integer(0, 99))
+
+    def expression(self, names):
+        # type: (List[str]) -> str
+        """Generate an expression using some of the names."""
+        operand = self.choice(names) if names else str(self.integer(0, 9))
+        kind = self.integer(0, 4)
+        if kind == 0:
+            return '{0} + {1}'.format(operand, self.integer(0, 100))
+        if kind == 1:
+            # E225: missing whitespace around operator
+            return '{0}*{1}'.format(operand, self.integer(2, 9))
+        if kind == 2:
+            return '[{0} for _ in range({1})]'.format(operand,
+                                                      self.integer(1, 9))
+        if kind == 3:
+            return '{{{0!r}: {1}}}'.format(self.choice(WORDS), operand)
+        return '{0}({1})'.format(self.name(), operand)
+
+    def function(self, indent=''):
+        # type: (str) -> List[str]
+        """Generate the lines of a function."""
+        parameters = [self.name() for _ in range(self.integer(0, 3))]
+        lines = [
+            '{0}def {1}({2}):\n'.format(indent, self.name(),
+                                        ', '.join(parameters)),
+            '{0}    """{1}."""\n'.format(indent, self.choice(WORDS).title()),
+        ]
+        names = list(parameters)
+        for _ in range(self.integer(1, 12)):
+            target = self.name()
+            line = '{0}    {1} = {2}'.format(indent, target,
+                                             self.expression(names))
+            if self.chance(0.05):
+                # E501: line too long
+                line += '  # ' + ' '.join(self.choice(WORDS)
+                                          for _ in range(12))
+            if self.chance(0.05):
+                # W291: trailing whitespace
+                line += ' '
+            lines.append(line + '\n')
+            names.append(target)
+            if self.chance(0.2):
+                lines.extend([
+                    '{0}    if {1}:\n'.format(indent, target),
+                    '{0}        {1} = {2}\n'.format(indent, self.name(),
+                                                    self.expression(names)),
+                ])
+        lines.append('{0}    return {1}\n'.format(indent,
+                                                  self.choice(names)))
+        return lines
+
+    def klass(self):
+        # type: () -> List[str]
+        """Generate the lines of a class with a few methods."""
+        lines = ['class {0}(object):\n'.format(self.name().title()),
+                 '    """{0}."""\n'.format(self.choice(WORDS).title())]
+        for _ in range(self.integer(1, 4)):
+            lines.append('\n')
+            lines.extend(self.function(indent='    '))
+        return lines
+
+    def module(self, definitions):
+        # type: (int) -> List[str]
+        """Generate the lines of a module."""
+        lines = ['"""{0} module."""\n'.format(self.choice(WORDS).title())]
+        imported = sorted(set(self.choice(MODULES)
+                              for _ in range(self.integer(1, 4))))
+        # F401: imported but unused
+        lines.extend('import {0}\n'.format(module) for module in imported)
+        for _ in range(definitions):
+            lines.extend(['\n', '\n'])
+            if self.chance(0.25):
+                lines.extend(self.klass())
+            else:
+                lines.extend(self.function())
+        return lines
+
+
+def write_module(path, lines):
+    """Write the lines to a file, creating its directory if necessary."""
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as fd:
+        fd.writelines(lines)
+
+
+def many_small_files(directory, generator):
+    """Write many small modules to a flat directory."""
+    for index in range(250):
+        write_module(os.path.join(directory, 'small_{0}.py'.format(index)),
+                     generator.module(generator.integer(1, 4)))
+
+
+def few_huge_files(directory, generator):
+    """Write a few modules with thousands of lines each."""
+    for index in range(3):
+        write_module(os.path.join(directory, 'huge_{0}.py'.format(index)),
+                     generator.module(250))
+
+
+def deep_directories(directory, generator):
+    """Write modules in a deeply nested package with excluded siblings."""
+    path = directory
+    for depth in range(20):
+        path = os.path.join(path, 'level_{0}'.format(depth))
+        write_module(os.path.join(path, '__init__.py'), generator.module(1))
+        for index in range(5):
+            write_module(
+                os.path.join(path, 'module_{0}.py'.format(index)),
+                generator.module(generator.integer(1, 3)),
+            )
+        # Directories which are excluded by default
+        write_module(os.path.join(path, '.tox', 'excluded.py'),
+                     generator.module(1))
+        write_module(os.path.join(path, '__pycache__', 'excluded.py'),
+                     generator.module(1))
+
+
+def heavy_noqa_files(directory, generator):
+    """Write modules where most lines end with a ``# noqa`` comment."""
+    for index in range(30):
+        lines = generator.module(generator.integer(10, 20))
+        for number, line in enumerate(lines):
+            stripped = line.rstrip('\n')
+            if (generator.chance(0.8) and stripped and
+                    not stripped.rstrip().endswith(('"""', ':'))):
+                lines[number] = (stripped.rstrip() +
+                                 generator.choice(NOQA_COMMENTS) + '\n')
+        write_module(os.path.join(directory, 'noqa_{0}.py'.format(index)),
+                     lines)
+
+
+def syntax_error_files(directory, generator):
+    """Write modules which can not be parsed."""
+    for index in range(100):
+        lines = generator.module(generator.integer(2, 6))
+        position = generator.integer(1, len(lines) - 1)
+        lines.insert(position, generator.choice(SYNTAX_ERRORS))
+        write_module(os.path.join(directory, 'invalid_{0}.py'.format(index)),
+                     lines)
+
+
+CORPORA = (
+    ('many-small-files', many_small_files),
+    ('few-huge-files', few_huge_files),
+    ('deep-directories', deep_directories),
+    ('heavy-noqa', heavy_noqa_files),
+    ('syntax-errors', syntax_error_files),
+)
+
+
+def generate(directory, names=None, seed=DEFAULT_SEED):
+    # type: (str, Union[NoneType, List[str]], int) -> Dict[str, str]
+    """Generate corpora in a directory.
+
+    :param str directory:
+        The directory in which each corpus is written to a directory named
+        after it. Existing corpora are overwritten.
+    :param list names:
+        The names of the corpora to generate. Defaults to every corpus.
+    :param int seed:
+        The seed each corpus is generated from.
+    :returns:
+        A mapping of each corpus' name to the directory it was written to.
+    :rtype:
+        dict
+    """
+    paths = {}
+    for name, write_corpus in CORPORA:
+        if names is not None and name not in names:
+            continue
+        path = os.path.join(directory, name)
+        write_corpus(path, Generator(seed))
+        paths[name] = path
+    return paths
+
+
+def fingerprint(directory):
+    # type: (str) -> str
+    """Hash the names and contents of every file in a directory."""
+    digest = hashlib.sha1()
+    for root, directories, filenames in os.walk(directory):
+        directories.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, directory).encode('utf-8'))
+            with open(path, 'rb') as fd:
+                digest.update(fd.read())
+    return digest.hexdigest()
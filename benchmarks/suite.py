@@ -0,0 +1,651 @@
+"""Benchmark Flake8 and compare the results between commits.
+
+Run the benchmarks and save the results with::
+
+    python benchmarks/suite.py run --output results.json
+
+and compare them with the results of another commit with::
+
+    python benchmarks/suite.py compare baseline.json results.json
+"""
+from __future__ import print_function
+
+import argparse
+import ast
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import corpus
+import pycodestyle
+
+import flake8
+from flake8 import checker
+from flake8 import defaults
+from flake8 import statistics
+from flake8 import style_guide
+from flake8 import utils
+from flake8.main import application as app
+from flake8.plugins import manager as plugin_manager
+
+# The arguments every run of the application uses so that neither the
+# configuration files nor the caches of the machine running the benchmarks
+# influence the results
+APPLICATION_ARGUMENTS = ['--isolated', '--no-cache', '--exit-zero',
+                         '--output-file', os.devnull]
+
+# Relative slowdown above which compare reports a regression
+DEFAULT_THRESHOLD = 0.1
+
+CODE_PREFIXES = ('E1', 'E2', 'E3', 'E5', 'E7', 'E9', 'W1', 'W2', 'W3', 'W6',
+                 'F4', 'F8', 'C9', 'X1', 'ABC')
+
+# The types of plugins a FileChecker runs, see Checkers.to_dictionary
+PLUGIN_TYPES = ('ast_plugins', 'ast_visitor_plugins', 'logical_line_plugins',
+                'logical_lines_plugins', 'physical_line_plugins',
+                'physical_lines_plugins')
+
+
+class Benchmark(object):
+    """Something to time repeatedly.
+
+    Before each repetition, ``setup`` is called and what it returns is passed
+    to ``function``. Only calling ``function`` is timed.
+    """
+
+    def __init__(self, name, function, setup=lambda: None, items=None):
+        """Initialize the benchmark.
+
+        :param str name:
+            The name the results are reported under.
+        :param function:
+            The callable to time.
+        :param setup:
+            The callable preparing each repetition.
+        :param int items:
+            The number of items, e.g., files or errors, each repetition
+            handles, if any.
+        """
+        self.name = name
+        self.function = function
+        self.setup = setup
+        self.items = items
+
+    def run(self, repeat):
+        # type: (int) -> dict
+        """Time the benchmark.
+
+        :param int repeat:
+            The number of times to time the benchmark.
+        :returns:
+            The timings, in seconds, along with the fastest and median
+            timings, and the number of items handled per second.
+        :rtype:
+            dict
+        """
+        timings = []
+        for _ in range(repeat):
+            argument = self.setup()
+            start_time = timeit.default_timer()
+            self.function(argument)
+            timings.append(timeit.default_timer() - start_time)
+
+        ordered = sorted(timings)
+        result = {
+            'timings': timings,
+            'best': ordered[0],
+            'median': ordered[len(ordered) // 2],
+        }
+        if self.items is not None:
+            result['items'] = self.items
+            result['items per second'] = self.items / ordered[0]
+        return result
+
+
+def trailing_whitespace(physical_lines):
+    """Check every line for W291 and W293 like pycodestyle does."""
+    for line_number, line in enumerate(physical_lines, 1):
+        line = line.rstrip('\n').rstrip('\r').rstrip('\x0c')
+        stripped = line.rstrip(' \t\v')
+        if line != stripped:
+            if stripped:
+                yield line_number, len(stripped), 'W291 trailing whitespace'
+            else:
+                yield line_number, 0, 'W293 blank line contains whitespace'
+
+
+def maximum_line_length(physical_lines, max_line_length,
+                        multiline_string_ranges):
+    """Check every line for E501 like pycodestyle does."""
+    for line_number, line in enumerate(physical_lines, 1):
+        # Stripping the line only makes it shorter
+        if len(line) <= max_line_length:
+            continue
+        line = line.rstrip()
+        length = len(line)
+        if length <= max_line_length:
+            continue
+        chunks = line.split()
+        multiline = any(start <= line_number <= end
+                        for start, end in multiline_string_ranges)
+        if (((len(chunks) == 1 and multiline) or
+                (len(chunks) == 2 and chunks[0] == '#')) and
+                length - len(chunks[-1]) < max_line_length - 7):
+            continue
+        yield (line_number, max_line_length,
+               'E501 line too long ({0} > {1} characters)'.format(
+                   length, max_line_length))
+
+
+def extraneous_whitespace(logical_lines):
+    """Check every logical line for E201, E202, and E203 like pycodestyle."""
+    finditer = pycodestyle.EXTRANEOUS_WHITESPACE_REGEX.finditer
+    for logical_line in logical_lines:
+        line = logical_line.logical_line
+        for match in finditer(line):
+            text = match.group()
+            char = text.strip()
+            found = match.start()
+            if text == char + ' ':
+                yield (logical_line, found + 1,
+                       "E201 whitespace after '{0}'".format(char))
+            elif line[found - 1] != ',':
+                code = 'E202' if char in '}])' else 'E203'
+                yield (logical_line, found,
+                       "{0} whitespace before '{1}'".format(code, char))
+
+
+def whitespace_around_comma(logical_lines):
+    """Check every logical line for E241 and E242 like pycodestyle."""
+    finditer = pycodestyle.WHITESPACE_AFTER_COMMA_REGEX.finditer
+    for logical_line in logical_lines:
+        for match in finditer(logical_line.logical_line):
+            text = match.group()
+            if '\t' in text:
+                yield (logical_line, match.start() + 1,
+                       "E242 tab after '{0}'".format(text[0]))
+            else:
+                yield (logical_line, match.start() + 1,
+                       "E241 multiple spaces after '{0}'".format(text[0]))
+
+
+def walk_for_calls(tree):
+    """Report calls to print by walking the tree."""
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and
+                getattr(node.func, 'id', None) == 'print'):
+            yield node.lineno, node.col_offset, 'X100 print found', None
+
+
+def walk_for_imports(tree):
+    """Report relative imports by walking the tree."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.level:
+            yield node.lineno, node.col_offset, 'X200 relative import', None
+
+
+def walk_for_functions(tree):
+    """Report functions without docstrings by walking the tree."""
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.FunctionDef) and
+                ast.get_docstring(node) is None):
+            yield node.lineno, node.col_offset, 'X300 no docstring', None
+
+
+def find_calls(tree, ast_context):
+    """Report calls to print by looking them up."""
+    for node in ast_context.nodes_of_type(ast.Call):
+        if getattr(node.func, 'id', None) == 'print':
+            yield node.lineno, node.col_offset, 'X100 print found', None
+
+
+def find_imports(tree, ast_context):
+    """Report relative imports by looking them up."""
+    for node in ast_context.nodes_of_type(ast.ImportFrom):
+        if node.level:
+            yield node.lineno, node.col_offset, 'X200 relative import', None
+
+
+def find_functions(tree, ast_context):
+    """Report functions without docstrings by looking them up."""
+    for node in ast_context.nodes_of_type(ast.FunctionDef):
+        if ast.get_docstring(node) is None:
+            yield node.lineno, node.col_offset, 'X300 no docstring', None
+
+
+class CallVisitor(object):
+    """Report calls to print as they are visited."""
+
+    def __init__(self, ast_context):
+        """Initialize the visitor for a file."""
+
+    def visit_Call(self, node):
+        """Report the call if it is to print."""
+        if getattr(node.func, 'id', None) == 'print':
+            yield node.lineno, node.col_offset, 'X100 print found'
+
+
+class ImportVisitor(object):
+    """Report relative imports as they are visited."""
+
+    def __init__(self, ast_context):
+        """Initialize the visitor for a file."""
+
+    def visit_ImportFrom(self, node):
+        """Report the import if it is relative."""
+        if node.level:
+            yield node.lineno, node.col_offset, 'X200 relative import'
+
+
+class FunctionVisitor(object):
+    """Report functions without docstrings as they are visited."""
+
+    def __init__(self, ast_context):
+        """Initialize the visitor for a file."""
+
+    def visit_FunctionDef(self, node):
+        """Report the function if it has no docstring."""
+        if ast.get_docstring(node) is None:
+            yield node.lineno, node.col_offset, 'X300 no docstring'
+
+
+def plugin_dictionary(name, function):
+    """Create the dictionary a FileChecker expects for a plugin."""
+    plugin = plugin_manager.Plugin(name, None)
+    plugin._plugin = function
+    plugin._plugin_name = name
+    return plugin.to_dictionary()
+
+
+def count_python_files(directory):
+    # type: (str) -> int
+    """Count the files which Flake8 checks by default."""
+    count = 0
+    for _, directories, filenames in os.walk(directory):
+        directories[:] = [
+            name for name in directories
+            if not utils.fnmatch(name, defaults.EXCLUDE, default=False)
+        ]
+        count += sum(1 for filename in filenames if filename.endswith('.py'))
+    return count
+
+
+def application_benchmark(name, path, jobs):
+    """Benchmark running the application on a corpus."""
+    arguments = APPLICATION_ARGUMENTS + ['--jobs', str(jobs), path]
+
+    def run_application(_):
+        app.Application().run(list(arguments))
+
+    return Benchmark('application.{0}.jobs-{1}'.format(name, jobs),
+                     run_application, items=count_python_files(path))
+
+
+def make_violations(count):
+    """Create violations spread across files, lines, and codes."""
+    generator = corpus.Generator(corpus.DEFAULT_SEED)
+    violations = []
+    for index in range(count):
+        code = '{0}{1:02d}'.format(generator.choice(CODE_PREFIXES),
+                                   generator.integer(0, 99))
+        line = 'x = {0}\n'.format(index)
+        violations.append(style_guide.Violation(
+            code, 'file_{0}.py'.format(index // 100), index % 100 + 1,
+            generator.integer(1, 79), 'message about ' + code, line,
+        ))
+    return violations
+
+
+def checks_with(**plugins):
+    """Create the checks a FileChecker expects with only these plugins."""
+    checks = dict((plugin_type, []) for plugin_type in PLUGIN_TYPES)
+    checks.update(plugins)
+    return checks
+
+
+def file_checker_factory(filename, checks, options):
+    """Create a function making a new FileChecker for the file."""
+    return lambda: checker.FileChecker(filename, checks, options)
+
+
+def manager_benchmarks(application, directory):
+    """Benchmark finding the files to check in a directory."""
+    file_checker_manager = application.file_checker_manager
+
+    def find_files(_):
+        file_checker_manager.make_checkers([directory])
+
+    return [
+        Benchmark('manager.make_checkers', find_files,
+                  items=count_python_files(directory)),
+    ]
+
+
+def file_checker_benchmarks(application, filename, lines):
+    """Benchmark checking a file with the plugins of the application."""
+    make_file_checker = file_checker_factory(
+        filename, application.check_plugins.to_dictionary(),
+        application.options,
+    )
+
+    def process_tokens(file_checker):
+        file_checker.process_tokens()
+
+    def run_physical_checks(file_checker):
+        run_checks = file_checker.run_physical_checks
+        for line in file_checker.processor.lines:
+            run_checks(line)
+
+    return [
+        Benchmark('file_checker.process_tokens', process_tokens,
+                  setup=make_file_checker, items=lines),
+        Benchmark('file_checker.run_physical_checks', run_physical_checks,
+                  setup=make_file_checker, items=lines),
+    ]
+
+
+def physical_line_benchmarks(options, filename, lines):
+    """Benchmark physical-line plugins against checking all lines at once."""
+    per_line_checks = checks_with(physical_line_plugins=[
+        plugin_dictionary('W291', pycodestyle.trailing_whitespace),
+        plugin_dictionary('E501', pycodestyle.maximum_line_length),
+    ])
+    batched_checks = checks_with(physical_lines_plugins=[
+        plugin_dictionary('W291', trailing_whitespace),
+        plugin_dictionary('E501', maximum_line_length),
+    ])
+
+    def make_tokenized_file_checker(checks):
+        def make():
+            file_checker = checker.FileChecker(filename, checks, options)
+            file_checker.processor.file_tokens
+            return file_checker
+        return make
+
+    def run_physical_checks(file_checker):
+        run_checks = file_checker.run_physical_checks
+        for line in file_checker.processor.lines:
+            run_checks(line)
+
+    def run_batched_physical_checks(file_checker):
+        file_checker.run_physical_lines_checks()
+
+    return [
+        Benchmark('file_checker.run_physical_checks.per-line',
+                  run_physical_checks,
+                  setup=make_tokenized_file_checker(per_line_checks),
+                  items=lines),
+        Benchmark('file_checker.run_physical_checks.batched',
+                  run_batched_physical_checks,
+                  setup=make_tokenized_file_checker(batched_checks),
+                  items=lines),
+    ]
+
+
+def logical_line_benchmarks(options, filename, lines):
+    """Benchmark logical-line plugins against checking all of them at once."""
+    per_line_checks = checks_with(logical_line_plugins=[
+        plugin_dictionary('E201', pycodestyle.extraneous_whitespace),
+        plugin_dictionary('E241', pycodestyle.whitespace_around_comma),
+    ])
+    batched_checks = checks_with(logical_lines_plugins=[
+        plugin_dictionary('E201', extraneous_whitespace),
+        plugin_dictionary('E241', whitespace_around_comma),
+    ])
+
+    def run_logical_checks(file_checker):
+        file_checker.process_tokens()
+        file_checker.run_logical_lines_checks()
+
+    return [
+        Benchmark('file_checker.run_logical_checks.per-line',
+                  run_logical_checks,
+                  setup=file_checker_factory(filename, per_line_checks,
+                                             options),
+                  items=lines),
+        Benchmark('file_checker.run_logical_checks.batched',
+                  run_logical_checks,
+                  setup=file_checker_factory(filename, batched_checks,
+                                             options),
+                  items=lines),
+    ]
+
+
+def ast_benchmarks(options, filename, lines):
+    """Benchmark AST plugins walking the tree, sharing, or visiting it."""
+    walking_checks = checks_with(ast_plugins=[
+        plugin_dictionary('X100', walk_for_calls),
+        plugin_dictionary('X200', walk_for_imports),
+        plugin_dictionary('X300', walk_for_functions),
+    ])
+    ast_context_checks = checks_with(ast_plugins=[
+        plugin_dictionary('X100', find_calls),
+        plugin_dictionary('X200', find_imports),
+        plugin_dictionary('X300', find_functions),
+    ])
+    visitor_checks = checks_with(ast_visitor_plugins=[
+        plugin_dictionary('X100', CallVisitor),
+        plugin_dictionary('X200', ImportVisitor),
+        plugin_dictionary('X300', FunctionVisitor),
+    ])
+
+    def run_ast_checks(file_checker):
+        file_checker.run_ast_checks()
+
+    return [
+        Benchmark('file_checker.run_ast_checks.walking', run_ast_checks,
+                  setup=file_checker_factory(filename, walking_checks,
+                                             options),
+                  items=lines),
+        Benchmark('file_checker.run_ast_checks.ast-context', run_ast_checks,
+                  setup=file_checker_factory(filename, ast_context_checks,
+                                             options),
+                  items=lines),
+        Benchmark('file_checker.run_ast_checks.visitors', run_ast_checks,
+                  setup=file_checker_factory(filename, visitor_checks,
+                                             options),
+                  items=lines),
+    ]
+
+
+def style_guide_benchmarks(application):
+    """Benchmark deciding on, counting, and formatting violations."""
+    options = application.options
+    violations = make_violations(20000)
+    codes = [violation.code for violation in violations]
+
+    def decide(decision_engine):
+        decision_for = decision_engine.decision_for
+        for code in codes:
+            decision_for(code)
+
+    def record(stats):
+        for violation in violations:
+            stats.record(violation)
+
+    def format_violations(formatter):
+        formatter.start()
+        for violation in violations:
+            formatter.handle(violation)
+        formatter.stop()
+
+    return [
+        Benchmark('decision_engine.decision_for', decide,
+                  setup=lambda: style_guide.DecisionEngine(options),
+                  items=len(codes)),
+        Benchmark('statistics.record', record, setup=statistics.Statistics,
+                  items=len(violations)),
+        Benchmark('formatter.handle', format_violations,
+                  setup=lambda: application.formatter,
+                  items=len(violations)),
+    ]
+
+
+def component_benchmarks(paths):
+    """Benchmark the parts of Flake8 which handle every file or error."""
+    application = app.Application()
+    application.initialize(APPLICATION_ARGUMENTS + ['--jobs', '1'])
+    options = application.options
+    corpora_directory = os.path.dirname(paths['many-small-files'])
+
+    huge_file = os.path.join(paths['few-huge-files'], 'huge_0.py')
+    with open(huge_file) as fd:
+        huge_file_lines = sum(1 for _ in fd)
+
+    benchmarks = manager_benchmarks(application, corpora_directory)
+    benchmarks.extend(
+        file_checker_benchmarks(application, huge_file, huge_file_lines)
+    )
+    benchmarks.extend(
+        physical_line_benchmarks(options, huge_file, huge_file_lines)
+    )
+    benchmarks.extend(
+        logical_line_benchmarks(options, huge_file, huge_file_lines)
+    )
+    benchmarks.extend(ast_benchmarks(options, huge_file, huge_file_lines))
+    benchmarks.extend(style_guide_benchmarks(application))
+    return benchmarks
+
+
+def make_benchmarks(paths):
+    """Create every benchmark for the generated corpora."""
+    benchmarks = [
+        application_benchmark(name, paths[name], jobs=1)
+        for name, _ in corpus.CORPORA
+    ]
+    benchmarks.append(application_benchmark(
+        'many-small-files', paths['many-small-files'], jobs=4,
+    ))
+    benchmarks.extend(component_benchmarks(paths))
+    return benchmarks
+
+
+def current_commit():
+    """Find the commit of the source being benchmarked, if possible."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'], cwd=directory, stderr=devnull,
+            )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('ascii').strip()
+
+
+def run(arguments):
+    """Generate the corpora, run the benchmarks, and save the results."""
+    directory = arguments.corpus_dir or tempfile.mkdtemp(prefix='flake8-')
+    try:
+        paths = corpus.generate(directory, seed=arguments.seed)
+        fingerprints = dict(
+            (name, corpus.fingerprint(path)) for name, path in paths.items()
+        )
+        results = {}
+        for benchmark in make_benchmarks(paths):
+            if arguments.filter and arguments.filter not in benchmark.name:
+                continue
+            result = benchmark.run(arguments.repeat)
+            results[benchmark.name] = result
+            print('{0:<45} {1:>10.4f}s'.format(benchmark.name,
+                                               result['best']))
+    finally:
+        if arguments.corpus_dir is None:
+            shutil.rmtree(directory)
+
+    report = {
+        'flake8': flake8.__version__,
+        'python': utils.get_python_version(),
+        'platform': platform.platform(),
+        'commit': current_commit(),
+        'created': time.time(),
+        'seed': arguments.seed,
+        'repeat': arguments.repeat,
+        'corpora': fingerprints,
+        'benchmarks': results,
+    }
+    if arguments.output:
+        with open(arguments.output, 'w') as fd:
+            json.dump(report, fd, indent=2, sort_keys=True)
+            fd.write('\n')
+    return 0
+
+
+def compare(arguments):
+    """Compare two sets of results and report the regressions."""
+    with open(arguments.baseline) as fd:
+        baseline = json.load(fd)
+    with open(arguments.results) as fd:
+        results = json.load(fd)
+
+    for key in ('python', 'corpora'):
+        if baseline.get(key) != results.get(key):
+            print('warning: the results were produced with different '
+                  '{0}'.format(key), file=sys.stderr)
+
+    regressions = 0
+    print('{0:<45} {1:>10} {2:>10} {3:>8}'.format(
+        'benchmark', 'baseline', 'results', 'change',
+    ))
+    for name in sorted(results['benchmarks']):
+        if name not in baseline['benchmarks']:
+            continue
+        before = baseline['benchmarks'][name]['best']
+        after = results['benchmarks'][name]['best']
+        change = (after - before) / before
+        marker = ''
+        if change > arguments.threshold:
+            marker = '  regression'
+            regressions += 1
+        print('{0:<45} {1:>9.4f}s {2:>9.4f}s {3:>+7.1%}{4}'.format(
+            name, before, after, change, marker,
+        ))
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    """Parse the arguments and run the requested command."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command_name')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.set_defaults(command=run)
+    run_parser.add_argument('-o', '--output',
+                            help='file to write the results to as JSON')
+    run_parser.add_argument('-r', '--repeat', type=int, default=5,
+                            help='times to run each benchmark '
+                                 '(default: %(default)s)')
+    run_parser.add_argument('-k', '--filter',
+                            help='only run benchmarks whose name contains '
+                                 'this')
+    run_parser.add_argument('--seed', type=int, default=corpus.DEFAULT_SEED,
+                            help='seed to generate the corpora from '
+                                 '(default: %(default)s)')
+    run_parser.add_argument('--corpus-dir',
+                            help='directory to generate the corpora in and '
+                                 'keep (default: a temporary directory)')
+
+    compare_parser = commands.add_parser(
+        'compare', help='compare results and report regressions',
+    )
+    compare_parser.set_defaults(command=compare)
+    compare_parser.add_argument('baseline', help='results to compare with')
+    compare_parser.add_argument('results', help='results to compare')
+    compare_parser.add_argument('-t', '--threshold', type=float,
+                                default=DEFAULT_THRESHOLD,
+                                help='relative slowdown reported as a '
+                                     'regression (default: %(default)s)')
+
+    arguments = parser.parse_args(argv)
+    return arguments.command(arguments)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -81,7 +81,8 @@ setuptools.setup(
             'flake8 = flake8.main.setuptools_command:Flake8'
         ],
         'console_scripts': [
-            'flake8 = flake8.main.cli:main'
+            'flake8 = flake8.main.cli:main',
+            'flake8-client = flake8.main.client:main',
         ],
         'flake8.extension': [
             'F = flake8.plugins.pyflakes:FlakesChecker',
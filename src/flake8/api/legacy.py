@@ -20,13 +20,16 @@ def get_style_guide(**kwargs):
     r"""Provision a StyleGuide for use.
 
     :param \*\*kwargs:
-        Keyword arguments that provide some options for the StyleGuide.
+        Keyword arguments that provide some options for the StyleGuide. A
+        :class:`~flake8.checker.WorkerPool` passed as ``pool`` is used to
+        check files instead of starting new worker processes.
     :returns:
         An initialized StyleGuide
     :rtype:
         :class:`StyleGuide`
     """
     application = app.Application()
+    application.worker_pool = kwargs.pop('pool', None)
     application.parse_preliminary_options_and_args([])
     flake8.configure_logging(
         application.prelim_opts.verbose, application.prelim_opts.output_file)
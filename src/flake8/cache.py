@@ -0,0 +1,539 @@
+"""Persistent on-disk cache of the results of checking files."""
+import errno
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import flake8
+from flake8 import defaults
+from flake8 import utils
+
+LOG = logging.getLogger(__name__)
+
+__all__ = (
+    'EntryPointCache',
+    'ResultCache',
+    'default_directory',
+    'distributions_stamp',
+    'fingerprint_for',
+)
+
+# Characters the names of the directories holding results are made of
+HEX_DIGITS = frozenset('0123456789abcdef')
+
+# Names of the files and directories describing installed distributions
+DISTRIBUTION_SUFFIXES = ('.dist-info', '.egg-info', '.egg-link', '.egg')
+
+# NOTE(sigmavirus24): os.replace is only available on Python 3.3+. On POSIX
+# systems os.rename is atomic and overwrites the destination, which is all
+# we need for concurrent writers.
+_replace = getattr(os, 'replace', os.rename)
+
+
+class ResultCache(object):
+    """Store and retrieve the results of running checks against a file.
+
+    Entries are keyed by the digest of the file's contents combined with a
+    fingerprint of everything else that could influence the results: the
+    version of Flake8 and Python, the versions of the installed plugins, and
+    the options which plugins can observe. Each entry is a small JSON document
+    stored in its own file so that many processes can read and write the
+    cache at the same time.
+    """
+
+    def __init__(self, directory, fingerprint,
+                 max_size=defaults.CACHE_MAX_SIZE):
+        """Initialize our cache.
+
+        :param str directory:
+            Directory in which to store the cached results.
+        :param str fingerprint:
+            Digest of the plugins and options used for this run. See
+            :func:`fingerprint_for`.
+        :param int max_size:
+            Maximum size, in bytes, the cache may occupy after
+            :meth:`prune` has been called.
+        """
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+
+    def __repr__(self):
+        """Provide helpful debugging representation."""
+        return 'ResultCache({0!r})'.format(self.directory)
+
+    def __eq__(self, other):
+        """Compare the caches by where and for what they store results."""
+        return (isinstance(other, ResultCache) and
+                (self.directory, self.fingerprint, self.max_size) ==
+                (other.directory, other.fingerprint, other.max_size))
+
+    def __ne__(self, other):
+        """Compare the caches by where and for what they store results."""
+        return not self == other
+
+    def key_for(self, filename, lines):
+        # type: (str, List[str]) -> str
+        """Generate the key for a file with the given lines.
+
+        :param str filename:
+            Name of the file being checked.
+        :param list lines:
+            The lines of the file being checked.
+        :returns:
+            Hexadecimal digest identifying this file's results.
+        :rtype:
+            str
+        """
+        hasher = hashlib.sha256()
+        hasher.update(_to_bytes(self.fingerprint))
+        hasher.update(b'\0')
+        hasher.update(_to_bytes(filename))
+        hasher.update(b'\0')
+        for line in lines:
+            hasher.update(_to_bytes(line))
+        return hasher.hexdigest()
+
+    def path_for(self, key):
+        # type: (str) -> str
+        """Return the path to the file storing the entry for ``key``."""
+        return os.path.join(self.directory, key[:2], key[2:] + '.json')
+
+    def get(self, key):
+        """Retrieve the results stored for ``key``.
+
+        :param str key:
+            Key generated by :meth:`key_for`.
+        :returns:
+            A tuple of the list of results, the statistics dictionary, and the
+            mapping of ``# noqa`` comments, or ``None`` if nothing usable is
+            stored for ``key``.
+        :rtype:
+            tuple
+        """
+        path = self.path_for(key)
+        try:
+            with open(path, 'r') as fd:
+                entry = json.load(fd)
+            results = [tuple(result) for result in entry['results']]
+            statistics = entry['statistics']
+            noqa_line_mapping = dict(
+                (line_number, codes if codes is None else tuple(codes))
+                for line_number, codes in entry['noqa']
+            )
+        except (IOError, OSError, ValueError, KeyError, TypeError) as exc:
+            if getattr(exc, 'errno', None) != errno.ENOENT:
+                LOG.debug('Unable to read cache entry "%s": %s', path, exc)
+            return None
+
+        # Record that this entry was recently used so that pruning the cache
+        # evicts the least recently used entries first.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return results, statistics, noqa_line_mapping
+
+    def set(self, key, results, statistics, noqa_line_mapping):
+        """Store the results and statistics for ``key``.
+
+        The entry is written to a temporary file which is then renamed into
+        place so that concurrent readers never observe a partial entry and
+        concurrent writers of the same entry do not corrupt each other.
+
+        :param str key:
+            Key generated by :meth:`key_for`.
+        :param list results:
+            The results reported by :class:`~flake8.checker.FileChecker`.
+        :param dict statistics:
+            The statistics gathered by
+            :class:`~flake8.checker.FileChecker`.
+        :param dict noqa_line_mapping:
+            The mapping of line numbers to the codes ignored on them, as
+            generated by
+            :meth:`~flake8.processor.FileProcessor.noqa_line_mapping`.
+        """
+        entry = {
+            'results': results,
+            'statistics': statistics,
+            # NOTE(sigmavirus24): JSON objects only have string keys so we
+            # store the mapping as pairs to preserve the line numbers.
+            'noqa': sorted(noqa_line_mapping.items()),
+        }
+        _write_json(self.path_for(key), entry)
+
+    def timings_path(self):
+        # type: () -> str
+        """Return the path to the timings of files in this directory."""
+        digest = hashlib.sha256(_to_bytes(os.getcwd())).hexdigest()
+        return os.path.join(self.directory, 'timings', digest[:16] + '.json')
+
+    def get_timings(self):
+        # type: () -> Dict[str, Tuple[int, float]]
+        """Retrieve how long it took to check files previously.
+
+        :returns:
+            Dictionary mapping the absolute path of each file to a tuple of
+            its size in bytes and the number of seconds it took to check it
+            the last time it was checked.
+        :rtype:
+            dict
+        """
+        path = self.timings_path()
+        try:
+            with open(path, 'r') as fd:
+                timings = json.load(fd)
+            return dict(
+                (filename, (int(size), float(seconds)))
+                for filename, (size, seconds) in timings.items()
+            )
+        except (IOError, OSError, ValueError, TypeError,
+                AttributeError) as exc:
+            if getattr(exc, 'errno', None) != errno.ENOENT:
+                LOG.debug('Unable to read timings "%s": %s', path, exc)
+            return {}
+
+    def update_timings(self, timings):
+        # type: (Dict[str, Tuple[int, float]]) -> NoneType
+        """Record how long it took to check files.
+
+        :param dict timings:
+            Dictionary mapping the absolute path of each file that was checked
+            to a tuple of its size in bytes and the number of seconds it took
+            to check it. Files which were not checked keep their previous
+            timings.
+        """
+        if not timings:
+            return
+        updated_timings = self.get_timings()
+        updated_timings.update(timings)
+        _write_json(self.timings_path(), updated_timings)
+
+    def entries(self):
+        """Generate the path, size, and last access time of each entry.
+
+        Only the entries storing results are generated, not the timings and
+        entry-points stored alongside them.
+        """
+        for name in _listdir(self.directory):
+            if len(name) != 2 or not HEX_DIGITS.issuperset(name):
+                continue
+            directory = os.path.join(self.directory, name)
+            for filename in _listdir(directory):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def usage_path(self):
+        # type: () -> str
+        """Return the path to the number and size of the entries."""
+        return os.path.join(self.directory, 'usage.json')
+
+    def get_usage(self):
+        # type: () -> Optional[Tuple[int, int]]
+        """Retrieve the number and total size of the entries.
+
+        :returns:
+            A tuple of the number of entries and their total size in bytes as
+            recorded by :meth:`prune`, or ``None`` if nothing was recorded.
+        :rtype:
+            tuple
+        """
+        path = self.usage_path()
+        try:
+            with open(path, 'r') as fd:
+                usage = json.load(fd)
+            return int(usage['entries']), int(usage['size'])
+        except (IOError, OSError, ValueError, KeyError, TypeError) as exc:
+            if getattr(exc, 'errno', None) != errno.ENOENT:
+                LOG.debug('Unable to read usage "%s": %s', path, exc)
+            return None
+
+    def prune(self, added_entries=None):
+        # type: (Optional[int]) -> int
+        """Evict the least recently used entries exceeding the size limit.
+
+        Finding the least recently used entries means looking at every entry
+        so the number and total size of the entries are recorded each time.
+        When ``added_entries`` is given, the entries are only looked at if
+        adding that many entries of the average size recorded could exceed
+        the size limit.
+
+        :param int added_entries:
+            The number of entries stored since the cache was last pruned.
+        :returns:
+            The number of entries evicted.
+        :rtype:
+            int
+        """
+        usage = None if added_entries is None else self.get_usage()
+        if usage is not None and usage[0]:
+            entry_count, total_size = usage
+            estimated_size = (total_size +
+                              added_entries * total_size // entry_count)
+            if estimated_size <= self.max_size:
+                self._set_usage(entry_count + added_entries, estimated_size)
+                return 0
+
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        evicted = 0
+        for path, size, _ in entries:
+            if total_size <= self.max_size:
+                break
+            _remove(path)
+            total_size -= size
+            evicted += 1
+        if evicted:
+            LOG.info('Evicted %d entries from the cache in "%s"',
+                     evicted, self.directory)
+        self._set_usage(len(entries) - evicted, total_size)
+        return evicted
+
+    def _set_usage(self, entry_count, total_size):
+        _write_json(self.usage_path(), {
+            'entries': entry_count,
+            'size': total_size,
+        })
+
+
+class EntryPointCache(object):
+    """Store the entry-points of the installed distributions.
+
+    Finding entry-points with :mod:`pkg_resources` means importing it, which
+    scans every installed distribution. The entry-points found are stored
+    along with a stamp of the distributions installed on :data:`sys.path` (see
+    :func:`distributions_stamp`) and reused until the stamp changes.
+    """
+
+    def __init__(self, directory):
+        """Initialize our cache.
+
+        :param str directory:
+            Directory in which to store the entry-points.
+        """
+        self.directory = directory
+
+    def __repr__(self):
+        """Provide helpful debugging representation."""
+        return 'EntryPointCache({0!r})'.format(self.directory)
+
+    def path_for(self, stamp):
+        # type: (List[List[Union[str, list]]]) -> str
+        """Return the path of the file for this interpreter and its paths.
+
+        Each interpreter and list of paths it imports from gets its own file
+        so that switching between virtual environments or projects does not
+        discard the entry-points found for the others.
+        """
+        hasher = hashlib.sha256()
+        hasher.update(_to_bytes(sys.executable))
+        for path, _ in stamp:
+            hasher.update(b'\0')
+            hasher.update(_to_bytes(path))
+        digest = hasher.hexdigest()
+        return os.path.join(self.directory, 'entry-points',
+                            digest[:16] + '.json')
+
+    def get(self, stamp):
+        """Retrieve the entry-points stored for the stamp.
+
+        :param list stamp:
+            The stamp generated by :func:`distributions_stamp`.
+        :returns:
+            The list of entry-points, as given to :meth:`set`, or ``None`` if
+            the installed distributions changed since they were stored.
+        :rtype:
+            list
+        """
+        path = self.path_for(stamp)
+        try:
+            with open(path, 'r') as fd:
+                entry = json.load(fd)
+            if entry['stamp'] != stamp:
+                LOG.debug('The installed distributions changed since "%s" '
+                          'was written', path)
+                return None
+            return entry['entry_points']
+        except (IOError, OSError, ValueError, KeyError, TypeError) as exc:
+            if getattr(exc, 'errno', None) != errno.ENOENT:
+                LOG.debug('Unable to read entry-points "%s": %s', path, exc)
+            return None
+
+    def set(self, stamp, entry_points):
+        """Store the entry-points found for the stamp.
+
+        :param list stamp:
+            The stamp generated by :func:`distributions_stamp`.
+        :param list entry_points:
+            The entry-points found. This must be serializable to JSON.
+        """
+        _write_json(self.path_for(stamp), {
+            'stamp': stamp,
+            'entry_points': entry_points,
+        })
+
+
+def distributions_stamp(paths=None):
+    # type: (Optional[List[str]]) -> List[List[Union[str, list]]]
+    """Record the distributions installed on each path.
+
+    :param list paths:
+        The paths to look for distributions on. Defaults to
+        :data:`sys.path`.
+    :returns:
+        Pairs of the absolute path of each directory and the list of its
+        distributions. Each distribution is a pair of the name of its
+        metadata (e.g., ``flake8-3.5.0.dist-info``) and the modification time
+        of its ``entry_points.txt``, or of the metadata itself. The list is
+        ``None`` if the path is not a directory.
+    :rtype:
+        list
+    """
+    stamp = []
+    for path in (sys.path if paths is None else paths):
+        directory = os.path.abspath(path or os.curdir)
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            stamp.append([directory, None])
+            continue
+
+        distributions = []
+        for name in names:
+            if not name.endswith(DISTRIBUTION_SUFFIXES):
+                continue
+            metadata = os.path.join(directory, name)
+            modified = None
+            for candidate in (os.path.join(metadata, 'entry_points.txt'),
+                              metadata):
+                try:
+                    modified = os.stat(candidate).st_mtime
+                    break
+                except OSError:
+                    pass
+            distributions.append([name, modified])
+        stamp.append([directory, distributions])
+    return stamp
+
+
+def default_directory():
+    # type: () -> str
+    """Find the default directory for the cache.
+
+    This honors ``XDG_CACHE_HOME`` and ``LOCALAPPDATA`` (on Windows) before
+    falling back to ``~/.cache``.
+
+    :returns:
+        Path to the directory the cache should use by default.
+    :rtype:
+        str
+    """
+    if utils.is_windows():
+        base = os.environ.get('LOCALAPPDATA')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'flake8')
+
+
+def fingerprint_for(options, plugin_versions, plugin_files=(),
+                    plugin_names=()):
+    # type: (optparse.Values, List[Tuple[str, str]], List[str], List[str]) -> str  # noqa: E501
+    """Compute the fingerprint of everything, besides the file, that matters.
+
+    :param options:
+        Parsed option values from config and command-line.
+    :type options:
+        optparse.Values
+    :param list plugin_versions:
+        Tuples of plugin names and versions, as generated by
+        :meth:`flake8.plugins.manager.PluginManager.versions`.
+    :param list plugin_files:
+        Paths to the source of plugins without reliable versions, e.g.,
+        local plugins. Their modification times are part of the fingerprint.
+    :param list plugin_names:
+        Names of the entry-points of the plugins which are run. Plugins which
+        can never report a violation are not run at all.
+    :returns:
+        Hexadecimal digest of the parts of the configuration that affect the
+        results of running checks.
+    :rtype:
+        str
+    """
+    relevant_options = sorted(
+        (name, repr(value)) for name, value in vars(options).items()
+        if name not in defaults.CACHE_IRRELEVANT_OPTIONS
+    )
+    modification_times = []
+    for path in sorted(plugin_files):
+        try:
+            modification_times.append((path, os.stat(path).st_mtime))
+        except OSError:
+            modification_times.append((path, None))
+
+    fingerprint = json.dumps([
+        flake8.__version__,
+        sys.version,
+        sorted((str(name), str(version)) for name, version in plugin_versions),
+        modification_times,
+        sorted(str(name) for name in plugin_names),
+        relevant_options,
+    ], sort_keys=True)
+    return hashlib.sha256(_to_bytes(fingerprint)).hexdigest()
+
+
+def _write_json(path, data):
+    directory = os.path.dirname(path)
+    try:
+        _makedirs(directory)
+        fd, temporary_path = tempfile.mkstemp(
+            prefix='.', suffix='.tmp', dir=directory,
+        )
+        try:
+            with os.fdopen(fd, 'w') as temporary_file:
+                json.dump(data, temporary_file)
+            _replace(temporary_path, path)
+        except Exception:
+            _remove(temporary_path)
+            raise
+    except (IOError, OSError, TypeError, ValueError) as exc:
+        LOG.warning('Unable to write cache file "%s": %s', path, exc)
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return value.encode('utf-8', 'replace')
+
+
+def _makedirs(directory):
+    try:
+        os.makedirs(directory)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
+
+
+def _listdir(directory):
+    try:
+        return os.listdir(directory)
+    except OSError:
+        return []
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as exc:
+        if exc.errno != errno.ENOENT:
+            LOG.debug('Unable to remove "%s": %s', path, exc)
@@ -1,10 +1,14 @@
 """Checker Manager and Checker classes."""
-import collections
 import errno
+import inspect
+import itertools
 import logging
+import operator
 import os
 import signal
 import sys
+import time
+import timeit
 import tokenize
 
 try:
@@ -12,6 +16,7 @@ try:
 except ImportError:
     multiprocessing = None
 
+from flake8 import cache
 from flake8 import defaults
 from flake8 import exceptions
 from flake8 import processor
@@ -34,6 +39,18 @@ SERIAL_RETRY_ERRNOS = {
     # noise in diffs.
 }
 
+# The number of chunks of work we aim to give each worker process
+CHUNKS_PER_JOB = 4
+
+# Options which can not change the results, see
+# defaults.CACHE_IRRELEVANT_OPTIONS, but which the worker processes read
+# themselves
+WORKER_OPTIONS = frozenset(['benchmark', 'profile_plugins'])
+
+# The checks, options, and cache given to this process by _pool_init when it
+# is one of the workers of a WorkerPool
+_worker_context = None
+
 
 class Manager(object):
     """Manage the parallelism and checker instances for each plugin and file.
@@ -52,9 +69,15 @@ class Manager(object):
 
     - Organizing the results of each checker so we can group the output
       together and make our output deterministic.
+
+    - Providing the :class:`~flake8.cache.ResultCache` used to skip checking
+      files whose results are already known.
+
+    - Checking files with a :class:`WorkerPool` it was given, which outlives
+      the Manager, or with one it starts and shuts down itself.
     """
 
-    def __init__(self, style_guide, arguments, checker_plugins):
+    def __init__(self, style_guide, arguments, checker_plugins, pool=None):
         """Initialize our Manager instance.
 
         :param style_guide:
@@ -67,6 +90,12 @@ class Manager(object):
             The plugins representing checks parsed from entry-points.
         :type checker_plugins:
             flake8.plugins.manager.Checkers
+        :param pool:
+            The worker processes to check files with. It is only used when
+            it has as many workers as we would otherwise start and is left
+            running after checking files.
+        :type pool:
+            flake8.checker.WorkerPool
         """
         self.arguments = arguments
         self.style_guide = style_guide
@@ -75,28 +104,123 @@ class Manager(object):
         self.jobs = self._job_count()
         self.using_multiprocessing = self.jobs > 1
         self.pool = None
+        #: Whether we started :attr:`pool` and must shut it down
+        self.owns_pool = True
         self.processes = []
-        self.checkers = []
-        self.statistics = {
-            'files': 0,
-            'logical lines': 0,
-            'physical lines': 0,
-            'tokens': 0,
-        }
+        self.filenames = []
+        self.results = []
+        #: Whether results are reported as soon as each file is checked
+        self.streaming = False
+        #: How many files which finished early may be held back to report
+        #: streamed results in order, or ``None`` to not order them
+        self.stream_buffer_size = None
+        self.results_found = 0
+        self.results_reported = 0
+        self._exclude_patterns = None
+        self._matches_exclude = None
+        self._completed_filenames = set()
+        #: The time spent in, and the number of calls to, each plugin keyed
+        #: by the plugin's name when profiling plugins
+        self.plugin_statistics = {}
+        #: The seconds spent in each of the :data:`~flake8.defaults.PHASES`
+        #: of checking the files when benchmarking
+        self.phase_statistics = {}
+        self.statistics = {}
+        self._reset_statistics()
+        self.cache = self._make_cache()
 
         if self.using_multiprocessing:
+            if pool is not None and pool.jobs == self.jobs:
+                self.pool = pool
+                self.owns_pool = False
+                return
             try:
-                self.pool = multiprocessing.Pool(self.jobs, _pool_init)
+                self.pool = WorkerPool(self.jobs, self._checking_context())
             except OSError as oserr:
                 if oserr.errno not in SERIAL_RETRY_ERRNOS:
                     raise
                 self.using_multiprocessing = False
 
+    def _checking_context(self):
+        # type: () -> Tuple[dict, optparse.Values, cache.ResultCache]
+        return (self.checks.to_dictionary(), self.options, self.cache)
+
+    def _make_cache(self):
+        # type: () -> Union[cache.ResultCache, NoneType]
+        if self.options.no_cache:
+            return None
+        if self.options.profile_plugins:
+            LOG.info('Not using the result cache while profiling plugins')
+            return None
+
+        plugin_manager = self.checks.manager
+        local_plugin_files = []
+        for plugin in plugin_manager.plugins.values():
+            if not plugin.local:
+                continue
+            try:
+                local_plugin_files.append(inspect.getfile(plugin.plugin))
+            except TypeError:
+                LOG.debug('Unable to find the source of %r', plugin)
+
+        fingerprint = cache.fingerprint_for(
+            self.options, plugin_manager.versions(), local_plugin_files,
+            plugin_manager.names,
+        )
+        directory = self.options.cache_dir or cache.default_directory()
+        LOG.info('Using the result cache in "%s"', directory)
+        return cache.ResultCache(directory, fingerprint)
+
+    def _reset_statistics(self):
+        self.plugin_statistics = {}
+        self.phase_statistics = dict.fromkeys(
+            (phase for phase, _ in defaults.PHASES), 0.0
+        )
+        self.statistics = {
+            'files': 0,
+            'logical lines': 0,
+            'physical lines': 0,
+            'tokens': 0,
+            'cached files': 0,
+        }
+
     def _process_statistics(self):
-        for checker in self.checkers:
+        for _, _, statistics, _ in self.results:
             for statistic in defaults.STATISTIC_NAMES:
-                self.statistics[statistic] += checker.statistics[statistic]
-        self.statistics['files'] += len(self.checkers)
+                self.statistics[statistic] += statistics[statistic]
+            self.statistics['cached files'] += statistics.get(
+                'cached files', 0
+            )
+            for name, timing in statistics.get('plugins', {}).items():
+                plugin_type, seconds, calls = timing
+                total = self.plugin_statistics.setdefault(
+                    name, [plugin_type, 0.0, 0],
+                )
+                total[1] += seconds
+                total[2] += calls
+            for phase, seconds in statistics.get('phases', {}).items():
+                self.phase_statistics[phase] += seconds
+        self.statistics['files'] += len(self.results)
+
+    def slowest_files(self, count):
+        # type: (int) -> List[Tuple[str, dict]]
+        """Find the files which took the longest to check.
+
+        :param int count:
+            The number of files to return.
+        :returns:
+            Up to ``count`` pairs of the name of a file and its statistics,
+            slowest first.
+        :rtype:
+            list
+        """
+        timed_files = [
+            (filename, statistics)
+            for filename, _, statistics, _ in self.results
+            if 'seconds elapsed' in statistics
+        ]
+        timed_files.sort(key=lambda item: -item[1]['seconds elapsed'])
+        return timed_files[:count]
 
     def _job_count(self):
         # type: () -> int
@@ -106,9 +230,12 @@ class Manager(object):
         #   implemenation issues
         # - the user provided stdin and that's not something we can handle
         #   well
-        # - we're processing a diff, which again does not work well with
-        #   multiprocessing and which really shouldn't require multiprocessing
         # - the user provided some awful input
+        #
+        # NOTE(sigmavirus24): Processing a diff works with multiprocessing.
+        # The workers check the whole of each file in the diff and the parent
+        # process keeps only the violations on lines the diff touched when
+        # it reports the results (see Violation.is_in).
         if not multiprocessing:
             LOG.warning('The multiprocessing module is not available. '
                         'Ignoring --jobs arguments.')
@@ -128,11 +255,6 @@ class Manager(object):
                         'input using - . Ignoring --jobs arguments.')
             return 0
 
-        if self.options.diff:
-            LOG.warning('The --diff option was specified with --jobs but '
-                        'they are not compatible. Ignoring --jobs arguments.')
-            return 0
-
         jobs = self.options.jobs
         if jobs != 'auto' and not jobs.isdigit():
             LOG.warning('"%s" is not a valid parameter to --jobs. Must be one '
@@ -153,7 +275,7 @@ class Manager(object):
         # it to an integer
         return int(jobs)
 
-    def _handle_results(self, filename, results):
+    def _handle_results(self, filename, results, noqa_line_mapping=None):
         style_guide = self.style_guide
         reported_results_count = 0
         for (error_code, line_number, column, text, physical_line) in results:
@@ -164,15 +286,18 @@ class Manager(object):
                 column_number=column,
                 text=text,
                 physical_line=physical_line,
+                noqa_line_mapping=noqa_line_mapping,
             )
         return reported_results_count
 
-    def is_path_excluded(self, path):
-        # type: (str) -> bool
+    def is_path_excluded(self, path, absolute_path=None):
+        # type: (str, str) -> bool
         """Check if a path is excluded.
 
         :param str path:
             Path to check against the exclude patterns.
+        :param str absolute_path:
+            The absolute path of ``path``, if it is already known.
         :returns:
             True if there are exclude patterns and the path matches,
             otherwise False.
@@ -183,24 +308,62 @@ class Manager(object):
             if self.options.stdin_display_name == 'stdin':
                 return False
             path = self.options.stdin_display_name
+            absolute_path = None
 
         exclude = self.options.exclude
         if not exclude:
             return False
+        if exclude is not self._exclude_patterns:
+            self._exclude_patterns = exclude
+            self._matches_exclude = utils.compile_patterns(exclude)
+
         basename = os.path.basename(path)
-        if utils.fnmatch(basename, exclude):
+        if self._matches_exclude(basename):
             LOG.debug('"%s" has been excluded', basename)
             return True
 
-        absolute_path = os.path.abspath(path)
-        match = utils.fnmatch(absolute_path, exclude)
+        if absolute_path is None:
+            absolute_path = os.path.abspath(path)
+        match = self._matches_exclude(absolute_path)
         LOG.debug('"%s" has %sbeen excluded', absolute_path,
                   '' if match else 'not ')
         return match
 
+    def _pruning_predicate(self, directory):
+        # type: (str) -> callable
+        """Build the predicate deciding which paths in a directory to skip.
+
+        With ``--respect-gitignore`` this also skips the files and
+        directories git ignores, otherwise it is :meth:`is_path_excluded`.
+        """
+        is_path_excluded = self.is_path_excluded
+        if not self.options.respect_gitignore:
+            return is_path_excluded
+
+        ignored = utils.git_ignored_paths(directory)
+        if ignored is None:
+            LOG.warning('"%s" is not inside a git work tree so no files will '
+                        'be ignored', directory)
+            return is_path_excluded
+        LOG.debug('git ignores %d paths beneath "%s"', len(ignored),
+                  directory)
+        if not ignored:
+            return is_path_excluded
+
+        def is_path_ignored_or_excluded(path, absolute_path):
+            if absolute_path in ignored:
+                LOG.debug('"%s" is ignored by git', absolute_path)
+                return True
+            return is_path_excluded(path, absolute_path)
+        return is_path_ignored_or_excluded
+
     def make_checkers(self, paths=None):
         # type: (List[str]) -> NoneType
-        """Create checkers for each file."""
+        """Find the names of the files to check.
+
+        This only walks the paths provided; files are read (and files using
+        ``flake8: noqa`` comments are skipped) by the processes checking them.
+        """
         if paths is None:
             paths = self.arguments
 
@@ -210,14 +373,17 @@ class Manager(object):
         filename_patterns = self.options.filename
         running_from_vcs = self.options._running_from_vcs
         running_from_diff = self.options.diff
+        if filename_patterns:
+            matches_filename = utils.compile_patterns(filename_patterns)
+        else:
+            def matches_filename(filename):
+                return True
 
         # NOTE(sigmavirus24): Yes this is a little unsightly, but it's our
         # best solution right now.
         def should_create_file_checker(filename, argument):
             """Determine if we should create a file checker."""
-            matches_filename_patterns = utils.fnmatch(
-                filename, filename_patterns
-            )
+            matches_filename_patterns = matches_filename(filename)
             is_stdin = filename == '-'
             file_exists = os.path.exists(filename)
             # NOTE(sigmavirus24): If a user explicitly specifies something,
@@ -234,75 +400,239 @@ class Manager(object):
                      (explicitly_provided or matches_filename_patterns)) or
                     is_stdin)
 
-        checks = self.checks.to_dictionary()
-        checkers = (
-            FileChecker(filename, checks, self.options)
-            for argument in paths
-            for filename in utils.filenames_from(argument,
-                                                 self.is_path_excluded)
-            if should_create_file_checker(filename, argument)
-        )
-        self.checkers = [
-            checker for checker in checkers if checker.should_process
-        ]
-        LOG.info('Checking %d files', len(self.checkers))
+        filenames = []
+        for argument in paths:
+            if self.is_path_excluded(argument):
+                continue
+            if not os.path.isdir(argument):
+                if should_create_file_checker(argument, argument):
+                    filenames.append(argument)
+                continue
+            # NOTE(sigmavirus24): walk_files() only yields files which exist
+            # and none of them was provided explicitly.
+            filenames.extend(
+                filename
+                for filename in utils.walk_files(
+                    argument, self._pruning_predicate(argument),
+                )
+                if matches_filename(filename)
+            )
+        self.filenames = filenames
+        LOG.info('Checking %d files', len(self.filenames))
 
     def report(self):
         # type: () -> (int, int)
         """Report all of the errors found in the managed file checkers.
 
-        This iterates over each of the checkers and reports the errors sorted
-        by line number.
+        This iterates over the results for each file and reports the errors
+        sorted by line number.
+
+        If the results were streamed, they have already been reported and
+        this only returns the totals.
 
         :returns:
             A tuple of the total results found and the results reported.
         :rtype:
             tuple(int, int)
         """
-        results_reported = results_found = 0
-        for checker in self.checkers:
-            results = sorted(checker.results, key=lambda tup: (tup[1], tup[2]))
-            filename = checker.display_name
-            with self.style_guide.processing_file(filename):
-                results_reported += self._handle_results(filename, results)
-            results_found += len(results)
-        return (results_found, results_reported)
+        if not self.streaming:
+            self.results_found = self.results_reported = 0
+            for result in self.results:
+                self._report_file(result)
+        return (self.results_found, self.results_reported)
+
+    def _report_file(self, result):
+        filename, results, _, noqa_line_mapping = result
+        results = sorted(results, key=lambda tup: (tup[1], tup[2]))
+        with self.style_guide.processing_file(filename):
+            self.results_reported += self._handle_results(
+                filename, results, noqa_line_mapping,
+            )
+        self.results_found += len(results)
+
+    def _needs_physical_lines(self):
+        # type: () -> bool
+        # NOTE(sigmavirus24): Hooks for version control check copies of the
+        # files which may be removed before the results are reported, so the
+        # lines are read while we still have them in case a later report
+        # needs them.
+        formatter = getattr(self.style_guide, 'formatter', None)
+        return bool(
+            self.options.show_source or
+            self.options._running_from_vcs or
+            getattr(formatter, 'needs_physical_lines', False)
+        )
+
+    def _resolve_completed(self, completed):
+        # NOTE(sigmavirus24): The physical lines have to be read while the
+        # files are where we checked them. The git hook, for example, removes
+        # its copies of the files before the results are reported.
+        for filename, result in completed:
+            if result is not None:
+                display_name, results, statistics, noqa_line_mapping = result
+                result = (
+                    display_name,
+                    self._resolve_physical_lines(filename, results),
+                    statistics,
+                    noqa_line_mapping,
+                )
+            yield filename, result
+
+    def _resolve_physical_lines(self, filename, results):
+        # Workers only send the physical lines which are not in the file,
+        # see compact_results.
+        if all(result[4] is not None for result in results):
+            return results
+        try:
+            file_processor = processor.FileProcessor(filename, self.options)
+        except IOError:
+            return results
+        return [
+            result if result[4] is not None else
+            result[:4] + (file_processor.line_for(result[1]),)
+            for result in results
+        ]
+
+    def stream_results(self, buffer_size=None):
+        """Report the results of each file as soon as it has been checked.
+
+        :param int buffer_size:
+            If provided, files are reported in the same order as they would
+            be without streaming. Up to this many files which finished before
+            the next file to report are held back. When more are waiting, the
+            earliest of them is reported anyway.
+        """
+        self.streaming = True
+        self.stream_buffer_size = buffer_size
 
     def _force_cleanup(self):
-        if self.pool is not None:
+        # NOTE(sigmavirus24): A pool we were given is only stopped when it
+        # may still be checking our files, it starts new workers the next
+        # time it is used.
+        if self.pool is not None and (self.owns_pool or self.pool.busy):
             self.pool.terminate()
-            self.pool.join()
 
-    def run_parallel(self):
-        """Run the checkers in parallel."""
-        final_results = collections.defaultdict(list)
-        final_statistics = collections.defaultdict(dict)
-        pool_map = self.pool.imap_unordered(
-            _run_checks,
-            self.checkers,
-            chunksize=calculate_pool_chunksize(
-                len(self.checkers),
-                self.jobs,
-            ),
+    def _store_results(self, completed):
+        if self._needs_physical_lines():
+            completed = self._resolve_completed(completed)
+        if self.streaming:
+            self._stream_results(completed)
+            return
+
+        # NOTE(sigmavirus24): Files are checked in whatever order the workers
+        # finish them, so we sort by the file name to keep our output
+        # deterministic.
+        self.results = sorted(
+            (result for _, result in completed if result is not None),
+            key=lambda tup: tup[0],
         )
-        for ret in pool_map:
-            filename, results, statistics = ret
-            final_results[filename] = results
-            final_statistics[filename] = statistics
-        self.pool.close()
-        self.pool.join()
-        self.pool = None
 
-        for checker in self.checkers:
-            filename = checker.display_name
-            checker.results = sorted(final_results[filename],
-                                     key=lambda tup: (tup[2], tup[2]))
-            checker.statistics = final_statistics[filename]
+    def _stream_results(self, completed):
+        completed = self._track_completed(completed)
+        if self.stream_buffer_size is not None:
+            completed = reorder_results(
+                completed, sorted(self.filenames), self.stream_buffer_size,
+            )
+        for _, result in completed:
+            if result is None:
+                continue
+            self._report_file(result)
+            # Only hold on to what we need for the statistics
+            filename, _, statistics, _ = result
+            self.results.append((filename, [], statistics, None))
+
+    def _track_completed(self, completed):
+        # If we have to fall back to running in serial, we do not want to
+        # report the files we have already reported again.
+        for filename, result in completed:
+            self._completed_filenames.add(filename)
+            yield filename, result
+
+    def _estimate_costs(self):
+        # type: () -> Dict[str, float]
+        timings = {}
+        if self.cache is not None:
+            timings = self.cache.get_timings()
+
+        # Files we have never checked are assumed to take as long, per byte,
+        # as the files we have checked before.
+        total_size = sum(size for size, _ in timings.values())
+        seconds_per_byte = 1.0
+        if total_size:
+            seconds_per_byte = (
+                sum(seconds for _, seconds in timings.values()) / total_size
+            )
+
+        costs = {}
+        for filename in self.filenames:
+            try:
+                size = os.path.getsize(filename)
+            except OSError:
+                size = 0
+            previous_size, seconds = timings.get(
+                os.path.abspath(filename), (0, None),
+            )
+            if seconds is not None and previous_size:
+                # Scale the previous timing by how much the file has grown
+                costs[filename] = seconds * size / float(previous_size)
+            else:
+                costs[filename] = size * seconds_per_byte
+        return costs
+
+    def _record_timings(self):
+        timings = {}
+        for filename, _, statistics, _ in self.results:
+            seconds = statistics.get('seconds elapsed')
+            if seconds is None or statistics.get('cached files'):
+                continue
+            filename = os.path.abspath(filename)
+            try:
+                timings[filename] = (os.path.getsize(filename), seconds)
+            except OSError:
+                continue
+        self.cache.update_timings(timings)
+
+    def run_parallel(self):
+        """Run the checkers in parallel.
+
+        Only the names of the files are sent to the worker processes which
+        then read, check, and report back the results for each file. The
+        plugins, options, and cache are given to each worker once when it
+        starts (see :meth:`WorkerPool.check`) and the results are sent back
+        compacted by :func:`compact_results`. The files are sent in chunks
+        scheduled by :func:`schedule_chunks` from the size of each file and,
+        if we have a cache, how long it took to check the file previously.
+        """
+        if self.streaming and self.stream_buffer_size is not None:
+            # Send the files in the order we will report them so that we do
+            # not have to hold back many results.
+            filenames = sorted(self.filenames)
+            chunksize = calculate_pool_chunksize(len(filenames), self.jobs)
+            chunks = [filenames[i:i + chunksize]
+                      for i in range(0, len(filenames), chunksize)]
+        else:
+            chunks = schedule_chunks(
+                self.filenames, self._estimate_costs(), self.jobs,
+            )
+        checks, options, cache = self._checking_context()
+        pool_map = self.pool.check(chunks, checks, options, cache)
+        self._store_results(itertools.chain.from_iterable(pool_map))
+        if self.owns_pool:
+            self.pool.close()
 
     def run_serial(self):
         """Run the checkers in serial."""
-        for checker in self.checkers:
-            checker.run_checks()
+        checks = self.checks.to_dictionary()
+        filenames = self.filenames
+        if self.streaming and self.stream_buffer_size is not None:
+            # Check the files in the order we will report them so that
+            # nothing is held back or reported out of order.
+            filenames = sorted(filenames)
+        self._store_results(
+            (filename, _run_checks(filename, checks, self.options, self.cache))
+            for filename in filenames
+            if filename not in self._completed_filenames
+        )
 
     def run(self):
         """Run all the checkers.
@@ -339,20 +669,160 @@ class Manager(object):
             :meth:`~Manager.make_checkers`.
         """
         LOG.info('Making checkers')
+        self.results = []
+        self.results_found = self.results_reported = 0
+        self._completed_filenames = set()
+        self._reset_statistics()
         self.make_checkers(paths)
 
     def stop(self):
         """Stop checking files."""
         self._process_statistics()
+        statistics = self.statistics
+        if (self.cache is not None and
+                statistics['cached files'] < statistics['files']):
+            self._record_timings()
+            self.cache.prune(statistics['files'] - statistics['cached files'])
         for proc in self.processes:
             LOG.info('Joining %s to the main process', proc.name)
             proc.join()
 
 
+class WorkerPool(object):
+    """Worker processes which can check files for many Managers.
+
+    Starting the worker processes, and importing the plugins in each of them,
+    is paid once for as long as the pool is running rather than every time
+    files are checked. The workers are started when the pool is created with
+    the context to check files with, otherwise the first time it is used,
+    and started again the next time it is used after it was closed or
+    terminated.
+
+    Each worker is given the plugins, options, and cache to check files with
+    when it starts so that only the names of the files to check are sent
+    for every chunk of work. The workers keep running when they are used
+    with options which only change how the results are reported.
+
+    The pool can be used as a context manager which closes it on exit.
+    """
+
+    def __init__(self, jobs, context=None):
+        # type: (int, Union[NoneType, tuple]) -> NoneType
+        """Start our worker processes.
+
+        :param int jobs:
+            The number of worker processes to check files with.
+        :param tuple context:
+            The checks, options, and cache the workers check files with. The
+            workers are only started here when this is given since they
+            would have to be started again for the first call to
+            :meth:`check` otherwise.
+        :raises OSError:
+            If the worker processes can not be started.
+        """
+        #: The number of worker processes
+        self.jobs = jobs
+        #: The checks, options, and cache the workers were started with
+        self.context = context
+        #: Whether the workers may still be checking files we sent them
+        self.busy = False
+        self._pool = None
+        self._context_key = None
+        if context is not None:
+            self._context_key = _worker_context_key(context)
+            self._start()
+
+    def __repr__(self):
+        """Provide helpful debugging representation."""
+        return 'WorkerPool({0!r})'.format(self.jobs)
+
+    def __enter__(self):
+        """Return the pool to use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the pool when leaving the with statement."""
+        self.close()
+
+    @property
+    def running(self):
+        # type: () -> bool
+        """Whether the worker processes have been started."""
+        return self._pool is not None
+
+    def _start(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.jobs, _pool_init,
+                                              (self.context,))
+
+    def imap_unordered(self, func, iterable):
+        """Apply ``func`` to each item in the worker processes.
+
+        :returns:
+            Generator of the results in the order the workers finish them.
+        """
+        self._start()
+        self.busy = True
+        for result in self._pool.imap_unordered(func, iterable, chunksize=1):
+            yield result
+        self.busy = False
+
+    def check(self, chunks, checks, options, cache=None):
+        """Check chunks of files in the worker processes.
+
+        If the workers were started with other checks or cache, or with
+        options which change the results (see :func:`_worker_context_key`),
+        they are started again first.
+
+        :param list chunks:
+            Lists of the names of the files to check.
+        :param dict checks:
+            The plugins to check the files with.
+        :param options:
+            The parsed options.
+        :type options:
+            optparse.Values
+        :param cache:
+            The cache of results, if any.
+        :type cache:
+            flake8.cache.ResultCache
+        :returns:
+            Generator of the lists of filenames and their results for each
+            chunk in the order the workers finish them.
+        """
+        context = (checks, options, cache)
+        context_key = _worker_context_key(context)
+        if context_key != self._context_key:
+            if self.running:
+                LOG.info('Starting the workers again with other options')
+                self.close()
+            self.context = context
+            self._context_key = context_key
+        return self.imap_unordered(_run_checks_in_worker, chunks)
+
+    def close(self):
+        # type: () -> NoneType
+        """Wait for the workers to finish their work and stop them."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self.busy = False
+
+    def terminate(self):
+        # type: () -> NoneType
+        """Stop the workers immediately, discarding any work in progress."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self.busy = False
+
+
 class FileChecker(object):
     """Manage running checks for a file and aggregate the results."""
 
-    def __init__(self, filename, checks, options):
+    def __init__(self, filename, checks, options, cache=None):
         """Initialize our file checker.
 
         :param str filename:
@@ -365,20 +835,38 @@ class FileChecker(object):
             Parsed option values from config and command-line.
         :type options:
             optparse.Values
+        :param cache:
+            The cache of results from previous runs, if any.
+        :type cache:
+            flake8.cache.ResultCache
         """
         self.options = options
         self.filename = filename
         self.checks = checks
+        self.cache = cache
         self.results = []
+        self.noqa_line_mapping = None
         self.statistics = {
             'tokens': 0,
             'logical lines': 0,
             'physical lines': 0,
         }
+        #: The time spent in, and the number of calls to, each plugin keyed
+        #: by the plugin's name. Only recorded when this is not ``None``.
+        self.plugin_timings = None
+        #: The seconds spent in each of the :data:`~flake8.defaults.PHASES`
+        #: of checking the file. Only recorded when this is not ``None``.
+        self.phase_timings = None
+        #: The plugins of each type paired with the callables which run them,
+        #: see :meth:`bind_plugins`
+        self.bound_plugins = {}
         self.processor = self._make_processor()
         self.display_name = filename
         self.should_process = False
         if self.processor is not None:
+            self.processor.record_logical_lines = bool(
+                checks.get('logical_lines_plugins')
+            )
             self.display_name = self.processor.filename
             self.should_process = not self.processor.should_ignore_file()
             self.statistics['physical lines'] = len(self.processor.lines)
@@ -434,6 +922,114 @@ class FileChecker(object):
             )
         return plugin['plugin'](**arguments)
 
+    def bind_plugin(self, plugin, argument_name):
+        """Create a callable running the check in a single plugin.
+
+        Unlike :meth:`run_check`, the parameters of the plugin are looked
+        up once, so calling it only fetches the attributes of the processor
+        the plugin asks for.
+
+        :param dict plugin:
+            The plugin to run.
+        :param str argument_name:
+            The name of the parameter given to the callable, e.g.,
+            ``logical_line``.
+        :returns:
+            Callable taking the value of ``argument_name`` and returning
+            what the plugin returns.
+        """
+        processor = self.processor
+        function = plugin['plugin']
+        parameters = plugin['parameters']
+        names = tuple(name for name in parameters if name != argument_name)
+        uses_checker_state = 'checker_state' in parameters
+        if len(names) > 1:
+            get_values = operator.attrgetter(*names)
+        else:
+            # attrgetter only returns a tuple when given several names
+            get_value = operator.attrgetter(*names) if names else None
+
+            def get_values(obj):
+                return (get_value(obj),) if names else ()
+
+        def run_plugin(argument):
+            if uses_checker_state:
+                processor.update_checker_state_for(plugin)
+            try:
+                values = get_values(processor)
+            except AttributeError:
+                # NOTE(sigmavirus24): Let run_check decide whether the plugin
+                # can run without the parameters we do not have.
+                return self.run_check(plugin, **{argument_name: argument})
+            arguments = dict(zip(names, values))
+            arguments[argument_name] = argument
+            return function(**arguments)
+
+        return run_plugin
+
+    def bind_plugins(self, plugin_type, argument_name):
+        # type: (str, str) -> List[Tuple[dict, Callable]]
+        """Bind each plugin of a type with :meth:`bind_plugin` once.
+
+        :param str plugin_type:
+            The key of the plugins in :attr:`checks`, e.g.,
+            ``logical_line_plugins``.
+        :param str argument_name:
+            The name of the parameter given to each plugin.
+        :returns:
+            The plugins paired with the callables which run them.
+        :rtype:
+            list
+        """
+        bound = self.bound_plugins.get(plugin_type)
+        if bound is None:
+            bound = self.bound_plugins[plugin_type] = [
+                (plugin, self.bind_plugin(plugin, argument_name))
+                for plugin in self.checks[plugin_type]
+            ]
+        return bound
+
+    def _record_timing(self, plugin, plugin_type, start_time):
+        seconds = timeit.default_timer() - start_time
+        timing = self.plugin_timings.setdefault(
+            plugin['name'], [plugin_type, 0.0, 0],
+        )
+        timing[1] += seconds
+        timing[2] += 1
+
+    def _timed(self, phase, method):
+        timings = self.phase_timings
+
+        def timed_method(*args, **kwargs):
+            start_time = timeit.default_timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timings[phase] += timeit.default_timer() - start_time
+        return timed_method
+
+    def _time_phases(self):
+        # NOTE(sigmavirus24): The line-based checks run many times per file so
+        # we only pay for timing them when benchmarking by shadowing the
+        # methods on this instance.
+        self.run_physical_checks = self._timed(
+            'physical line checks', self.run_physical_checks,
+        )
+        self.run_logical_checks = self._timed(
+            'logical line checks', self.run_logical_checks,
+        )
+        self.run_physical_lines_checks = self._timed(
+            'physical line checks', self.run_physical_lines_checks,
+        )
+        self.run_logical_lines_checks = self._timed(
+            'logical line checks', self.run_logical_lines_checks,
+        )
+        self.process_tokens = self._timed('tokenize', self.process_tokens)
+        self.run_ast_checks = self._timed('ast checks', self.run_ast_checks)
+        self.processor.build_ast = self._timed(
+            'ast build', self.processor.build_ast,
+        )
+
     @staticmethod
     def _extract_syntax_information(exception):
         token = ()
@@ -482,8 +1078,11 @@ class FileChecker(object):
                         (exc_type.__name__, exception.args[0]))
             return
 
-        for plugin in self.checks['ast_plugins']:
-            checker = self.run_check(plugin, tree=ast)
+        profiling = self.plugin_timings is not None
+        for plugin, run_plugin in self.bind_plugins('ast_plugins', 'tree'):
+            if profiling:
+                start_time = timeit.default_timer()
+            checker = run_plugin(ast)
             # If the plugin uses a class, call the run method of it, otherwise
             # the call should return something iterable itself
             try:
@@ -497,6 +1096,55 @@ class FileChecker(object):
                     column=offset,
                     text=text,
                 )
+            if profiling:
+                self._record_timing(plugin, 'ast', start_time)
+
+        self.run_ast_visitors()
+
+    def run_ast_visitors(self):
+        """Run all checks visiting the nodes of the abstract syntax tree.
+
+        Each of these plugins is created once for the file with the
+        :attr:`~flake8.processor.FileProcessor.ast_context`. The tree is then
+        walked once and each node is given to the ``visit_<NodeType>``
+        method of every plugin which has one, e.g., ``visit_Call``. These
+        methods return or yield the line number, column, and text of each
+        error.
+        """
+        if not self.checks.get('ast_visitor_plugins'):
+            return
+
+        context = self.processor.ast_context
+        visitors = [
+            (plugin, run_plugin(context))
+            for plugin, run_plugin in self.bind_plugins('ast_visitor_plugins',
+                                                        'ast_context')
+        ]
+        profiling = self.plugin_timings is not None
+        report = self.report
+        handlers_by_type = {}
+        for node in context.nodes:
+            node_type = type(node)
+            handlers = handlers_by_type.get(node_type)
+            if handlers is None:
+                method_name = 'visit_' + node_type.__name__
+                handlers = handlers_by_type[node_type] = [
+                    (plugin, getattr(visitor, method_name))
+                    for plugin, visitor in visitors
+                    if hasattr(visitor, method_name)
+                ]
+            for plugin, handler in handlers:
+                if profiling:
+                    start_time = timeit.default_timer()
+                for line_number, column, text in handler(node) or ():
+                    report(
+                        error_code=None,
+                        line_number=line_number,
+                        column=column,
+                        text=text,
+                    )
+                if profiling:
+                    self._record_timing(plugin, 'ast visitor', start_time)
 
     def run_logical_checks(self):
         """Run all checks expecting a logical line."""
@@ -504,12 +1152,17 @@ class FileChecker(object):
         if not mapping:
             return
         self.processor.update_state(mapping)
+        if self.processor.record_logical_lines:
+            self.processor.record_logical_line(mapping)
 
         LOG.debug('Logical line: "%s"', logical_line.rstrip())
 
-        for plugin in self.checks['logical_line_plugins']:
-            self.processor.update_checker_state_for(plugin)
-            results = self.run_check(plugin, logical_line=logical_line) or ()
+        profiling = self.plugin_timings is not None
+        for plugin, run_plugin in self.bind_plugins('logical_line_plugins',
+                                                    'logical_line'):
+            if profiling:
+                start_time = timeit.default_timer()
+            results = run_plugin(logical_line) or ()
             for offset, text in results:
                 offset = find_offset(offset, mapping)
                 line_number, column_offset = offset
@@ -519,14 +1172,49 @@ class FileChecker(object):
                     column=column_offset,
                     text=text,
                 )
+            if profiling:
+                self._record_timing(plugin, 'logical line', start_time)
 
         self.processor.next_logical_line()
 
+    def run_logical_lines_checks(self):
+        """Run all checks expecting every logical line at once.
+
+        These plugins are given the table of logical lines the processor
+        recorded as ``logical_lines`` and yield the logical line, offset, and
+        text of each error. The offset is found in that logical line's
+        mapping like the offsets of checks expecting a logical line.
+        """
+        if not self.checks.get('logical_lines_plugins'):
+            return
+
+        logical_lines = self.processor.logical_lines
+        profiling = self.plugin_timings is not None
+        for plugin, run_plugin in self.bind_plugins('logical_lines_plugins',
+                                                    'logical_lines'):
+            if profiling:
+                start_time = timeit.default_timer()
+            for logical_line, offset, text in run_plugin(logical_lines) or ():
+                line_number, column_offset = find_offset(
+                    offset, logical_line.mapping,
+                )
+                self.report(
+                    error_code=None,
+                    line_number=line_number,
+                    column=column_offset,
+                    text=text,
+                )
+            if profiling:
+                self._record_timing(plugin, 'logical lines', start_time)
+
     def run_physical_checks(self, physical_line, override_error_line=None):
         """Run all checks for a given physical line."""
-        for plugin in self.checks['physical_line_plugins']:
-            self.processor.update_checker_state_for(plugin)
-            result = self.run_check(plugin, physical_line=physical_line)
+        profiling = self.plugin_timings is not None
+        for plugin, run_plugin in self.bind_plugins('physical_line_plugins',
+                                                    'physical_line'):
+            if profiling:
+                start_time = timeit.default_timer()
+            result = run_plugin(physical_line)
             if result is not None:
                 column_offset, text = result
                 error_code = self.report(
@@ -538,6 +1226,38 @@ class FileChecker(object):
                 )
 
                 self.processor.check_physical_error(error_code, physical_line)
+            if profiling:
+                self._record_timing(plugin, 'physical line', start_time)
+
+    def run_physical_lines_checks(self):
+        """Run all checks expecting every physical line at once.
+
+        These plugins are given the lines of the file as ``physical_lines``
+        and yield the line number, column, and text of each error. Like the
+        errors of checks expecting a physical line, each error may update
+        the state of the processor, e.g., its ``indent_char``.
+        """
+        if not self.checks.get('physical_lines_plugins'):
+            return
+
+        lines = self.processor.lines
+        profiling = self.plugin_timings is not None
+        for plugin, run_plugin in self.bind_plugins('physical_lines_plugins',
+                                                    'physical_lines'):
+            if profiling:
+                start_time = timeit.default_timer()
+            for line_number, column, text in run_plugin(lines) or ():
+                error_code = self.report(
+                    error_code=None,
+                    line_number=line_number,
+                    column=column,
+                    text=text,
+                )
+                self.processor.check_physical_error(
+                    error_code, self.processor.line_for(line_number),
+                )
+            if profiling:
+                self._record_timing(plugin, 'physical lines', start_time)
 
     def process_tokens(self):
         """Process tokens and trigger checks.
@@ -569,17 +1289,54 @@ class FileChecker(object):
             self.run_logical_checks()
 
     def run_checks(self):
-        """Run checks against the file."""
+        """Run checks against the file.
+
+        If a cache was provided and it contains the results for the current
+        contents of the file, those results are used instead of running the
+        checks.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key_for(self.processor.filename,
+                                           self.processor.lines)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                LOG.debug('Using cached results for "%s"', self.filename)
+                (self.results, self.statistics,
+                 self.noqa_line_mapping) = cached
+                self.statistics['cached files'] = 1
+                return self.filename, self.results, self.statistics
+
+        timings = self.phase_timings
+        if timings is not None:
+            self._time_phases()
+
         try:
             self.process_tokens()
         except exceptions.InvalidSyntax as exc:
             self.report(exc.error_code, exc.line_number, exc.column_number,
                         exc.error_message)
 
+        if timings is not None:
+            # The line-based checks run while the file is being tokenized
+            timings['tokenize'] -= (timings['physical line checks'] +
+                                    timings['logical line checks'])
+
+        self.run_physical_lines_checks()
+        self.run_logical_lines_checks()
         self.run_ast_checks()
 
+        if timings is not None:
+            # The abstract syntax tree is built before running the checks
+            # using it.
+            timings['ast checks'] -= timings['ast build']
+
         logical_lines = self.processor.statistics['logical lines']
         self.statistics['logical lines'] = logical_lines
+        self.noqa_line_mapping = self.processor.noqa_line_mapping()
+        if cache_key is not None:
+            self.cache.set(cache_key, self.results, self.statistics,
+                           self.noqa_line_mapping)
         return self.filename, self.results, self.statistics
 
     def handle_comment(self, token, token_text):
@@ -627,9 +1384,32 @@ class FileChecker(object):
                                              override_error_line=token[4])
 
 
-def _pool_init():
-    """Ensure correct signaling of ^C using multiprocessing.Pool."""
+def _worker_context_key(context):
+    # type: (tuple) -> tuple
+    """Find what the workers check files with that matters to the results.
+
+    Options which only change how results are reported, e.g. ``--format``
+    or ``--show-source``, are left out so that the workers are not started
+    again when only those change.
+    """
+    checks, options, result_cache = context
+    worker_options = sorted(
+        (name, repr(value)) for name, value in vars(options).items()
+        if name not in defaults.CACHE_IRRELEVANT_OPTIONS or
+        name in WORKER_OPTIONS
+    )
+    return (checks, worker_options, result_cache)
+
+
+def _pool_init(context=None):
+    """Ensure correct signaling of ^C using multiprocessing.Pool.
+
+    This also keeps the checks, options, and cache that the worker checks
+    files with.
+    """
+    global _worker_context
     signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_context = context
 
 
 def calculate_pool_chunksize(num_checkers, num_jobs):
@@ -644,8 +1424,156 @@ def calculate_pool_chunksize(num_checkers, num_jobs):
     return max(num_checkers // (num_jobs * 2), 1)
 
 
-def _run_checks(checker):
-    return checker.run_checks()
+def schedule_chunks(filenames, costs, num_jobs):
+    # type: (List[str], Dict[str, float], int) -> List[List[str]]
+    """Split the files into chunks of work for the multiprocessing Pool.
+
+    The most expensive files are scheduled first so that no worker is left
+    checking a large file after the others have run out of work. A file
+    which costs more than a worker's share of a chunk is sent on its own.
+    Cheaper files are grouped together, up to the size determined by
+    :func:`calculate_pool_chunksize`, so that we do not pay to dispatch each
+    of them separately.
+
+    :param list filenames:
+        The names of the files to check.
+    :param dict costs:
+        The estimated cost of checking each file.
+    :param int num_jobs:
+        The number of worker processes.
+    :returns:
+        Lists of filenames, in the order they should be sent to workers.
+    :rtype:
+        list
+    """
+    filenames = sorted(filenames, key=lambda filename: costs[filename],
+                       reverse=True)
+    max_chunksize = calculate_pool_chunksize(len(filenames), num_jobs)
+    budget = (sum(costs[filename] for filename in filenames) /
+              float(num_jobs * CHUNKS_PER_JOB))
+    chunks = []
+    chunk = []
+    chunk_cost = 0
+    for filename in filenames:
+        cost = costs[filename]
+        if chunk and (chunk_cost + cost > budget or
+                      len(chunk) >= max_chunksize):
+            chunks.append(chunk)
+            chunk = []
+            chunk_cost = 0
+        chunk.append(filename)
+        chunk_cost += cost
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def reorder_results(completed, order, buffer_size):
+    """Reorder the results of checking files with a bounded buffer.
+
+    :param completed:
+        Iterable of the filenames and their results in the order the files
+        were checked.
+    :param list order:
+        Every filename, in the order we want to report them.
+    :param int buffer_size:
+        The number of results which may be held back while we wait for the
+        next file in ``order``. When more are held back, the first of them
+        in ``order`` is yielded anyway.
+    :returns:
+        Generator of the filenames and their results.
+    """
+    positions = dict((filename, i) for i, filename in enumerate(order))
+    position = 0
+    buffered = {}
+    reported = set()
+    for filename, result in completed:
+        buffered[filename] = result
+        while buffered:
+            while position < len(order) and order[position] in reported:
+                position += 1
+            if position < len(order) and order[position] in buffered:
+                next_filename = order[position]
+            elif len(buffered) > buffer_size:
+                next_filename = min(buffered, key=positions.get)
+            else:
+                break
+            reported.add(next_filename)
+            yield next_filename, buffered.pop(next_filename)
+
+    for filename in sorted(buffered, key=positions.get):
+        yield filename, buffered[filename]
+
+
+def compact_results(results, lines, strings):
+    # type: (List[tuple], List[str], Dict[str, str]) -> List[tuple]
+    """Shrink the results of checking a file before sending them elsewhere.
+
+    Physical lines which are the same as the line of the file the violation
+    was reported on are replaced with ``None`` since they can be read from
+    the file again when they are needed. Codes and messages are replaced by
+    the first equal string found in ``strings`` so that each is pickled
+    only once for all of the files sharing ``strings``.
+
+    :param list results:
+        The results of checking a file.
+    :param list lines:
+        The lines of the file.
+    :param dict strings:
+        The codes and messages seen so far, mapped to themselves.
+    :returns:
+        The results with physical lines replaced by references to the file.
+    :rtype:
+        list
+    """
+    compacted = []
+    for code, line_number, column, text, physical_line in results:
+        if (physical_line is not None and 0 < line_number <= len(lines) and
+                lines[line_number - 1] == physical_line):
+            physical_line = None
+        compacted.append((strings.setdefault(code, code), line_number, column,
+                          strings.setdefault(text, text), physical_line))
+    return compacted
+
+
+def _run_checks(filename, checks, options, cache=None, strings=None):
+    start_time = time.time()
+    checker = FileChecker(filename, checks, options, cache)
+    if not checker.should_process:
+        return None
+    if options.profile_plugins:
+        checker.plugin_timings = {}
+    if options.benchmark:
+        checker.phase_timings = dict.fromkeys(
+            (phase for phase, _ in defaults.PHASES), 0.0
+        )
+        checker.phase_timings['read'] = time.time() - start_time
+    checker.run_checks()
+    checker.statistics['seconds elapsed'] = time.time() - start_time
+    if options.profile_plugins:
+        checker.statistics['plugins'] = checker.plugin_timings
+    if options.benchmark:
+        checker.statistics['phases'] = checker.phase_timings
+    results = checker.results
+    if strings is not None:
+        results = compact_results(results, checker.processor.lines, strings)
+    return (checker.display_name, results, checker.statistics,
+            checker.noqa_line_mapping)
+
+
+def _run_checks_in_chunk(filenames, checks, options, cache=None,
+                         strings=None):
+    return [(filename, _run_checks(filename, checks, options, cache, strings))
+            for filename in filenames]
+
+
+def _run_checks_in_worker(filenames):
+    checks, options, cache = _worker_context
+    # NOTE(sigmavirus24): The whole chunk is sent back to the parent at once
+    # so sharing the strings between its files lets pickle send each of
+    # them once.
+    return _run_checks_in_chunk(filenames, checks, options, cache,
+                                strings={})
 
 
 def find_offset(offset, mapping):
@@ -25,6 +25,58 @@ IGNORE = (
 SELECT = ('E', 'F', 'W', 'C90')
 MAX_LINE_LENGTH = 79
 
+# Maximum size, in bytes, of the result cache before entries are evicted
+CACHE_MAX_SIZE = 128 * 1024 * 1024
+
+# Options which only influence which files are checked or how the results are
+# reported. Every other option may be observed by plugins and so is part of
+# the result cache's fingerprint.
+CACHE_IRRELEVANT_OPTIONS = frozenset([
+    '_running_from_vcs',
+    'append_config',
+    'benchmark',
+    'benchmark_slowest',
+    'bug_report',
+    'cache_dir',
+    'config',
+    'count',
+    'daemon',
+    'daemon_socket',
+    'diff',
+    'disable_noqa',
+    'enable_extensions',
+    'exclude',
+    'exit_zero',
+    'extended_default_select',
+    'filename',
+    'format',
+    'ignore',
+    'install_hook',
+    'isolated',
+    'jobs',
+    'no_cache',
+    'output_file',
+    'profile_plugins',
+    'profile_plugins_json',
+    'quiet',
+    'respect_gitignore',
+    'select',
+    'show_source',
+    'statistics',
+    'stdin_display_name',
+    'stream',
+    'stream_buffer',
+    'tee',
+    'watch',
+])
+
+# How often, in seconds, an idle daemon checks whether it should restart
+DAEMON_POLL_INTERVAL = 1.0
+# How long, in seconds, the client waits for a daemon to restart
+DAEMON_RESTART_TIMEOUT = 10.0
+# How often, in seconds, --watch looks for files which changed
+WATCH_POLL_INTERVAL = 0.5
+
 TRUTHY_VALUES = {'true', '1', 't'}
 
 # Other constants
@@ -36,6 +88,17 @@ STATISTIC_NAMES = (
     'tokens',
 )
 
+# The phases of checking a file which are timed by --benchmark and how they
+# are described when reported
+PHASES = (
+    ('read', 'reading files'),
+    ('tokenize', 'tokenizing'),
+    ('physical line checks', 'running physical line checks'),
+    ('logical line checks', 'running logical line checks'),
+    ('ast build', 'building abstract syntax trees'),
+    ('ast checks', 'running abstract syntax tree checks'),
+)
+
 NOQA_INLINE_REGEXP = re.compile(
     # We're looking for items that look like this:
     # ``# noqa``
@@ -51,3 +114,7 @@ NOQA_INLINE_REGEXP = re.compile(
 )
 
 NOQA_FILE = re.compile(r'\s*# flake8[:=]\s*noqa', re.I)
+
+# Entry-point names of check plugins which are the prefix of every code the
+# plugin reports, e.g., ``F`` or ``C90``
+CODE_PREFIX = re.compile(r'^[A-Z]{1,3}[0-9]{0,3}$')
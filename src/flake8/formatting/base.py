@@ -22,8 +22,17 @@ class BaseFormatter(object):
 
         The string to add to the end of a line. This is only used when the
         output filename has been specified.
+
+    .. attribute:: needs_physical_lines
+
+        Whether the formatter uses the physical line of each error even when
+        the user has not asked for ``--show-source``. When this is ``False``
+        the physical line may be ``None`` for errors found while checking
+        files in parallel.
     """
 
+    needs_physical_lines = False
+
     def __init__(self, options):
         """Initialize with the options parsed from config and cli.
 
@@ -1,23 +1,33 @@
 """Module containing the application logic for Flake8."""
 from __future__ import print_function
 
+import json
 import logging
 import sys
 import time
 
 import flake8
+from flake8 import cache
 from flake8 import checker
 from flake8 import defaults
 from flake8 import exceptions
 from flake8 import style_guide
 from flake8 import utils
+from flake8.main import daemon
 from flake8.main import options
+from flake8.main import watch
 from flake8.options import aggregator, config
 from flake8.options import manager
 from flake8.plugins import manager as plugin_manager
 
 LOG = logging.getLogger(__name__)
 
+# Options which describe every plugin or which should not be acted upon more
+# than once
+EVERY_PLUGIN_OPTIONS = frozenset([
+    '-h', '--help', '--version', '--bug-report', '--install-hook',
+])
+
 
 class Application(object):
     """Abstract our application into a class."""
@@ -71,6 +81,10 @@ class Application(object):
         #: The :class:`flake8.checker.Manager` that will handle running all of
         #: the checks selected by the user.
         self.file_checker_manager = None
+        #: The :class:`flake8.checker.WorkerPool` shared with other
+        #: applications, if any, which :attr:`file_checker_manager` checks
+        #: files with instead of starting its own worker processes.
+        self.worker_pool = None
 
         #: The user-supplied options parsed into an instance of
         #: :class:`optparse.Values`
@@ -169,6 +183,10 @@ class Application(object):
         them with the appropriate plugin manager instance. Given the expense
         of finding plugins (via :mod:`pkg_resources`) we want this to be
         idempotent and so only update those attributes if they are ``None``.
+
+        Unless ``--no-cache`` is given on the command-line, the entry-points
+        found are stored in the cache directory and reused until the
+        installed distributions change.
         """
         if self.local_plugins is None:
             self.local_plugins = config.get_local_plugins(
@@ -177,21 +195,77 @@ class Application(object):
                 self.prelim_opts.isolated,
             )
 
+        entry_point_cache = None
+        if not self.prelim_opts.no_cache:
+            entry_point_cache = cache.EntryPointCache(
+                self.prelim_opts.cache_dir or cache.default_directory()
+            )
+        registry = plugin_manager.EntryPointRegistry(entry_point_cache)
+
         if self.check_plugins is None:
             self.check_plugins = plugin_manager.Checkers(
-                self.local_plugins.extension)
+                self.local_plugins.extension, registry)
 
         if self.listening_plugins is None:
-            self.listening_plugins = plugin_manager.Listeners()
+            self.listening_plugins = plugin_manager.Listeners(
+                registry=registry)
 
         if self.formatting_plugins is None:
             self.formatting_plugins = plugin_manager.ReportFormatters(
-                self.local_plugins.report)
+                self.local_plugins.report, registry)
 
-        self.check_plugins.load_plugins()
+        # NOTE(sigmavirus24): The check plugins are loaded when their options
+        # are registered so that skip_unreported_plugins can avoid importing
+        # some of them.
         self.listening_plugins.load_plugins()
         self.formatting_plugins.load_plugins()
 
+    def skip_unreported_plugins(self, argv=None):
+        # type: (Union[NoneType, List[str]]) -> NoneType
+        """Avoid loading check plugins which can never report a violation.
+
+        A check plugin registered with a code prefix as its name (see
+        :attr:`flake8.plugins.manager.Plugin.code_prefix`) only reports
+        codes beginning with that prefix. When the select and ignore lists
+        from the configuration files and the command-line ignore every such
+        code, the plugin is neither imported nor run.
+
+        Every plugin is kept when the command-line contains options we do
+        not know yet, since plugins may register them, or asks for
+        information about every plugin, e.g., ``--help``.
+
+        :param list argv:
+            Command-line arguments passed in directly.
+        """
+        arguments = sys.argv[1:] if argv is None else argv
+        if _needs_every_plugin(self.option_manager, arguments):
+            return
+
+        values, _ = aggregator.aggregate_options(
+            self.option_manager, self.config_finder, argv
+        )
+        if values.daemon:
+            # The daemon serves requests selecting any plugin
+            return
+
+        plugins = [
+            (name, plugin.code_prefix)
+            for name, plugin in self.check_plugins.plugins.items()
+            if plugin.code_prefix is not None
+        ]
+        # NOTE(sigmavirus24): We can not know which plugins are off by default
+        # without loading them, so we assume every plugin is enabled by
+        # default. This can only select more codes than the real lists.
+        values.extended_default_select = set(values.extended_default_select)
+        values.extended_default_select.update(prefix for _, prefix in plugins)
+        decider = style_guide.DecisionEngine(values)
+        unreported = [name for name, prefix in plugins
+                      if decider.is_prefix_ignored(prefix)]
+        if unreported:
+            LOG.info('Skipping plugins which can not report violations: %s',
+                     ', '.join(sorted(unreported)))
+            self.check_plugins = self.check_plugins.without(unreported)
+
     def register_plugin_options(self):
         # type: () -> NoneType
         """Register options provided by plugins to our option manager."""
@@ -219,6 +293,8 @@ class Application(object):
                 self.exit()
 
         self.options._running_from_vcs = False
+        if self.options.profile_plugins_json:
+            self.options.profile_plugins = True
 
         self.check_plugins.provide_options(self.option_manager, self.options,
                                            self.args)
@@ -291,6 +367,7 @@ class Application(object):
                 style_guide=self.guide,
                 arguments=self.args,
                 checker_plugins=self.check_plugins,
+                pool=self.worker_pool,
             )
 
     def run_checks(self, files=None):
@@ -327,8 +404,72 @@ class Application(object):
             per_second_description = statistic + ' processed per second'
             add_statistic((per_second_description, int(value / time_elapsed)))
 
+        phase_statistics = self.file_checker_manager.phase_statistics
+        for phase, description in defaults.PHASES:
+            add_statistic(('seconds elapsed ' + description,
+                           phase_statistics[phase]))
+
+        slowest_files = self.file_checker_manager.slowest_files(
+            self.options.benchmark_slowest
+        )
+        for filename, file_statistics in slowest_files:
+            add_statistic(('seconds elapsed checking ' + filename,
+                           file_statistics['seconds elapsed']))
+            file_phases = file_statistics.get('phases', {})
+            for phase, description in defaults.PHASES:
+                if file_phases.get(phase):
+                    add_statistic(('  seconds elapsed ' + description,
+                                   file_phases[phase]))
+
         self.formatter.show_benchmarks(statistics)
 
+    def report_plugin_profile(self):
+        """Report the time spent in each plugin during this run."""
+        if not self.options.profile_plugins:
+            return
+
+        plugin_statistics = sorted(
+            self.file_checker_manager.plugin_statistics.items(),
+            key=lambda item: (-item[1][1], item[0]),
+        )
+        statistics = []
+        add_statistic = statistics.append
+        for name, (plugin_type, seconds, calls) in plugin_statistics:
+            description = '{0} ({1})'.format(name, plugin_type)
+            add_statistic((description + ' seconds elapsed', seconds))
+            add_statistic((description + ' calls', calls))
+        self.formatter.show_benchmarks(statistics)
+
+        if self.options.profile_plugins_json:
+            self.write_plugin_profile(self.options.profile_plugins_json,
+                                      plugin_statistics)
+
+    def write_plugin_profile(self, filename, plugin_statistics):
+        # type: (str, List[Tuple[str, list]]) -> NoneType
+        """Write the time spent in each plugin to a file as JSON.
+
+        :param str filename:
+            The file to write the profile to.
+        :param list plugin_statistics:
+            Pairs of the name of each plugin and its type, the seconds spent
+            in it, and the number of times it was called.
+        """
+        profile = {
+            'flake8': self.version,
+            'python': utils.get_python_version(),
+            'started': self.start_time,
+            'seconds elapsed': self.end_time - self.start_time,
+            'files': self.file_checker_manager.statistics['files'],
+            'plugins': [
+                {'name': name, 'type': plugin_type, 'seconds': seconds,
+                 'calls': calls}
+                for name, (plugin_type, seconds, calls) in plugin_statistics
+            ],
+        }
+        with open(filename, 'w') as fd:
+            json.dump(profile, fd, indent=2, sort_keys=True)
+            fd.write('\n')
+
     def report_errors(self):
         # type: () -> NoneType
         """Report all the errors found by flake8 3.0.
@@ -363,6 +504,7 @@ class Application(object):
             self.prelim_opts.verbose, self.prelim_opts.output_file)
         self.make_config_finder()
         self.find_plugins()
+        self.skip_unreported_plugins(argv)
         self.register_plugin_options()
         self.parse_configuration_and_cli(argv)
         self.make_formatter()
@@ -370,17 +512,37 @@ class Application(object):
         self.make_guide()
         self.make_file_checker_manager()
 
+    def stream_results(self):
+        # type: () -> NoneType
+        """Report errors as soon as each file has been checked.
+
+        This starts the formatter before any checks run, so it must be called
+        before :meth:`run_checks`.
+        """
+        self.formatter.start()
+        self.file_checker_manager.stream_results(self.options.stream_buffer)
+
     def report(self):
         """Report errors, statistics, and benchmarks."""
-        self.formatter.start()
+        if not self.file_checker_manager.streaming:
+            self.formatter.start()
         self.report_errors()
         self.report_statistics()
         self.report_benchmarks()
+        self.report_plugin_profile()
         self.formatter.stop()
 
     def _run(self, argv):
         # type: (Union[NoneType, List[str]]) -> NoneType
         self.initialize(argv)
+        if self.options.daemon:
+            daemon.serve(self, argv)
+            return
+        if self.options.watch:
+            watch.watch(self)
+            return
+        if self.options.stream:
+            self.stream_results()
         self.run_checks()
         self.report()
 
@@ -402,9 +564,24 @@ class Application(object):
             self.catastrophic_failure = True
         except exceptions.ExecutionError as exc:
             print('There was a critical error during execution of Flake8:')
-            print(exc.message)
+            print(str(exc))
             LOG.exception(exc)
             self.catastrophic_failure = True
         except exceptions.EarlyQuit:
             self.catastrophic_failure = True
             print('... stopped while processing files')
+
+
+def _needs_every_plugin(option_manager, arguments):
+    # type: (manager.OptionManager, List[str]) -> bool
+    parser = option_manager.parser
+    for argument in arguments:
+        if argument == '-' or not argument.startswith('-'):
+            continue
+        if argument.startswith('--'):
+            option = argument.split('=', 1)[0]
+        else:
+            option = argument[:2]
+        if option in EVERY_PLUGIN_OPTIONS or not parser.has_option(option):
+            return True
+    return False
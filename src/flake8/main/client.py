@@ -0,0 +1,216 @@
+"""Thin client sending the arguments it receives to a Flake8 daemon.
+
+This module deliberately avoids importing the rest of Flake8 (and in
+particular :mod:`pkg_resources`) unless there is no daemon to talk to, in
+which case it falls back to running Flake8 in this process.
+"""
+from __future__ import print_function
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+
+from flake8 import defaults
+from flake8 import utils
+
+LOG = logging.getLogger(__name__)
+
+
+def default_socket_path(directory=None):
+    # type: (str) -> str
+    """Determine the socket used by the daemon serving a directory.
+
+    :param str directory:
+        The directory the daemon was started in. Defaults to the current
+        working directory.
+    :returns:
+        Path to a socket in ``$XDG_RUNTIME_DIR`` (or the temporary directory)
+        which is unique to the user and directory.
+    :rtype:
+        str
+    """
+    directory = os.path.abspath(directory or os.getcwd())
+    user = str(getattr(os, 'getuid', lambda: '')())
+    digest = hashlib.sha1(
+        (user + '\0' + directory).encode('utf-8', 'replace')
+    ).hexdigest()
+    runtime_directory = (os.environ.get('XDG_RUNTIME_DIR') or
+                         tempfile.gettempdir())
+    return os.path.join(runtime_directory,
+                        'flake8-daemon-{0}.sock'.format(digest[:16]))
+
+
+def socket_path_from(argv):
+    # type: (List[str]) -> Union[str, NoneType]
+    """Find the value of ``--daemon-socket`` in the arguments, if any."""
+    for index, argument in enumerate(argv):
+        if argument.startswith('--daemon-socket='):
+            return argument.split('=', 1)[1]
+        if argument == '--daemon-socket' and index + 1 < len(argv):
+            return argv[index + 1]
+    return None
+
+
+def send_message(connection, message):
+    # type: (socket.socket, dict) -> NoneType
+    """Send a message and signal that nothing else will be sent.
+
+    :param connection:
+        The connected socket.
+    :param dict message:
+        The message to send. This must be serializable to JSON.
+    """
+    connection.sendall(json.dumps(message).encode('utf-8'))
+    connection.shutdown(socket.SHUT_WR)
+
+
+def receive_message(connection):
+    # type: (socket.socket) -> dict
+    """Receive a message sent with :func:`send_message`.
+
+    :param connection:
+        The connected socket.
+    :returns:
+        The decoded message.
+    :rtype:
+        dict
+    :raises ValueError:
+        If what was received is not a JSON object.
+    """
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    message = json.loads(b''.join(chunks).decode('utf-8'))
+    if not isinstance(message, dict):
+        raise ValueError('Expected a JSON object, received {0!r}'.format(
+            message
+        ))
+    return message
+
+
+def request(socket_path, message):
+    # type: (str, dict) -> dict
+    """Send a request to the daemon listening on a socket.
+
+    :param str socket_path:
+        The path of the daemon's socket.
+    :param dict message:
+        The request to send.
+    :returns:
+        The daemon's response.
+    :rtype:
+        dict
+    :raises socket.error:
+        If there is no daemon listening on the socket.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+        send_message(connection, message)
+        return receive_message(connection)
+    finally:
+        connection.close()
+
+
+def is_listening(socket_path):
+    # type: (str) -> bool
+    """Check whether something accepts connections on the socket."""
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except socket.error:
+        return False
+    finally:
+        connection.close()
+    return True
+
+
+def wait_for_daemon(socket_path, timeout=defaults.DAEMON_RESTART_TIMEOUT):
+    # type: (str, float) -> bool
+    """Wait for a restarting daemon to listen on its socket again."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if is_listening(socket_path):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run_with_daemon(argv, socket_path):
+    # type: (List[str], str) -> Union[dict, NoneType]
+    """Ask the daemon to run Flake8 with the arguments.
+
+    :param list argv:
+        The arguments to run Flake8 with.
+    :param str socket_path:
+        The path of the daemon's socket.
+    :returns:
+        The daemon's response, or ``None`` if the daemon could not handle
+        the request.
+    :rtype:
+        dict
+    """
+    message = {'argv': argv, 'cwd': os.getcwd(), 'stdin': None}
+    if utils.is_using_stdin(argv) or '--diff' in argv:
+        message['stdin'] = utils.stdin_get_value()
+
+    for _ in range(2):
+        try:
+            response = request(socket_path, message)
+        except (socket.error, ValueError) as exc:
+            if getattr(exc, 'errno', None) not in (errno.ENOENT,
+                                                   errno.ECONNREFUSED):
+                LOG.debug('Unable to use the daemon on "%s": %s',
+                          socket_path, exc)
+            return None
+
+        if not response.get('restarting'):
+            break
+        # The daemon noticed that the configuration or the installed plugins
+        # changed and is starting over. Give it a moment and try again.
+        if not wait_for_daemon(socket_path):
+            return None
+    else:
+        return None
+
+    if 'error' in response:
+        LOG.debug('The daemon could not handle our request: %s',
+                  response['error'])
+        return None
+    return response
+
+
+def main(argv=None):
+    # type: (Union[NoneType, List[str]]) -> NoneType
+    """Run Flake8 through the daemon, falling back to running it here.
+
+    :param list argv:
+        The arguments to be passed to the application for parsing.
+    """
+    arguments = sys.argv[1:] if argv is None else argv
+    socket_path = socket_path_from(arguments) or default_socket_path()
+    response = None
+    if hasattr(socket, 'AF_UNIX'):
+        response = run_with_daemon(arguments, socket_path)
+
+    if response is None:
+        # NOTE(sigmavirus24): Importing the command-line interface is what
+        # the daemon saves us from, so only do it when we have to.
+        from flake8.main import cli
+        cli.main(argv)
+        return
+
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stdout.flush()
+    sys.stderr.write(response.get('stderr', ''))
+    sys.stderr.flush()
+    raise SystemExit(response.get('status', 1))
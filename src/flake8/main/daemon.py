@@ -0,0 +1,364 @@
+"""Long-running server which keeps Flake8 initialized between runs."""
+from __future__ import print_function
+
+import inspect
+import io
+import logging
+import os
+import socket
+import sys
+import traceback
+
+import flake8
+from flake8 import defaults
+from flake8 import exceptions
+from flake8 import utils
+from flake8.main import client
+
+try:
+    from StringIO import StringIO  # Python 2
+except ImportError:
+    from io import StringIO
+
+LOG = logging.getLogger(__name__)
+
+SITE_DIRECTORY_NAMES = frozenset(['site-packages', 'dist-packages'])
+
+# Options which keep Flake8 running in the foreground or which act on the
+# client's repository and so must not be run by the daemon
+FOREGROUND_OPTIONS = frozenset(['--daemon', '--watch', '--install-hook'])
+
+
+class Daemon(object):
+    """Check files on behalf of clients connecting to a Unix socket.
+
+    The daemon holds on to an initialized
+    :class:`~flake8.main.application.Application`. Each request is run by a
+    fresh application which reuses the plugins that have already been found
+    and loaded so that only the options and configuration are parsed again.
+
+    Plugins cannot be unloaded, so when the configuration files or the
+    installed packages change the daemon replaces itself with a new
+    process.
+
+    When given a :class:`~flake8.checker.WorkerPool`, every request checks
+    files with it so that the worker processes are only started once.
+    """
+
+    def __init__(self, application, argv=None, socket_path=None, pool=None):
+        """Initialize our daemon.
+
+        :param application:
+            The initialized application whose plugins will be reused.
+        :type application:
+            flake8.main.application.Application
+        :param list argv:
+            The arguments the daemon was started with. These are used to
+            start the daemon again.
+        :param str socket_path:
+            The path of the socket to listen on. Defaults to
+            :func:`flake8.main.client.default_socket_path`.
+        :param pool:
+            The worker processes shared by every request, if any. The daemon
+            stops them when it stops.
+        :type pool:
+            flake8.checker.WorkerPool
+        """
+        self.application = application
+        self.argv = list(sys.argv[1:] if argv is None else argv)
+        self.directory = os.path.abspath(os.getcwd())
+        self.socket_path = (socket_path or
+                            client.default_socket_path(self.directory))
+        self.socket = None
+        self.pool = pool
+        self.watched_paths = self.find_watched_paths()
+        self.stamp = None
+
+    def __repr__(self):
+        """Provide helpful debugging representation."""
+        return 'Daemon({0!r})'.format(self.socket_path)
+
+    def find_watched_paths(self):
+        # type: () -> List[str]
+        """Find the files which should restart the daemon when changed.
+
+        These are the configuration files which may be found for the
+        daemon's directory (whether they exist or not), the directories on
+        :data:`sys.path` where packages are installed, and the source of the
+        local plugins.
+        """
+        application = self.application
+        finder = application.config_finder
+        paths = [finder.user_config_file()]
+        paths.extend(finder.extra_config_files)
+        if application.prelim_opts.config:
+            paths.append(os.path.abspath(application.prelim_opts.config))
+
+        directory = self.directory
+        while True:
+            paths.extend(os.path.join(directory, filename)
+                         for filename in finder.project_filenames)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+
+        # NOTE(sigmavirus24): Installing or removing a distribution adds or
+        # removes its metadata directory which updates the modification time
+        # of the site directory. Other entries on sys.path (e.g., the
+        # directory of the script being run) may change for unrelated
+        # reasons so we ignore them.
+        paths.extend(
+            os.path.abspath(path) for path in sys.path
+            if os.path.basename(path) in SITE_DIRECTORY_NAMES
+        )
+
+        for plugin_type in (application.check_plugins,
+                            application.formatting_plugins):
+            for plugin in plugin_type.plugins.values():
+                if not plugin.local:
+                    continue
+                try:
+                    paths.append(inspect.getfile(plugin.plugin))
+                except TypeError:
+                    LOG.debug('Unable to find the source of %r', plugin)
+        return paths
+
+    def current_stamp(self):
+        # type: () -> List[Tuple[str, float]]
+        """Record the modification time of each watched path."""
+        stamp = []
+        for path in self.watched_paths:
+            try:
+                stamp.append((path, os.stat(path).st_mtime))
+            except OSError:
+                stamp.append((path, None))
+        return stamp
+
+    def needs_restart(self):
+        # type: () -> bool
+        """Determine if any of the watched paths changed since we started."""
+        return self.current_stamp() != self.stamp
+
+    def listen(self):
+        """Create the socket and start listening for clients."""
+        if not hasattr(socket, 'AF_UNIX'):
+            raise exceptions.ExecutionError(
+                'The Flake8 daemon is not supported on this platform.'
+            )
+
+        if os.path.exists(self.socket_path):
+            if client.is_listening(self.socket_path):
+                raise exceptions.ExecutionError(
+                    'A Flake8 daemon is already listening on "{0}".'.format(
+                        self.socket_path
+                    )
+                )
+            os.remove(self.socket_path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user running the daemon should be able to ask it to read
+        # their files.
+        umask = os.umask(0o177)
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        server.listen(5)
+        server.settimeout(defaults.DAEMON_POLL_INTERVAL)
+        self.socket = server
+        self.stamp = self.current_stamp()
+        LOG.info('Listening on "%s"', self.socket_path)
+
+    def close(self):
+        """Stop listening, remove the socket, and stop the workers."""
+        if self.pool is not None:
+            self.pool.terminate()
+        if self.socket is None:
+            return
+        self.socket.close()
+        self.socket = None
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+    def restart(self):
+        """Replace this process with a freshly started daemon."""
+        LOG.info('Restarting because the configuration or plugins changed')
+        self.close()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable,
+                 [sys.executable, '-m', 'flake8'] + self.argv)
+
+    def serve_forever(self):
+        """Handle requests until we are interrupted."""
+        self.listen()
+        try:
+            while True:
+                try:
+                    connection, _ = self.socket.accept()
+                except socket.timeout:
+                    if self.needs_restart():
+                        self.restart()
+                    continue
+
+                restart = False
+                try:
+                    connection.settimeout(None)
+                    restart = self.handle(connection)
+                finally:
+                    connection.close()
+                if restart:
+                    self.restart()
+        finally:
+            self.close()
+
+    def handle(self, connection):
+        # type: (socket.socket) -> bool
+        """Respond to a single client.
+
+        :returns:
+            True if the daemon must restart before handling more requests.
+        :rtype:
+            bool
+        """
+        try:
+            message = client.receive_message(connection)
+        except (socket.error, ValueError) as exc:
+            LOG.warning('Ignoring an invalid request: %s', exc)
+            return False
+
+        if self.needs_restart():
+            client.send_message(connection, {'restarting': True})
+            return True
+
+        client.send_message(connection, self.run(message))
+        return False
+
+    def make_application(self):
+        """Create an application reusing our plugins."""
+        application = self.application
+        request_application = type(application)(
+            program=application.program, version=application.version,
+        )
+        request_application.local_plugins = application.local_plugins
+        request_application.check_plugins = application.check_plugins
+        request_application.listening_plugins = application.listening_plugins
+        request_application.formatting_plugins = (
+            application.formatting_plugins
+        )
+        request_application.worker_pool = self.pool
+        return request_application
+
+    def run(self, message):
+        # type: (dict) -> dict
+        """Run Flake8 as requested by a client.
+
+        :param dict message:
+            The request containing the arguments (``argv``), the client's
+            working directory (``cwd``), and what it read from standard in
+            (``stdin``), if anything.
+        :returns:
+            The response with what Flake8 wrote to standard out (``stdout``)
+            and standard error (``stderr``), and the exit status
+            (``status``). If the request can not be handled, the response
+            only contains an ``error``.
+        :rtype:
+            dict
+        """
+        argv = message.get('argv')
+        if not isinstance(argv, list):
+            return {'error': 'The request did not contain arguments.'}
+        if message.get('cwd') != self.directory:
+            return {'error': 'The daemon is serving "{0}".'.format(
+                self.directory
+            )}
+        foreground_option = _find_foreground_option(argv)
+        if foreground_option is not None:
+            return {'error': 'The daemon can not run with {0}.'.format(
+                foreground_option
+            )}
+
+        stdout = StringIO()
+        stderr = StringIO()
+        saved_streams = (sys.argv, sys.stdout, sys.stderr)
+        saved_handlers = list(flake8.LOG.handlers)
+        saved_level = flake8.LOG.level
+        _cache_stdin(message.get('stdin'))
+        sys.argv = [self.application.program] + argv
+        sys.stdout, sys.stderr = stdout, stderr
+        try:
+            application = self.make_application()
+            try:
+                application.run()
+                application.exit()
+            except SystemExit as exc:
+                status = _exit_status(exc.code)
+            else:
+                status = 0
+        except Exception:
+            LOG.exception('Unable to run %r', argv)
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.argv, sys.stdout, sys.stderr = saved_streams
+            # Each run may configure logging for its own verbosity.
+            flake8.LOG.handlers[:] = saved_handlers
+            flake8.LOG.setLevel(saved_level)
+            _cache_stdin(None)
+
+        return {
+            'status': status,
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+        }
+
+
+def serve(application, argv=None):
+    """Serve requests with an initialized application until interrupted.
+
+    :param application:
+        The initialized application whose plugins will be reused.
+    :type application:
+        flake8.main.application.Application
+    :param list argv:
+        The arguments the daemon was started with.
+    """
+    # Each request checks files with the worker processes started for the
+    # application we were given, which already imported every plugin.
+    pool = None
+    if application.file_checker_manager is not None:
+        pool = application.file_checker_manager.pool
+    daemon = Daemon(application, argv, application.options.daemon_socket,
+                    pool=pool)
+    daemon.serve_forever()
+
+
+def _find_foreground_option(argv):
+    for argument in argv:
+        option = argument.split('=', 1)[0]
+        if option in FOREGROUND_OPTIONS:
+            return option
+    return None
+
+
+def _cache_stdin(value):
+    # NOTE(sigmavirus24): This relies on utils.stdin_get_value caching what
+    # it reads from standard in on the function itself.
+    stream = None
+    if value is not None and sys.version_info < (3, 0):
+        stream = io.BytesIO(value.encode('utf-8'))
+    elif value is not None:
+        stream = io.StringIO(value)
+    utils.stdin_get_value.cached_stdin = stream
+
+
+def _exit_status(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return int(code)
+    print(code, file=sys.stderr)
+    return 1
@@ -221,12 +221,12 @@ def update_excludes(exclude_list, temporary_directory_path):
 
 def update_paths(checker_manager, temp_prefix):
     temp_prefix_length = len(temp_prefix)
-    for checker in checker_manager.checkers:
-        filename = checker.display_name
+    results = checker_manager.results
+    for index, result in enumerate(results):
+        filename = result[0]
         if filename.startswith(temp_prefix):
-            checker.display_name = os.path.relpath(
-                filename[temp_prefix_length:]
-            )
+            display_name = os.path.relpath(filename[temp_prefix_length:])
+            results[index] = (display_name,) + tuple(result[1:])
 
 
 _HOOK_TEMPLATE = """#!{executable}
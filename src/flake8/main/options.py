@@ -23,6 +23,8 @@ def register_default_options(option_manager):
     - ``--disable-noqa``
     - ``--show-source``
     - ``--statistics``
+    - ``--stream``
+    - ``--stream-buffer``
     - ``--enable-extensions``
     - ``--exit-zero``
     - ``-j``/``--jobs``
@@ -31,7 +33,14 @@ def register_default_options(option_manager):
     - ``--append-config``
     - ``--config``
     - ``--isolated``
+    - ``--cache-dir``
+    - ``--no-cache``
+    - ``--daemon``
+    - ``--daemon-socket``
     - ``--benchmark``
+    - ``--benchmark-slowest``
+    - ``--profile-plugins``
+    - ``--profile-plugins-json``
     - ``--bug-report``
     """
     add_option = option_manager.add_option
@@ -70,6 +79,13 @@ def register_default_options(option_manager):
              ' (Default: %default)',
     )
 
+    add_option(
+        '--respect-gitignore', default=False, action='store_true',
+        parse_from_config=True,
+        help='Skip the files and directories git ignores when looking for '
+             'files to check in directories. (Default: %default)',
+    )
+
     add_option(
         '--filename', metavar='patterns', default='*.py',
         parse_from_config=True, comma_separated_list=True,
@@ -141,6 +157,19 @@ def register_default_options(option_manager):
         help='Count errors and warnings.',
     )
 
+    add_option(
+        '--stream', action='store_true', parse_from_config=True,
+        help='Report the errors in each file as soon as it has been checked '
+             'instead of after every file has been checked. Files are '
+             'reported in the order they finish.',
+    )
+
+    add_option(
+        '--stream-buffer', type='int', metavar='n', parse_from_config=True,
+        help='When streaming, report files in the same order as without '
+             '--stream by holding back up to n files which finished early.',
+    )
+
     # Flake8 options
     add_option(
         '--enable-extensions', default='', parse_from_config=True,
@@ -202,6 +231,44 @@ def register_default_options(option_manager):
         help='Ignore all found configuration files.',
     )
 
+    # Caching
+
+    add_option(
+        '--cache-dir', default=None, parse_from_config=True,
+        help='Directory in which to cache the results of checking files '
+             'between runs. (Default: the "flake8" directory inside the '
+             "user's cache directory)",
+    )
+
+    add_option(
+        '--no-cache', default=False, parse_from_config=True,
+        action='store_true',
+        help='Check every file instead of reusing results cached by '
+             'previous runs.',
+    )
+
+    # Watching for changes
+
+    add_option(
+        '--watch', default=False, action='store_true',
+        help='Check the files and then check them again whenever they '
+             'change until interrupted.',
+    )
+
+    # Daemon
+
+    add_option(
+        '--daemon', default=False, action='store_true',
+        help='Keep running and check the files sent by flake8-client over a '
+             'local socket instead of checking files once.',
+    )
+
+    add_option(
+        '--daemon-socket', default=None,
+        help='Path of the socket the daemon listens on. (Default: a socket '
+             'in the runtime directory unique to the current directory)',
+    )
+
     # Benchmarking
 
     add_option(
@@ -209,6 +276,24 @@ def register_default_options(option_manager):
         help='Print benchmark information about this run of Flake8',
     )
 
+    add_option(
+        '--benchmark-slowest', default=10, type='int', metavar='n',
+        help='Number of the slowest files to include in the benchmark '
+             'information. (Default: %default)',
+    )
+
+    add_option(
+        '--profile-plugins', default=False, action='store_true',
+        help='Print the time spent in each plugin and how many times it was '
+             'called',
+    )
+
+    add_option(
+        '--profile-plugins-json', default=None, metavar='FILE',
+        help='Write the time spent in each plugin and how many times it was '
+             'called to FILE as JSON. This implies --profile-plugins.',
+    )
+
     # Debugging
 
     add_option(
@@ -93,6 +93,7 @@ class Flake8(setuptools.Command):
         self.flake8.report_errors()
         self.flake8.report_statistics()
         self.flake8.report_benchmarks()
+        self.flake8.report_plugin_profile()
         self.flake8.formatter.stop()
         try:
             self.flake8.exit()
@@ -0,0 +1,136 @@
+"""Check files again whenever they change."""
+from __future__ import print_function
+
+import logging
+import os
+import sys
+import time
+
+from flake8 import defaults
+from flake8 import exceptions
+from flake8 import statistics
+from flake8 import utils
+
+LOG = logging.getLogger(__name__)
+
+
+class Watcher(object):
+    """Check files once and then again whenever they are modified.
+
+    The watcher holds on to an initialized
+    :class:`~flake8.main.application.Application`, so its plugins, style
+    guide, and formatter are reused to check the files which changed. It
+    polls the modification time and size of every file the application
+    would check, finding the files again each time so that new files are
+    checked as well.
+    """
+
+    def __init__(self, application, interval=defaults.WATCH_POLL_INTERVAL):
+        """Initialize our watcher.
+
+        :param application:
+            The initialized application to check files with.
+        :type application:
+            flake8.main.application.Application
+        :param float interval:
+            The number of seconds to wait between looking for changes.
+        """
+        self.application = application
+        self.interval = interval
+        #: The modification time and size of each file keyed by its name
+        self.stamps = {}
+
+    def __repr__(self):
+        """Provide helpful debugging representation."""
+        return 'Watcher({0!r})'.format(self.application.args)
+
+    def find_files(self):
+        # type: () -> List[str]
+        """Find the files the application checks."""
+        manager = self.application.file_checker_manager
+        manager.make_checkers()
+        return list(manager.filenames)
+
+    def current_stamps(self):
+        # type: () -> Dict[str, Tuple[float, int]]
+        """Record the modification time and size of each file."""
+        stamps = {}
+        for filename in self.find_files():
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                # NOTE(sigmavirus24): The file was removed after we found it
+                continue
+            stamps[filename] = (stat.st_mtime, stat.st_size)
+        return stamps
+
+    def changed_files(self):
+        # type: () -> List[str]
+        """Find the files created or modified since we last looked."""
+        stamps = self.current_stamps()
+        changed = sorted(
+            filename for filename, stamp in stamps.items()
+            if self.stamps.get(filename) != stamp
+        )
+        self.stamps = stamps
+        return changed
+
+    def check(self, filenames=None):
+        # type: (Union[NoneType, List[str]]) -> NoneType
+        """Check files and report what we found.
+
+        :param list filenames:
+            The files to check. Defaults to every file.
+        """
+        application = self.application
+        application.start_time = time.time()
+        application.guide.stats = statistics.Statistics()
+        application.run_checks(filenames)
+        application.report()
+
+    def watch(self):
+        """Check every file and then the files which change until stopped."""
+        application = self.application
+        if utils.is_using_stdin(application.args):
+            raise exceptions.ExecutionError(
+                'The --watch option can not be used to check standard in.'
+            )
+        if application.running_against_diff:
+            raise exceptions.ExecutionError(
+                'The --watch option can not be used with --diff.'
+            )
+
+        self.stamps = self.current_stamps()
+        if application.options.stream:
+            application.stream_results()
+        self.check()
+
+        manager = application.file_checker_manager
+        # NOTE(sigmavirus24): Only a few files change at a time and sending
+        # them to worker processes takes longer than checking them here.
+        manager.streaming = False
+        manager.using_multiprocessing = False
+        try:
+            while True:
+                time.sleep(self.interval)
+                changed = self.changed_files()
+                if not changed:
+                    continue
+                LOG.info('Checking %d changed files', len(changed))
+                self.check(changed)
+                print('{0}: checked {1} changed file(s)'.format(
+                    application.program, len(changed),
+                ), file=sys.stderr)
+        except (KeyboardInterrupt, exceptions.EarlyQuit):
+            LOG.info('Stopped watching for changes')
+
+
+def watch(application):
+    """Check files until interrupted with an initialized application.
+
+    :param application:
+        The initialized application to check files with.
+    :type application:
+        flake8.main.application.Application
+    """
+    Watcher(application).watch()
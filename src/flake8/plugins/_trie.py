@@ -13,7 +13,7 @@ class Trie(object):
 
     def __init__(self):
         """Initialize an empty trie."""
-        self.root = TrieNode(None, None)
+        self.root = TrieNode(None, [])
 
     def add(self, path, node_data):
         """Add the node data to the path described."""
@@ -35,6 +35,22 @@ class Trie(object):
             node = child
         return node
 
+    def find_prefixes(self, path):
+        """Find the nodes with data for every prefix of the path provided.
+
+        This walks the path once, generating the nodes from the shortest
+        prefix (including the empty prefix) to the longest.
+        """
+        node = self.root
+        if node.data:
+            yield node
+        for prefix in _iterate_stringlike_objects(path):
+            node = node.find_prefix(prefix)
+            if node is None:
+                return
+            if node.data:
+                yield node
+
     def traverse(self):
         """Traverse this tree.
 
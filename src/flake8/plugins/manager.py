@@ -1,9 +1,12 @@
 """Plugin loading and management logic and classes."""
 import collections
+import copy
+import functools
 import logging
+import re
 
-import pkg_resources
-
+from flake8 import cache
+from flake8 import defaults
 from flake8 import exceptions
 from flake8 import utils
 from flake8.plugins import notifier
@@ -12,6 +15,8 @@ LOG = logging.getLogger(__name__)
 
 __all__ = (
     'Checkers',
+    'EntryPoint',
+    'EntryPointRegistry',
     'Listeners',
     'Plugin',
     'PluginManager',
@@ -20,6 +25,112 @@ __all__ = (
 
 NO_GROUP_FOUND = object()
 
+Distribution = collections.namedtuple('Distribution',
+                                      ['project_name', 'version'])
+
+
+class EntryPoint(object):
+    """An entry-point which can be loaded without :mod:`pkg_resources`.
+
+    This provides the parts of :class:`pkg_resources.EntryPoint` that
+    Flake8 relies upon. Only verifying the requirements of the entry-point's
+    distribution imports :mod:`pkg_resources`.
+    """
+
+    pattern = re.compile(
+        r'^\s*(?P<name>.+?)\s*'
+        r'=\s*(?P<module>[\w.]+)\s*'
+        r'(:\s*(?P<attrs>[\w.]+))?\s*'
+        r'(\[(?P<extras>[^\]]*)\])?\s*$'
+    )
+
+    def __init__(self, name, module_name, attrs=(), extras=(), dist=None):
+        """Initialize our entry-point.
+
+        :param str name:
+            Name of the entry-point.
+        :param str module_name:
+            Name of the module the entry-point refers to.
+        :param tuple attrs:
+            Names of the attributes to look up, in turn, on the module.
+        :param tuple extras:
+            Extras of the distribution that the entry-point requires.
+        :param dist:
+            Name and version of the distribution providing the entry-point.
+        :type dist:
+            Distribution
+        """
+        self.name = name
+        self.module_name = module_name
+        self.attrs = tuple(attrs)
+        self.extras = tuple(extras)
+        self.dist = dist
+
+    def __str__(self):
+        """Format the entry-point as it is written in ``setup.py``."""
+        text = '{0} = {1}'.format(self.name, self.module_name)
+        if self.attrs:
+            text += ':' + '.'.join(self.attrs)
+        if self.extras:
+            text += ' [{0}]'.format(','.join(self.extras))
+        return text
+
+    def __repr__(self):
+        """Provide helpful debugging representation."""
+        return 'EntryPoint.parse({0!r})'.format(str(self))
+
+    @classmethod
+    def parse(cls, src, dist=None):
+        """Parse an entry-point from a ``name = module:attrs [extras]`` string.
+
+        :raises ValueError:
+            If the string is not a valid entry-point.
+        """
+        match = cls.pattern.match(src)
+        if match is None:
+            raise ValueError(
+                'EntryPoint must be in "name = module:attrs [extras]" format',
+                src,
+            )
+        groups = match.groupdict()
+        attrs = groups['attrs'].split('.') if groups['attrs'] else ()
+        extras = [extra.strip()
+                  for extra in (groups['extras'] or '').split(',')
+                  if extra.strip()]
+        return cls(groups['name'], groups['module'], attrs, extras, dist)
+
+    @classmethod
+    def from_pkg_resources(cls, entry_point):
+        """Create an entry-point from a :class:`pkg_resources.EntryPoint`."""
+        dist = None
+        if entry_point.dist is not None:
+            dist = Distribution(entry_point.dist.project_name,
+                                entry_point.dist.version)
+        return cls(entry_point.name, entry_point.module_name,
+                   entry_point.attrs, entry_point.extras, dist)
+
+    def resolve(self):
+        """Import the module and return the object the entry-point names."""
+        module = __import__(self.module_name, fromlist=['__name__'], level=0)
+        try:
+            return functools.reduce(getattr, self.attrs, module)
+        except AttributeError as exc:
+            raise ImportError(str(exc))
+
+    def require(self):
+        """Verify the requirements of the entry-point's distribution."""
+        if self.dist is None:
+            return
+        import pkg_resources
+        distribution = pkg_resources.get_distribution(self.dist.project_name)
+        pkg_resources.working_set.resolve(distribution.requires(self.extras))
+
+    def load(self, require=True):
+        """Verify the requirements, if asked, and resolve the entry-point."""
+        if require:
+            self.require()
+        return self.resolve()
+
 
 class Plugin(object):
     """Wrap an EntryPoint from setuptools and other logic."""
@@ -129,6 +240,25 @@ class Plugin(object):
 
         return self._plugin_name
 
+    @property
+    def code_prefix(self):
+        """Return the prefix of every code the plugin reports, if known.
+
+        Check plugins are expected to be registered with the prefix of the
+        codes they report as the name of their entry-point (e.g., ``X10`` for
+        a plugin reporting ``X101`` and ``X102``). This lets us decide whether
+        the plugin can report anything without loading it.
+
+        :returns:
+            The name of the entry-point if it looks like a code prefix,
+            otherwise None.
+        :rtype:
+            str
+        """
+        if defaults.CODE_PREFIX.match(self.name):
+            return self.name
+        return None
+
     @property
     def off_by_default(self):
         """Return whether the plugin is ignored by default."""
@@ -240,7 +370,8 @@ class PluginManager(object):  # pylint: disable=too-few-public-methods
     """Find and manage plugins consistently."""
 
     def __init__(self, namespace,
-                 verify_requirements=False, local_plugins=None):
+                 verify_requirements=False, local_plugins=None,
+                 registry=None):
         """Initialize the manager.
 
         :param str namespace:
@@ -250,9 +381,15 @@ class PluginManager(object):  # pylint: disable=too-few-public-methods
         :param bool verify_requirements:
             Whether or not to make setuptools verify that the requirements for
             the plugin are satisfied.
+        :param registry:
+            Registry to find the entry-points in. If not provided, the
+            entry-points are found with :mod:`pkg_resources`.
+        :type registry:
+            EntryPointRegistry
         """
         self.namespace = namespace
         self.verify_requirements = verify_requirements
+        self.registry = registry
         self.plugins = {}
         self.names = []
         self._load_local_plugins(local_plugins or [])
@@ -265,12 +402,17 @@ class PluginManager(object):  # pylint: disable=too-few-public-methods
             Plugins from config (as "X = path.to:Plugin" strings).
         """
         for plugin_str in local_plugins:
-            entry_point = pkg_resources.EntryPoint.parse(plugin_str)
+            entry_point = EntryPoint.parse(plugin_str)
             self._load_plugin_from_entrypoint(entry_point, local=True)
 
     def _load_entrypoint_plugins(self):
         LOG.info('Loading entry-points for "%s".', self.namespace)
-        for entry_point in pkg_resources.iter_entry_points(self.namespace):
+        if self.registry is not None:
+            entry_points = self.registry.entry_points(self.namespace)
+        else:
+            import pkg_resources
+            entry_points = pkg_resources.iter_entry_points(self.namespace)
+        for entry_point in entry_points:
             self._load_plugin_from_entrypoint(entry_point)
 
     def _load_plugin_from_entrypoint(self, entry_point, local=False):
@@ -286,6 +428,25 @@ class PluginManager(object):  # pylint: disable=too-few-public-methods
         self.names.append(name)
         LOG.debug('Loaded %r for plugin "%s".', self.plugins[name], name)
 
+    def without(self, names):
+        """Create a manager for all but some of our plugins.
+
+        :param names:
+            Names of the plugins to leave out.
+        :returns:
+            A copy of this manager sharing the remaining plugins with it.
+        :rtype:
+            PluginManager
+        """
+        names = frozenset(names)
+        manager = copy.copy(self)
+        manager.names = [name for name in self.names if name not in names]
+        manager.plugins = dict(
+            (name, plugin) for name, plugin in self.plugins.items()
+            if name not in names
+        )
+        return manager
+
     def map(self, func, *args, **kwargs):
         r"""Call ``func`` with the plugin and \*args and \**kwargs after.
 
@@ -329,6 +490,66 @@ class PluginManager(object):  # pylint: disable=too-few-public-methods
             yield (plugin_name, plugin.version)
 
 
+class EntryPointRegistry(object):
+    """Find the entry-points of every plugin type at once.
+
+    When given a :class:`~flake8.cache.EntryPointCache`, the entry-points are
+    only found with :mod:`pkg_resources` (and it is only imported) when the
+    installed distributions changed since the last run.
+    """
+
+    namespaces = ('flake8.extension', 'flake8.listen', 'flake8.report')
+
+    def __init__(self, entry_point_cache=None):
+        """Initialize our registry.
+
+        :param entry_point_cache:
+            The cache to store the entry-points in between runs.
+        :type entry_point_cache:
+            flake8.cache.EntryPointCache
+        """
+        self.entry_point_cache = entry_point_cache
+        self._entry_points = None
+
+    def entry_points(self, namespace):
+        # type: (str) -> List[EntryPoint]
+        """Return the entry-points registered in the namespace."""
+        if self._entry_points is None:
+            self._entry_points = self._find_entry_points()
+        return [
+            EntryPoint(name, module_name, attrs, extras,
+                       Distribution(*dist) if dist else None)
+            for entry_namespace, name, module_name, attrs, extras, dist
+            in self._entry_points
+            if entry_namespace == namespace
+        ]
+
+    def _find_entry_points(self):
+        stamp = None
+        if self.entry_point_cache is not None:
+            stamp = cache.distributions_stamp()
+            entry_points = self.entry_point_cache.get(stamp)
+            if entry_points is not None:
+                LOG.debug('Using the entry-points found by a previous run.')
+                return entry_points
+
+        # NOTE(sigmavirus24): Importing pkg_resources is what scans every
+        # installed distribution so only do it when we have to.
+        import pkg_resources
+        entry_points = []
+        for namespace in self.namespaces:
+            for entry_point in pkg_resources.iter_entry_points(namespace):
+                entry_point = EntryPoint.from_pkg_resources(entry_point)
+                entry_points.append([
+                    namespace, entry_point.name, entry_point.module_name,
+                    list(entry_point.attrs), list(entry_point.extras),
+                    list(entry_point.dist) if entry_point.dist else None,
+                ])
+        if self.entry_point_cache is not None:
+            self.entry_point_cache.set(stamp, entry_points)
+        return entry_points
+
+
 def version_for(plugin):
     # (Plugin) -> Union[str, NoneType]
     """Determine the version of a plugin by it's module.
@@ -356,14 +577,18 @@ class PluginTypeManager(object):
 
     namespace = None
 
-    def __init__(self, local_plugins=None):
+    def __init__(self, local_plugins=None, registry=None):
         """Initialize the plugin type's manager.
 
         :param list local_plugins:
             Plugins from config file instead of entry-points
+        :param registry:
+            Registry to find the entry-points in.
+        :type registry:
+            EntryPointRegistry
         """
         self.manager = PluginManager(
-            self.namespace, local_plugins=local_plugins)
+            self.namespace, local_plugins=local_plugins, registry=registry)
         self.plugins_loaded = False
 
     def __contains__(self, name):
@@ -402,6 +627,21 @@ class PluginTypeManager(object):
         """Proxy attribute to underlying manager."""
         return self.manager.plugins
 
+    def without(self, names):
+        """Create a plugin type manager for all but some of our plugins.
+
+        Plugins which have already been loaded stay loaded in the copy. The
+        plugins left out are never loaded by the copy.
+
+        :param names:
+            Names of the plugins to leave out.
+        :returns:
+            A copy of this plugin type manager.
+        """
+        plugin_type_manager = copy.copy(self)
+        plugin_type_manager.manager = self.manager.without(names)
+        return plugin_type_manager
+
     @staticmethod
     def _generate_call_function(method_name, optmanager, *args, **kwargs):
         def generated_function(plugin):  # noqa: D105
@@ -472,6 +712,18 @@ class Checkers(PluginTypeManager):
 
     namespace = 'flake8.extension'
 
+    def without(self, names):
+        """Create a manager for all but some of our checkers."""
+        checkers = super(Checkers, self).without(names)
+        # Forget the lists of checks we may have built from every plugin
+        for attribute in ('_ast_plugins', '_ast_visitor_plugins',
+                          '_logical_line_plugins',
+                          '_physical_line_plugins',
+                          '_physical_lines_plugins',
+                          '_logical_lines_plugins'):
+            checkers.__dict__.pop(attribute, None)
+        return checkers
+
     def checks_expecting(self, argument_name):
         """Retrieve checks that expect an argument with the specified name.
 
@@ -487,12 +739,23 @@ class Checkers(PluginTypeManager):
             'ast_plugins': [
                 plugin.to_dictionary() for plugin in self.ast_plugins
             ],
+            'ast_visitor_plugins': [
+                plugin.to_dictionary() for plugin in self.ast_visitor_plugins
+            ],
             'logical_line_plugins': [
                 plugin.to_dictionary() for plugin in self.logical_line_plugins
             ],
             'physical_line_plugins': [
                 plugin.to_dictionary() for plugin in self.physical_line_plugins
             ],
+            'physical_lines_plugins': [
+                plugin.to_dictionary()
+                for plugin in self.physical_lines_plugins
+            ],
+            'logical_lines_plugins': [
+                plugin.to_dictionary()
+                for plugin in self.logical_lines_plugins
+            ],
         }
 
     def register_options(self, optmanager):
@@ -527,6 +790,15 @@ class Checkers(PluginTypeManager):
             self._ast_plugins = plugins
         return plugins
 
+    @property
+    def ast_visitor_plugins(self):
+        """List of plugins that visit the nodes of the AST tree."""
+        plugins = getattr(self, '_ast_visitor_plugins', [])
+        if not plugins:
+            plugins = list(self.checks_expecting('ast_context'))
+            self._ast_visitor_plugins = plugins
+        return plugins
+
     @property
     def logical_line_plugins(self):
         """List of plugins that expect the logical lines."""
@@ -545,6 +817,24 @@ class Checkers(PluginTypeManager):
             self._physical_line_plugins = plugins
         return plugins
 
+    @property
+    def physical_lines_plugins(self):
+        """List of plugins that expect every physical line at once."""
+        plugins = getattr(self, '_physical_lines_plugins', [])
+        if not plugins:
+            plugins = list(self.checks_expecting('physical_lines'))
+            self._physical_lines_plugins = plugins
+        return plugins
+
+    @property
+    def logical_lines_plugins(self):
+        """List of plugins that expect every logical line at once."""
+        plugins = getattr(self, '_logical_lines_plugins', [])
+        if not plugins:
+            plugins = list(self.checks_expecting('logical_lines'))
+            self._logical_lines_plugins = plugins
+        return plugins
+
 
 class Listeners(PluginTypeManager, NotifierBuilderMixin):
     """All of the listeners registered through entry-points or config."""
@@ -1,4 +1,6 @@
 """Module containing our file processor that tokenizes a file for checks."""
+import ast
+import collections
 import contextlib
 import io
 import logging
@@ -20,6 +22,88 @@ COMMENT_WITH_NL = tokenize.generate_tokens(['#\n'].pop).send(None)[1] == '#\n'
 SKIP_TOKENS = frozenset([tokenize.NL, tokenize.NEWLINE, tokenize.INDENT,
                          tokenize.DEDENT])
 
+#: The state of the file processor for one logical line
+LogicalLine = collections.namedtuple(
+    'LogicalLine',
+    [
+        'logical_line',
+        'mapping',
+        'tokens',
+        'indent_level',
+        'previous_indent_level',
+        'blank_lines',
+        'blank_before',
+        'previous_logical',
+        'previous_unindented_logical_line',
+        'noqa',
+    ],
+)
+
+
+class AstContext(object):
+    """An abstract syntax tree analyzed once for every plugin.
+
+    The tree is walked a single time to find the parent of each node and the
+    nodes of each type so that plugins can look them up instead of walking
+    the whole tree themselves.
+    """
+
+    def __init__(self, tree):
+        """Initialize our context.
+
+        :param tree:
+            The abstract syntax tree of a file.
+        :type tree:
+            ast.AST
+        """
+        #: The abstract syntax tree of the file
+        self.tree = tree
+        #: Every node of the tree in the order :func:`ast.walk` yields them
+        self.nodes = nodes = [tree]
+        #: The parent of each node except the tree itself
+        self.parents = parents = {}
+        #: The nodes of each type in the order :func:`ast.walk` yields them
+        self.nodes_by_type = nodes_by_type = {}
+        iter_child_nodes = ast.iter_child_nodes
+        # NOTE(sigmavirus24): Appending the children to the list we are
+        # iterating over walks the tree breadth-first like ast.walk does.
+        for node in nodes:
+            nodes_by_type.setdefault(type(node), []).append(node)
+            for child in iter_child_nodes(node):
+                parents[child] = node
+                nodes.append(child)
+
+    def nodes_of_type(self, *node_types):
+        """Find the nodes which are instances of any of the types.
+
+        :param node_types:
+            The classes of nodes to find, e.g., :class:`ast.Call` or
+            :class:`ast.stmt`.
+        :returns:
+            The nodes in the order :func:`ast.walk` yields them.
+        :rtype:
+            list
+        """
+        found_types = [node_type for node_type in self.nodes_by_type
+                       if issubclass(node_type, node_types)]
+        if not found_types:
+            return []
+        if len(found_types) == 1:
+            return list(self.nodes_by_type[found_types[0]])
+        return [node for node in self.nodes if isinstance(node, node_types)]
+
+    def parent_of(self, node):
+        """Find the node containing a node, or None for the tree itself."""
+        return self.parents.get(node)
+
+    def ancestors_of(self, node):
+        """Yield the parents of a node, starting with its own parent."""
+        parents = self.parents
+        node = parents.get(node)
+        while node is not None:
+            yield node
+            node = parents.get(node)
+
 
 class FileProcessor(object):
     """Processes a file and holdes state.
@@ -43,7 +127,10 @@ class FileProcessor(object):
     - :attr:`previous_logical`
     - :attr:`previous_unindented_logical_line`
     - :attr:`tokens`
+    - :attr:`ast_context`
     - :attr:`file_tokens`
+    - :attr:`logical_lines`
+    - :attr:`multiline_string_ranges`
     - :attr:`total_lines`
     - :attr:`verbose`
     """
@@ -102,27 +189,160 @@ class FileProcessor(object):
         self.statistics = {
             'logical lines': 0,
         }
-        self._file_tokens = None
+        #: Every token generated so far by our single pass over the file
+        self._file_tokens = []
+        #: The number of lines the tokenizer had read for each token
+        self._file_token_line_numbers = []
+        #: The number of lines the tokenizer has read
+        self._lines_tokenized = 0
+        #: The tokenizer, created when the first token is requested
+        self._tokenizer = None
+        #: Whether the tokenizer has generated every token in the file
+        self._tokenizer_exhausted = False
+        #: The exception raised by the tokenizer, if any
+        self._tokenizer_exception = None
+        #: Codes ignored with ``# noqa`` comments, keyed by line number
+        self._noqa_lines = {}
+        #: The first and last line of each multi-line string
+        self._multiline_string_ranges = []
+        #: Every logical line built so far, in order, when
+        #: :attr:`record_logical_lines` is set
+        self.logical_lines = []
+        #: Whether the checker records each logical line in
+        #: :attr:`logical_lines`, only needed by plugins expecting them
+        self.record_logical_lines = False
+        #: The abstract syntax tree, once it has been built
+        self._tree = None
+        #: The analysis of the abstract syntax tree, once it has been built
+        self._ast_context = None
 
     @property
     def file_tokens(self):
         """The complete set of tokens for a file.
 
+        The file is only tokenized once; these are the same tokens that
+        :meth:`generate_tokens` yields.
+
         Accessing this attribute *may* raise an InvalidSyntax exception.
 
         :raises: flake8.exceptions.InvalidSyntax
         """
-        if self._file_tokens is None:
-            line_iter = iter(self.lines)
-            try:
-                self._file_tokens = list(tokenize.generate_tokens(
-                    lambda: next(line_iter)
-                ))
-            except tokenize.TokenError as exc:
-                raise exceptions.InvalidSyntax(exc.message, exception=exc)
+        try:
+            while self._tokenize_next():
+                pass
+        except (tokenize.TokenError, SyntaxError) as exc:
+            raise exceptions.InvalidSyntax(exception=exc)
 
         return self._file_tokens
 
+    @property
+    def ast_context(self):
+        # type: () -> AstContext
+        """The abstract syntax tree of the file analyzed for plugins.
+
+        This is built the first time a plugin asks for it and then shared by
+        every other plugin.
+        """
+        if self._ast_context is None:
+            self._ast_context = AstContext(self.build_ast())
+        return self._ast_context
+
+    @property
+    def multiline_string_ranges(self):
+        # type: () -> List[Tuple[int, int]]
+        """The first and last line of each multi-line string tokenized."""
+        return self._multiline_string_ranges
+
+    def _next_tokenizer_line(self):
+        if self._lines_tokenized >= self.total_lines:
+            return ''
+        line = self.lines[self._lines_tokenized]
+        self._lines_tokenized += 1
+        return line
+
+    def _tokenize_next(self):
+        """Record the next token from the tokenizer.
+
+        :returns:
+            True if a token was recorded, False if the file has been
+            completely tokenized.
+        :raises:
+            Whatever exception the tokenizer raised, every time this is called
+            after it raised one.
+        """
+        if self._tokenizer_exception is not None:
+            raise self._tokenizer_exception
+        if self._tokenizer_exhausted:
+            return False
+        if self._tokenizer is None:
+            self._tokenizer = tokenize.generate_tokens(
+                self._next_tokenizer_line
+            )
+        try:
+            token = next(self._tokenizer)
+        except StopIteration:
+            self._tokenizer = None
+            self._tokenizer_exhausted = True
+            return False
+        except (tokenize.TokenError, SyntaxError) as exc:
+            self._tokenizer = None
+            self._tokenizer_exception = exc
+            raise
+        self._file_tokens.append(token)
+        self._file_token_line_numbers.append(self._lines_tokenized)
+        if token[0] == tokenize.COMMENT:
+            noqa_codes = parse_noqa_comment(token[1])
+            if noqa_codes is not NOT_NOQA:
+                self._noqa_lines[token[2][0]] = noqa_codes
+        elif is_multiline_string(token):
+            self._multiline_string_ranges.append((token[2][0], token[3][0]))
+        return True
+
+    def noqa_line_mapping(self):
+        # type: () -> Dict[int, Optional[Tuple[str, ...]]]
+        """Map line numbers to the codes ignored with ``# noqa`` comments.
+
+        The mapping is built from the comment tokens recorded while
+        tokenizing the file. The lines of multi-line strings are searched
+        for ``# noqa`` like any physical line so that, e.g., a long URL in a
+        docstring can still be ignored on its own line. A ``# noqa`` comment
+        following a multi-line string also applies to every other line of
+        that string. If the file can not be tokenized, each physical line is
+        searched for ``# noqa`` instead.
+
+        :returns:
+            Dictionary mapping the line numbers with a ``# noqa`` comment to
+            the tuple of codes it ignores, or ``None`` if it ignores every
+            code.
+        :rtype:
+            dict
+        """
+        try:
+            self.file_tokens
+        except exceptions.InvalidSyntax:
+            mapping = {}
+            self._parse_noqa_comments(range(1, len(self.lines) + 1), mapping)
+            return mapping
+
+        noqa_lines = self._noqa_lines
+        mapping = dict(noqa_lines)
+        for start, end in self._multiline_string_ranges:
+            self._parse_noqa_comments(
+                (line_number for line_number in range(start, end + 1)
+                 if line_number not in noqa_lines),
+                mapping,
+            )
+            if end in noqa_lines:
+                for line_number in range(start, end):
+                    mapping.setdefault(line_number, noqa_lines[end])
+        return mapping
+
+    def _parse_noqa_comments(self, line_numbers, mapping):
+        for line_number in line_numbers:
+            noqa_codes = parse_noqa_comment(self.lines[line_number - 1])
+            if noqa_codes is not NOT_NOQA:
+                mapping[line_number] = noqa_codes
+
     @contextlib.contextmanager
     def inside_multiline(self, line_number):
         """Context-manager to toggle the multiline attribute."""
@@ -151,6 +371,31 @@ class FileProcessor(object):
         if self.blank_before < self.blank_lines:
             self.blank_before = self.blank_lines
 
+    def record_logical_line(self, mapping):
+        """Add the current logical line to :attr:`logical_lines`.
+
+        :param list mapping:
+            The offsets of the logical line and where they are in the file.
+        :returns:
+            The recorded state of the logical line.
+        :rtype:
+            LogicalLine
+        """
+        logical_line = LogicalLine(
+            self.logical_line,
+            mapping,
+            self.tokens,
+            self.indent_level,
+            self.previous_indent_level,
+            self.blank_lines,
+            self.blank_before,
+            self.previous_logical,
+            self.previous_unindented_logical_line,
+            self.noqa,
+        )
+        self.logical_lines.append(logical_line)
+        return logical_line
+
     def update_checker_state_for(self, plugin):
         """Update the checker_state attribute for the plugin."""
         if 'checker_state' in plugin['parameters']:
@@ -207,8 +452,14 @@ class FileProcessor(object):
         return comments, logical, mapping
 
     def build_ast(self):
-        """Build an abstract syntax tree from the list of lines."""
-        return compile(''.join(self.lines), '', 'exec', PyCF_ONLY_AST)
+        """Build an abstract syntax tree from the list of lines.
+
+        The file is only parsed once, later calls return the same tree.
+        """
+        if self._tree is None:
+            self._tree = compile(''.join(self.lines), '', 'exec',
+                                 PyCF_ONLY_AST)
+        return self._tree
 
     def build_logical_line(self):
         """Build a logical line from the current tokens list."""
@@ -256,14 +507,27 @@ class FileProcessor(object):
     def generate_tokens(self):
         """Tokenize the file and yield the tokens.
 
+        Tokens are recorded as they are generated so that :attr:`file_tokens`
+        does not need to tokenize the file a second time. If a plugin already
+        requested :attr:`file_tokens`, the recorded tokens are replayed. In
+        either case, :attr:`line_number` advances exactly as though the
+        tokenizer were reading the lines as the tokens are yielded.
+
         :raises flake8.exceptions.InvalidSyntax:
             If a :class:`tokenize.TokenError` is raised while generating
             tokens.
         """
+        file_tokens = self._file_tokens
+        line_numbers = self._file_token_line_numbers
+        index = 0
         try:
-            for token in tokenize.generate_tokens(self.next_line):
+            while index < len(file_tokens) or self._tokenize_next():
+                token = file_tokens[index]
                 if token[2][0] > self.total_lines:
                     break
+                while self.line_number < line_numbers[index]:
+                    self.next_line()
+                index += 1
                 self.tokens.append(token)
                 yield token
         except (tokenize.TokenError, SyntaxError) as exc:
@@ -375,6 +639,30 @@ if COMMENT_WITH_NL:  # If on Python 2.6
                 (token[0] == tokenize.COMMENT and token[1] == token[4]))
 
 
+# Sentinel returned by parse_noqa_comment when there is no ``# noqa``
+NOT_NOQA = object()
+
+
+def parse_noqa_comment(text):
+    """Parse the codes ignored by a ``# noqa`` comment in the text.
+
+    :param str text:
+        The comment (or line) to search for ``# noqa``.
+    :returns:
+        :data:`NOT_NOQA` if there is no ``# noqa`` comment, ``None`` for a
+        blanket ``# noqa`` comment, or a tuple of the codes listed after
+        ``# noqa:``.
+    """
+    noqa_match = defaults.NOQA_INLINE_REGEXP.search(text)
+    if noqa_match is None:
+        return NOT_NOQA
+
+    codes_str = noqa_match.groupdict()['codes']
+    if codes_str is None:
+        return None
+    return tuple(utils.parse_comma_separated_list(codes_str))
+
+
 def is_multiline_string(token):
     """Check if this is a multiline string."""
     return token[0] == tokenize.STRING and '\n' in token[1]
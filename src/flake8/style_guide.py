@@ -9,6 +9,7 @@ import logging
 from flake8 import defaults
 from flake8 import statistics
 from flake8 import utils
+from flake8.plugins import _trie
 
 __all__ = (
     'StyleGuide',
@@ -71,12 +72,17 @@ _Violation = collections.namedtuple(
 class Violation(_Violation):
     """Class representing a violation reported by Flake8."""
 
-    def is_inline_ignored(self, disable_noqa):
-        # type: (Violation) -> bool
+    def is_inline_ignored(self, disable_noqa, noqa_line_mapping=None):
+        # type: (bool, Optional[Dict[int, Optional[Tuple[str]]]]) -> bool
         """Determine if an comment has been added to ignore this line.
 
         :param bool disable_noqa:
             Whether or not users have provided ``--disable-noqa``.
+        :param dict noqa_line_mapping:
+            The mapping of line numbers to the codes ignored on them built
+            by :meth:`flake8.processor.FileProcessor.noqa_line_mapping`. If
+            not provided, the physical line is searched for a ``# noqa``
+            comment instead.
         :returns:
             True if error is ignored in-line, False otherwise.
         :rtype:
@@ -87,6 +93,9 @@ class Violation(_Violation):
         if disable_noqa:
             return False
 
+        if noqa_line_mapping is not None:
+            return self._is_ignored_by_mapping(noqa_line_mapping)
+
         if physical_line is None:
             physical_line = linecache.getline(self.filename,
                                               self.line_number)
@@ -110,6 +119,25 @@ class Violation(_Violation):
                   self, codes_str)
         return False
 
+    def _is_ignored_by_mapping(self, noqa_line_mapping):
+        if self.line_number not in noqa_line_mapping:
+            LOG.debug('%r is not inline ignored', self)
+            return False
+
+        codes = noqa_line_mapping[self.line_number]
+        if codes is None:
+            LOG.debug('%r is ignored by a blanket ``# noqa``', self)
+            return True
+
+        if self.code.startswith(tuple(codes)):
+            LOG.debug('%r is ignored specifically inline with ``# noqa: %s``',
+                      self, ', '.join(codes))
+            return True
+
+        LOG.debug('%r is not ignored inline with ``# noqa: %s``',
+                  self, ', '.join(codes))
+        return False
+
     def is_in(self, diff):
         """Determine if the violation is included in a diff's line ranges.
 
@@ -146,11 +174,19 @@ class Violation(_Violation):
         return self.line_number in line_numbers
 
 
+# Indices of the matches returned by DecisionEngine.find_matches
+_SELECT, _EXTENDED_SELECT, _IGNORE = range(3)
+
+
 class DecisionEngine(object):
     """A class for managing the decision process around violations.
 
     This contains the logic for whether a violation should be reported or
     ignored.
+
+    The select, extended default select, and ignore lists are compiled into
+    a single prefix trie so that the most specific entry of each list that
+    matches a code is found by walking the code once.
     """
 
     def __init__(self, options):
@@ -171,13 +207,51 @@ class DecisionEngine(object):
         self.using_default_select = (
             set(self.selected) == set(defaults.SELECT)
         )
+        self.matcher = _trie.Trie()
+        for index, codes in ((_SELECT, self.all_selected),
+                             (_EXTENDED_SELECT, self.extended_selected),
+                             (_IGNORE, self.ignored)):
+            for code in codes:
+                self.matcher.add(code, (index, code))
 
-    def _in_all_selected(self, code):
-        return self.all_selected and code.startswith(self.all_selected)
+    def find_matches(self, code):
+        # type: (str) -> (Optional[str], Optional[str], Optional[str])
+        """Find the most specific select, extended and ignore entries.
+
+        :param str code:
+            The code for the check that has been run.
+        :returns:
+            A tuple of the longest entries in the select (including enabled
+            extensions), extended default select, and ignore lists which are
+            prefixes of ``code``. Each entry is ``None`` if nothing in that
+            list matches.
+        :rtype:
+            tuple
+        """
+        matches = [None, None, None]
+        for node in self.matcher.find_prefixes(code):
+            for index, prefix in node.data:
+                matches[index] = prefix
+        return tuple(matches)
+
+    def _was_selected(self, select, extra_select):
+        if select is not None:
+            return Selected.Explicitly
 
-    def _in_extended_selected(self, code):
-        return (self.extended_selected and
-                code.startswith(self.extended_selected))
+        if not self.all_selected and extra_select is not None:
+            # If it was not explicitly selected, it may have been implicitly
+            # selected because the check comes from a plugin that is enabled by
+            # default
+            return Selected.Implicitly
+
+        return Ignored.Implicitly
+
+    @staticmethod
+    def _was_ignored(ignore):
+        if ignore is not None:
+            return Ignored.Explicitly
+
+        return Selected.Implicitly
 
     def was_selected(self, code):
         # type: (str) -> Union[Selected, Ignored]
@@ -192,16 +266,8 @@ class DecisionEngine(object):
             Ignored.Implicitly if the selected list is not empty but no match
             was found.
         """
-        if self._in_all_selected(code):
-            return Selected.Explicitly
-
-        if not self.all_selected and self._in_extended_selected(code):
-            # If it was not explicitly selected, it may have been implicitly
-            # selected because the check comes from a plugin that is enabled by
-            # default
-            return Selected.Implicitly
-
-        return Ignored.Implicitly
+        select, extra_select, _ = self.find_matches(code)
+        return self._was_selected(select, extra_select)
 
     def was_ignored(self, code):
         # type: (str) -> Union[Selected, Ignored]
@@ -216,17 +282,14 @@ class DecisionEngine(object):
             Selected.Implicitly if the ignored list is not empty but no match
             was found.
         """
-        if self.ignored and code.startswith(self.ignored):
-            return Ignored.Explicitly
-
-        return Selected.Implicitly
+        return self._was_ignored(self.find_matches(code)[_IGNORE])
 
     def more_specific_decision_for(self, code):
-        # type: (Violation) -> Decision
-        select = find_first_match(code, self.all_selected)
-        extra_select = find_first_match(code, self.extended_selected)
-        ignore = find_first_match(code, self.ignored)
+        # type: (str) -> Decision
+        """Decide between the most specific select and ignore entries."""
+        return self._more_specific_decision(*self.find_matches(code))
 
+    def _more_specific_decision(self, select, extra_select, ignore):
         if select and ignore:
             # If the violation code appears in both the select and ignore
             # lists (in some fashion) then if we're using the default ignore
@@ -271,8 +334,9 @@ class DecisionEngine(object):
     def make_decision(self, code):
         """Decide if code should be ignored or selected."""
         LOG.debug('Deciding if "%s" should be reported', code)
-        selected = self.was_selected(code)
-        ignored = self.was_ignored(code)
+        select, extra_select, ignore = self.find_matches(code)
+        selected = self._was_selected(select, extra_select)
+        ignored = self._was_ignored(ignore)
         LOG.debug('The user configured "%s" to be "%s", "%s"',
                   code, selected, ignored)
 
@@ -284,7 +348,9 @@ class DecisionEngine(object):
               ignored is Ignored.Explicitly) or
               (selected is Ignored.Implicitly and
                ignored is Selected.Implicitly)):
-            decision = self.more_specific_decision_for(code)
+            decision = self._more_specific_decision(
+                select, extra_select, ignore,
+            )
         elif (selected is Ignored.Implicitly or
               ignored is Ignored.Explicitly):
             decision = Decision.Ignored  # pylint: disable=R0204
@@ -312,6 +378,33 @@ class DecisionEngine(object):
             LOG.debug('"%s" will be "%s"', code, decision)
         return decision
 
+    def is_prefix_ignored(self, prefix):
+        # type: (str) -> bool
+        """Determine if every code beginning with the prefix is ignored.
+
+        The decision for a code only depends on the most specific entries of
+        the select, extended default select, and ignore lists matching it.
+        Those are the entries matching ``prefix`` unless the code also begins
+        with a longer entry, so deciding for ``prefix`` and for each longer
+        entry beginning with it covers every code.
+
+        :param str prefix:
+            The prefix of the codes, e.g., the name of a plugin's entry-point.
+        :returns:
+            True if no code beginning with ``prefix`` can be selected.
+        :rtype:
+            bool
+        """
+        codes = [prefix]
+        codes.extend(
+            code
+            for code in (self.all_selected + self.extended_selected +
+                         self.ignored)
+            if code.startswith(prefix)
+        )
+        return all(self.decision_for(code) is Decision.Ignored
+                   for code in codes)
+
 
 class StyleGuide(object):
     """Manage a Flake8 user's style guide."""
@@ -351,8 +444,8 @@ class StyleGuide(object):
         return self.decider.decision_for(code)
 
     def handle_error(self, code, filename, line_number, column_number, text,
-                     physical_line=None):
-        # type: (str, str, int, int, str) -> int
+                     physical_line=None, noqa_line_mapping=None):
+        # type: (str, str, int, int, str, str, dict) -> int
         """Handle an error reported by a check.
 
         :param str code:
@@ -369,6 +462,10 @@ class StyleGuide(object):
             The text of the error message.
         :param str physical_line:
             The actual physical line causing the error.
+        :param dict noqa_line_mapping:
+            The line numbers of the file mapped to the codes ignored on them
+            with ``# noqa`` comments. See
+            :meth:`flake8.processor.FileProcessor.noqa_line_mapping`.
         :returns:
             1 if the error was reported. 0 if it was ignored. This is to allow
             for counting of the number of errors found that were not ignored.
@@ -385,7 +482,9 @@ class StyleGuide(object):
                           text, physical_line)
         error_is_selected = (self.should_report_error(error.code) is
                              Decision.Selected)
-        is_not_inline_ignored = error.is_inline_ignored(disable_noqa) is False
+        is_not_inline_ignored = error.is_inline_ignored(
+            disable_noqa, noqa_line_mapping,
+        ) is False
         is_included_in_diff = error.is_in(self._parsed_diff)
         if (error_is_selected and is_not_inline_ignored and
                 is_included_in_diff):
@@ -411,13 +510,3 @@ def find_more_specific(selected, ignored):
     if selected.startswith(ignored) and selected != ignored:
         return Decision.Selected
     return Decision.Ignored
-
-
-def find_first_match(error_code, code_list):
-    startswith = error_code.startswith
-    for code in code_list:
-        if startswith(code):
-            break
-    else:
-        return None
-    return code
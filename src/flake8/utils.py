@@ -6,12 +6,22 @@ import io
 import os
 import platform
 import re
+import subprocess
 import sys
 import tokenize
 
+try:
+    from os import scandir  # Python 3.5+
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
 DIFF_HUNK_REGEXP = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@.*$')
 COMMA_SEPARATED_LIST_RE = re.compile(r'[,\s]')
 LOCAL_PLUGIN_LIST_RE = re.compile(r'[,\t\n\r\f\v]')
+GLOB_CHARACTERS_RE = re.compile(r'[*?[]')
 
 
 def parse_comma_separated_list(value, regexp=COMMA_SEPARATED_LIST_RE):
@@ -266,6 +276,150 @@ def filenames_from(arg, predicate=None):
         yield arg
 
 
+def _list_directory(path):
+    # type: (str) -> Generator
+    if scandir is None:
+        for name in os.listdir(path):
+            joined = os.path.join(path, name)
+            yield name, os.path.isdir(joined), os.path.islink(joined)
+        return
+
+    for entry in scandir(path):
+        try:
+            is_directory = entry.is_dir()
+        except OSError:
+            is_directory = False
+        yield entry.name, is_directory, entry.is_symlink()
+
+
+def walk_files(directory, predicate=None):
+    # type: (str, callable) -> Generator
+    """Generate the paths of the files beneath a directory.
+
+    This walks the directory like :func:`os.walk` (without following
+    symbolic links to directories) but takes the type of each entry from the
+    directory listing, using :func:`os.scandir` when it is available, so
+    entries are not inspected again. Symbolic links which are broken are
+    skipped.
+
+    :param str directory:
+        The directory to walk.
+    :param callable predicate:
+        Predicate to use to filter out files and directories. It is called
+        with the path of each entry and its absolute path, which is built
+        from the absolute path of the directory rather than looked up again.
+        If the predicate returns ``True`` we will exclude the file or not
+        walk the directory, otherwise we will yield or walk it.
+    :returns:
+        Generator of paths
+    """
+    if predicate is None:
+        predicate = _default_predicate
+
+    directories = [(directory, os.path.abspath(directory))]
+    while directories:
+        path, absolute_path = directories.pop()
+        try:
+            entries = list(_list_directory(path))
+        except OSError:
+            # NOTE(sigmavirus24): os.walk() ignores directories it cannot
+            # list and so do we.
+            continue
+
+        sub_directories = []
+        for name, is_directory, is_symlink in entries:
+            joined = os.path.join(path, name)
+            absolute_joined = os.path.join(absolute_path, name)
+            if predicate(joined, absolute_joined):
+                continue
+            if is_directory:
+                if not is_symlink:
+                    sub_directories.append((joined, absolute_joined))
+            elif not is_symlink or os.path.exists(joined):
+                yield joined
+        directories.extend(reversed(sub_directories))
+
+
+def compile_patterns(patterns):
+    # type: (List[str]) -> callable
+    """Compile patterns into a function matching names against all of them.
+
+    Patterns without wildcards are compared directly and the rest are
+    translated into a single regular expression. As with :func:`fnmatch`,
+    names and patterns are normalized with :func:`os.path.normcase`.
+
+    :param list patterns:
+        Patterns to match names against.
+    :returns:
+        A function which returns True if a pattern matches the name it is
+        called with, otherwise False.
+    :rtype:
+        callable
+    """
+    literals = set()
+    expressions = []
+    for pattern in patterns:
+        pattern = os.path.normcase(pattern)
+        if GLOB_CHARACTERS_RE.search(pattern):
+            expressions.append(_fnmatch.translate(pattern))
+        else:
+            literals.add(pattern)
+
+    normcase = os.path.normcase
+    if not expressions:
+        return lambda name: normcase(name) in literals
+
+    match_expressions = re.compile('|'.join(expressions)).match
+
+    def matches(name):
+        name = normcase(name)
+        return name in literals or match_expressions(name) is not None
+    return matches
+
+
+def git_ignored_paths(directory):
+    # type: (str) -> Union[Set[str], NoneType]
+    """Ask git which files and directories beneath a directory it ignores.
+
+    This runs ``git ls-files`` once so that git applies every ``.gitignore``
+    file, ``.git/info/exclude``, and the user's global excludes file exactly
+    as it would itself. Directories which are ignored entirely are reported
+    once rather than file by file.
+
+    :param str directory:
+        The directory to look beneath.
+    :returns:
+        The absolute paths of the ignored files and directories, or None if
+        git is not installed or the directory is not inside a work tree.
+    :rtype:
+        set
+    """
+    command = ['git', 'ls-files', '-z', '--others', '--ignored',
+               '--exclude-standard', '--directory']
+    try:
+        process = subprocess.Popen(command, cwd=directory,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+    except OSError:
+        return None
+    stdout, _ = process.communicate()
+    if process.returncode != 0:
+        return None
+
+    encoding = sys.getfilesystemencoding() or 'utf-8'
+    absolute_directory = os.path.abspath(directory)
+    ignored = set()
+    for path in stdout.split(b'\0'):
+        if not path:
+            continue
+        if not isinstance(path, str):
+            path = path.decode(encoding)
+        # NOTE(sigmavirus24): git always separates paths with "/" and ends
+        # the paths of directories with one; normpath() takes care of both.
+        ignored.add(os.path.normpath(os.path.join(absolute_directory, path)))
+    return ignored
+
+
 def fnmatch(filename, patterns, default=True):
     # type: (str, List[str], bool) -> bool
     """Wrap :func:`fnmatch.fnmatch` to add some functionality.
@@ -121,7 +121,7 @@ def test_report_order(results, expected_order):
     It gets a list of reports from the file checkers and verifies that the
     result will be ordered independent from the original report.
     """
-    def count_side_effect(name, sorted_results):
+    def count_side_effect(name, sorted_results, noqa_line_mapping):
         """Side effect for the result handler to tell all are reported."""
         return len(sorted_results)
 
@@ -129,17 +129,14 @@ def test_report_order(results, expected_order):
     # tuples to create the expected result lists from the indexes
     expected_results = [results[index] for index in expected_order]
 
-    file_checker = mock.Mock(spec=['results', 'display_name'])
-    file_checker.results = results
-    file_checker.display_name = 'placeholder'
-
     style_guide = mock.Mock(spec=['options'])
+    style_guide.options.jobs = '1'
     style_guide.processing_file = mock.MagicMock()
 
     # Create a placeholder manager without arguments or plugins
-    # Just add one custom file checker which just provides the results
+    # Just add the results for one file
     manager = checker.Manager(style_guide, [], [])
-    manager.checkers = [file_checker]
+    manager.results = [('placeholder', results, {}, None)]
 
     # _handle_results is the first place which gets the sorted result
     # Should something non-private be mocked instead?
@@ -148,4 +145,171 @@ def test_report_order(results, expected_order):
     manager._handle_results = handler
 
     assert manager.report() == (len(results), len(results))
-    handler.assert_called_once_with('placeholder', expected_results)
+    handler.assert_called_once_with('placeholder', expected_results, None)
+
+
+def test_logical_lines_plugins_are_given_every_logical_line():
+    """Verify that batched plugins see the state of each logical line."""
+    def batched_plugin(logical_lines):
+        for logical_line in logical_lines:
+            if logical_line.blank_before:
+                yield logical_line, 0, 'T001 blank lines before'
+
+    plugin = {'name': 'T001', 'parameters': {'logical_lines': True},
+              'plugin': batched_plugin}
+    checks = {'ast_plugins': [], 'logical_line_plugins': [],
+              'physical_line_plugins': [], 'physical_lines_plugins': [],
+              'logical_lines_plugins': [plugin]}
+    lines = [
+        'import os  # noqa\n',
+        '\n',
+        '\n',
+        'def f(\n',
+        '        x):\n',
+        '    return x\n',
+    ]
+    with mock.patch('flake8.processor.FileProcessor.read_lines',
+                    return_value=lines):
+        file_checker = checker.FileChecker(
+            '-', checks, mock.MagicMock(),
+        )
+
+    file_checker.run_checks()
+
+    table = file_checker.processor.logical_lines
+    assert [logical_line[:1] + logical_line[3:] for logical_line in table] == [
+        ('import os', 0, 0, 0, 0, '', '', True),
+        ('def f(x):', 0, 0, 2, 2, 'import os', 'import os', False),
+        ('return x', 4, 0, 0, 0, 'def f(x):', 'def f(x):', False),
+    ]
+    assert file_checker.results == [
+        ('T001', 4, 0, 'blank lines before', 'def f(\n'),
+    ]
+
+
+def test_physical_lines_plugins_update_the_indent_char():
+    """Verify that E101 from a batched plugin changes the indent_char."""
+    def mixed_indentation(physical_lines, indent_char):
+        for line_number, line in enumerate(physical_lines, 1):
+            indent = line[:len(line) - len(line.lstrip())]
+            if indent.strip(indent_char):
+                yield line_number, 0, 'E101 indentation contains mixed spaces'
+                return
+
+    def show_indent_char(physical_lines, indent_char):
+        yield 1, 0, 'T001 indent char {0!r}'.format(indent_char)
+
+    parameters = {'physical_lines': True, 'indent_char': True}
+    plugins = [
+        {'name': 'E101', 'parameters': parameters,
+         'plugin': mixed_indentation},
+        {'name': 'T001', 'parameters': parameters,
+         'plugin': show_indent_char},
+    ]
+    checks = {'ast_plugins': [], 'ast_visitor_plugins': [],
+              'logical_line_plugins': [], 'physical_line_plugins': [],
+              'logical_lines_plugins': [], 'physical_lines_plugins': plugins}
+    lines = [
+        'if True:\n',
+        '    x = 1\n',
+        'if True:\n',
+        '\ty = 2\n',
+    ]
+    with mock.patch('flake8.processor.FileProcessor.read_lines',
+                    return_value=lines):
+        file_checker = checker.FileChecker(
+            '-', checks, mock.MagicMock(),
+        )
+
+    file_checker.run_checks()
+
+    assert file_checker.processor.indent_char == '\t'
+    assert file_checker.results == [
+        ('E101', 4, 0, 'indentation contains mixed spaces', '\ty = 2\n'),
+        ('T001', 1, 0, "indent char '\\t'", 'if True:\n'),
+    ]
+
+
+def test_logical_lines_are_only_recorded_for_plugins_expecting_them():
+    """Verify that we do not keep every logical line when nobody asks."""
+    checks = {'ast_plugins': [], 'ast_visitor_plugins': [],
+              'logical_line_plugins': [], 'physical_line_plugins': [],
+              'physical_lines_plugins': [], 'logical_lines_plugins': []}
+    with mock.patch('flake8.processor.FileProcessor.read_lines',
+                    return_value=['import os\n', 'x = 1\n']):
+        file_checker = checker.FileChecker(
+            '-', checks, mock.MagicMock(),
+        )
+
+    file_checker.run_checks()
+
+    assert file_checker.processor.record_logical_lines is False
+    assert file_checker.processor.logical_lines == []
+    assert file_checker.statistics['logical lines'] == 2
+
+
+class CallVisitor(object):
+    """Visitor plugin reporting calls to print."""
+
+    def __init__(self, ast_context):
+        """Keep the context to look up the parents of nodes."""
+        self.ast_context = ast_context
+
+    def visit_FunctionDef(self, node):
+        """Report nothing for functions."""
+
+    def visit_Call(self, node):
+        """Report calls to print inside of functions."""
+        parent = self.ast_context.parent_of(node)
+        if getattr(node.func, 'id', None) == 'print':
+            yield (node.lineno, node.col_offset,
+                   'T100 print in {0}'.format(type(parent).__name__))
+
+
+class ImportVisitor(object):
+    """Visitor plugin reporting every import."""
+
+    def __init__(self, ast_context, filename):
+        """Accept the context and other parameters like any plugin."""
+        self.filename = filename
+
+    def visit_Import(self, node):
+        """Report the import."""
+        return [(node.lineno, node.col_offset, 'T200 import in ' +
+                 self.filename)]
+
+
+def test_ast_visitor_plugins_share_a_single_walk():
+    """Verify that each node is given to the visitors interested in it."""
+    plugins = [
+        {'name': 'T100', 'plugin': CallVisitor,
+         'parameters': {'ast_context': True}},
+        {'name': 'T200', 'plugin': ImportVisitor,
+         'parameters': {'ast_context': True, 'filename': True}},
+    ]
+    checks = {'ast_plugins': [], 'ast_visitor_plugins': plugins,
+              'logical_line_plugins': [], 'physical_line_plugins': [],
+              'physical_lines_plugins': [], 'logical_lines_plugins': []}
+    lines = [
+        'import os\n',
+        'def f():\n',
+        '    print(os.sep)\n',
+        '    len(print)\n',
+    ]
+    with mock.patch('flake8.processor.FileProcessor.read_lines',
+                    return_value=lines):
+        file_checker = checker.FileChecker('-', checks, mock.MagicMock())
+    file_checker.plugin_timings = {}
+
+    with mock.patch('ast.walk') as walk:
+        file_checker.run_checks()
+
+    walk.assert_not_called()
+    assert sorted(file_checker.results) == [
+        ('T100', 3, 4, 'print in Expr', '    print(os.sep)\n'),
+        ('T200', 1, 0, 'import in -', 'import os\n'),
+    ]
+    assert file_checker.plugin_timings == {
+        'T100': ['ast visitor', mock.ANY, 3],
+        'T200': ['ast visitor', mock.ANY, 1],
+    }
@@ -1,4 +1,5 @@
 """Tests for the Application class."""
+import json
 import optparse
 
 import mock
@@ -6,6 +7,8 @@ import pytest
 
 from flake8 import exceptions
 from flake8.main import application as app
+from flake8.options import config
+from flake8.plugins import manager
 
 
 def options(**kwargs):
@@ -106,3 +109,81 @@ def test_prelim_opts_args(application):
     assert application.prelim_opts.statistics
     assert application.prelim_opts.verbose
     assert application.prelim_args == ['src', 'setup.py']
+
+
+def make_check_plugins(*names):
+    """Create a mocked Checkers instance for unloaded plugins."""
+    check_plugins = mock.Mock(spec=['plugins', 'without'])
+    check_plugins.plugins = dict(
+        (name, manager.Plugin(name, mock.Mock(spec=[]))) for name in names
+    )
+    return check_plugins
+
+
+@pytest.mark.parametrize('argv, expected', [
+    (['--select=E,W'], ['C90', 'F']),
+    (['--ignore', 'F'], ['F']),
+    (['--select=E', '--enable-extensions=F'], ['C90']),
+    (['--select', 'F401', '-j4', '-'], ['C90']),
+])
+def test_skip_unreported_plugins(application, argv, expected):
+    """Verify we leave out the plugins which can not report anything."""
+    application.config_finder = config.ConfigFileFinder('flake8', [], [])
+    check_plugins = make_check_plugins('C90', 'F', 'pycodestyle.tabs')
+    application.check_plugins = check_plugins
+
+    application.skip_unreported_plugins(['--isolated'] + argv)
+
+    (unreported,), _ = check_plugins.without.call_args
+    assert sorted(unreported) == expected
+    assert application.check_plugins is check_plugins.without.return_value
+
+
+@pytest.mark.parametrize('argv', [
+    [],
+    ['--select=E,W', '--help'],
+    ['--select=E,W', '--max-doc-length=80'],
+    ['--select=E,W', '--daemon'],
+])
+def test_skip_unreported_plugins_keeps_every_plugin(application, argv):
+    """Verify we keep every plugin when any of them may be needed."""
+    application.config_finder = config.ConfigFileFinder('flake8', [], [])
+    check_plugins = make_check_plugins('C90', 'F', 'pycodestyle.tabs')
+    application.check_plugins = check_plugins
+
+    application.skip_unreported_plugins(['--isolated'] + argv)
+
+    assert check_plugins.without.called is False
+    assert application.check_plugins is check_plugins
+
+
+def test_report_plugin_profile(application, tmpdir):
+    """Verify that the slowest plugins are reported first."""
+    profile = tmpdir.join('profile.json')
+    application.options = options(profile_plugins=True,
+                                  profile_plugins_json=str(profile))
+    application.start_time, application.end_time = 10.0, 12.5
+    application.formatter = mock.Mock()
+    application.file_checker_manager = mock.Mock(
+        statistics={'files': 2},
+        plugin_statistics={
+            'E1': ['logical line', 0.25, 10],
+            'F': ['ast', 1.5, 2],
+        },
+    )
+
+    application.report_plugin_profile()
+
+    application.formatter.show_benchmarks.assert_called_once_with([
+        ('F (ast) seconds elapsed', 1.5),
+        ('F (ast) calls', 2),
+        ('E1 (logical line) seconds elapsed', 0.25),
+        ('E1 (logical line) calls', 10),
+    ])
+    written = json.loads(profile.read())
+    assert written['seconds elapsed'] == 2.5
+    assert written['files'] == 2
+    assert written['plugins'] == [
+        {'name': 'F', 'type': 'ast', 'seconds': 1.5, 'calls': 2},
+        {'name': 'E1', 'type': 'logical line', 'seconds': 0.25, 'calls': 10},
+    ]
@@ -0,0 +1,207 @@
+"""Tests for the ResultCache and its helpers."""
+import optparse
+import os
+
+import mock
+
+from flake8 import cache
+
+RESULTS = [
+    ('E501', 1, 80, 'line too long (82 > 79 characters)', 'x = 1\n'),
+    ('F401', 2, 1, "'os' imported but unused", None),
+]
+STATISTICS = {'tokens': 10, 'logical lines': 2, 'physical lines': 2}
+NOQA = {1: None, 2: ('F401', 'E2')}
+
+
+def make_cache(tmpdir, fingerprint='fingerprint', **kwargs):
+    """Create a ResultCache in a temporary directory."""
+    return cache.ResultCache(str(tmpdir), fingerprint, **kwargs)
+
+
+def test_get_returns_none_for_missing_entries(tmpdir):
+    """Verify that a miss is reported as None."""
+    result_cache = make_cache(tmpdir)
+    assert result_cache.get(result_cache.key_for('a.py', ['x = 1\n'])) is None
+
+
+def test_set_then_get_round_trips(tmpdir):
+    """Verify that stored results are retrieved as tuples."""
+    result_cache = make_cache(tmpdir)
+    key = result_cache.key_for('a.py', ['x = 1\n'])
+    result_cache.set(key, RESULTS, STATISTICS, NOQA)
+
+    assert result_cache.get(key) == (RESULTS, STATISTICS, NOQA)
+    assert not [name for name in os.listdir(os.path.dirname(
+        result_cache.path_for(key))) if name.endswith('.tmp')]
+
+
+def test_caches_are_equal_when_they_store_the_same_results(tmpdir):
+    """Verify that caches compare by directory, fingerprint, and size."""
+    assert make_cache(tmpdir) == make_cache(tmpdir)
+    assert make_cache(tmpdir) != make_cache(tmpdir, 'other')
+    assert make_cache(tmpdir) != make_cache(tmpdir, max_size=1)
+    assert make_cache(tmpdir) != str(tmpdir)
+
+
+def test_corrupt_entries_are_misses(tmpdir):
+    """Verify that unreadable entries are treated as misses."""
+    result_cache = make_cache(tmpdir)
+    key = result_cache.key_for('a.py', ['x = 1\n'])
+    result_cache.set(key, RESULTS, STATISTICS, NOQA)
+    with open(result_cache.path_for(key), 'w') as fd:
+        fd.write('{"results": [')
+
+    assert result_cache.get(key) is None
+
+
+def test_key_depends_on_contents_filename_and_fingerprint(tmpdir):
+    """Verify that anything affecting the results changes the key."""
+    first = make_cache(tmpdir)
+    second = make_cache(tmpdir, fingerprint='other')
+    key = first.key_for('a.py', ['x = 1\n'])
+
+    assert key == first.key_for('a.py', ['x = 1\n'])
+    assert key != first.key_for('a.py', ['x = 2\n'])
+    assert key != first.key_for('b.py', ['x = 1\n'])
+    assert key != second.key_for('a.py', ['x = 1\n'])
+
+
+def test_prune_evicts_least_recently_used_entries(tmpdir):
+    """Verify that pruning removes the oldest entries first."""
+    result_cache = make_cache(tmpdir)
+    keys = [result_cache.key_for('a.py', [str(i)]) for i in range(3)]
+    for mtime, key in enumerate(keys):
+        result_cache.set(key, RESULTS, STATISTICS, NOQA)
+        os.utime(result_cache.path_for(key), (mtime, mtime))
+    entry_size = os.path.getsize(result_cache.path_for(keys[0]))
+    result_cache.max_size = entry_size * 2
+
+    assert result_cache.prune() == 1
+    assert result_cache.get(keys[0]) is None
+    assert result_cache.get(keys[1]) is not None
+    assert result_cache.get(keys[2]) is not None
+
+
+def test_prune_only_evicts_result_entries(tmpdir):
+    """Verify that the timings and entry-points are never evicted."""
+    result_cache = make_cache(tmpdir, max_size=0)
+    key = result_cache.key_for('a.py', ['x = 1\n'])
+    result_cache.set(key, RESULTS, STATISTICS, NOQA)
+    result_cache.update_timings({'/a.py': (10, 0.5)})
+    stamp = [['/site-packages', []]]
+    entry_point_cache = cache.EntryPointCache(str(tmpdir))
+    entry_point_cache.set(stamp, [])
+
+    assert result_cache.prune() == 1
+    assert result_cache.get(key) is None
+    assert result_cache.get_timings() == {'/a.py': (10, 0.5)}
+    assert entry_point_cache.get(stamp) == []
+    assert result_cache.get_usage() == (0, 0)
+
+
+def test_prune_only_looks_at_entries_when_over_the_limit(tmpdir):
+    """Verify that the recorded usage avoids looking at every entry."""
+    result_cache = make_cache(tmpdir)
+    for i in range(2):
+        key = result_cache.key_for('a.py', [str(i)])
+        result_cache.set(key, RESULTS, STATISTICS, NOQA)
+    entry_size = os.path.getsize(result_cache.path_for(key))
+    assert result_cache.prune(added_entries=2) == 0
+    assert result_cache.get_usage() == (2, entry_size * 2)
+
+    result_cache.max_size = entry_size * 3
+    with mock.patch.object(result_cache, 'entries') as entries:
+        assert result_cache.prune(added_entries=1) == 0
+    entries.assert_not_called()
+    assert result_cache.get_usage() == (3, entry_size * 3)
+
+    with mock.patch.object(result_cache, 'entries',
+                           return_value=[]) as entries:
+        result_cache.prune(added_entries=1)
+    entries.assert_called_once_with()
+    assert result_cache.get_usage() == (0, 0)
+
+
+def test_fingerprint_ignores_reporting_options():
+    """Verify that only options which can affect results matter."""
+    options = optparse.Values({'max_line_length': 79, 'format': 'default'})
+    fingerprint = cache.fingerprint_for(options, [('pycodestyle', '2.3.1')])
+
+    options.format = 'pylint'
+    assert cache.fingerprint_for(
+        options, [('pycodestyle', '2.3.1')]) == fingerprint
+
+    options.max_line_length = 100
+    assert cache.fingerprint_for(
+        options, [('pycodestyle', '2.3.1')]) != fingerprint
+
+
+def test_fingerprint_depends_on_plugin_versions():
+    """Verify that upgrading a plugin invalidates the cache."""
+    options = optparse.Values({'max_line_length': 79})
+    assert (cache.fingerprint_for(options, [('pycodestyle', '2.3.1')]) !=
+            cache.fingerprint_for(options, [('pycodestyle', '2.4.0')]))
+
+
+def test_fingerprint_depends_on_the_plugins_run():
+    """Verify that plugins we skipped do not share cached results."""
+    options = optparse.Values({'max_line_length': 79})
+    versions = [('pyflakes', '1.6.0')]
+    assert (cache.fingerprint_for(options, versions, (), ['E', 'F']) !=
+            cache.fingerprint_for(options, versions, (), ['E']))
+
+
+def test_default_directory_honors_xdg_cache_home():
+    """Verify that we use XDG_CACHE_HOME when it is set."""
+    environ = {'XDG_CACHE_HOME': os.path.join('xdg', 'cache')}
+    with mock.patch.dict(os.environ, environ):
+        with mock.patch('flake8.utils.is_windows', return_value=False):
+            assert cache.default_directory() == os.path.join(
+                'xdg', 'cache', 'flake8'
+            )
+
+
+def test_update_timings_merges_previous_timings(tmpdir):
+    """Verify that files which were not checked keep their timings."""
+    result_cache = make_cache(tmpdir)
+    assert result_cache.get_timings() == {}
+
+    result_cache.update_timings({'/a.py': (10, 0.5), '/b.py': (20, 1.0)})
+    result_cache.update_timings({'/b.py': (30, 2.0)})
+
+    assert result_cache.get_timings() == {
+        '/a.py': (10, 0.5),
+        '/b.py': (30, 2.0),
+    }
+
+
+def test_distributions_stamp_changes_with_installed_distributions(tmpdir):
+    """Verify that installing or updating a distribution changes the stamp."""
+    site_packages = tmpdir.mkdir('site-packages')
+    site_packages.mkdir('six.py')
+    paths = [str(site_packages), str(tmpdir.join('missing.zip'))]
+    stamp = cache.distributions_stamp(paths)
+    assert stamp == [[str(site_packages), []],
+                     [str(tmpdir.join('missing.zip')), None]]
+
+    metadata = site_packages.mkdir('flake8_example-1.0.dist-info')
+    metadata.join('entry_points.txt').write('[flake8.extension]\n')
+    os.utime(str(metadata.join('entry_points.txt')), (1, 1))
+    assert cache.distributions_stamp(paths)[0] == [
+        str(site_packages), [['flake8_example-1.0.dist-info', 1]],
+    ]
+
+
+def test_entry_point_cache_round_trips(tmpdir):
+    """Verify that entry-points are reused until the stamp changes."""
+    entry_point_cache = cache.EntryPointCache(str(tmpdir))
+    stamp = [['/site-packages', [['example-1.0.dist-info', 1.0]]]]
+    entry_points = [['flake8.extension', 'X', 'example', ['X'], [], None]]
+    assert entry_point_cache.get(stamp) is None
+
+    entry_point_cache.set(stamp, entry_points)
+    assert entry_point_cache.get(stamp) == entry_points
+
+    stamp[0][1][0][1] = 2.0
+    assert entry_point_cache.get(stamp) is None
@@ -1,16 +1,24 @@
 """Tests for the Manager object for FileCheckers."""
 import errno
+import optparse
+import os
 
 import mock
 import pytest
 
 from flake8 import checker
+from flake8 import exceptions
 
 
 def style_guide_mock(**kwargs):
     """Create a mock StyleGuide object."""
     kwargs.setdefault('diff', False)
     kwargs.setdefault('jobs', '4')
+    kwargs.setdefault('benchmark', False)
+    kwargs.setdefault('profile_plugins', False)
+    kwargs.setdefault('respect_gitignore', False)
+    kwargs.setdefault('show_source', False)
+    kwargs.setdefault('_running_from_vcs', False)
     style_guide = mock.Mock()
     style_guide.options = mock.Mock(**kwargs)
     return style_guide
@@ -21,7 +29,7 @@ def test_oserrors_cause_serial_fall_back():
     err = OSError(errno.ENOSPC, 'Ominous message about spaceeeeee')
     style_guide = style_guide_mock()
     with mock.patch('_multiprocessing.SemLock', side_effect=err):
-        manager = checker.Manager(style_guide, [], [])
+        manager = checker.Manager(style_guide, [], mock.Mock())
     assert manager.using_multiprocessing is False
 
 
@@ -32,7 +40,17 @@ def test_oserrors_are_reraised(is_windows):
     style_guide = style_guide_mock()
     with mock.patch('_multiprocessing.SemLock', side_effect=err):
         with pytest.raises(OSError):
-            checker.Manager(style_guide, [], [])
+            checker.Manager(style_guide, [], mock.Mock())
+
+
+@mock.patch('flake8.utils.is_windows', return_value=False)
+def test_jobs_are_used_with_diff(is_windows):
+    """Verify that processing a diff does not force running in serial."""
+    style_guide = style_guide_mock(diff=True)
+    manager = checker.Manager(style_guide, ['file.py'], mock.Mock())
+    assert manager.jobs == 4
+    assert manager.using_multiprocessing is True
+    manager.pool.terminate()
 
 
 def test_multiprocessing_is_disabled():
@@ -43,24 +61,480 @@ def test_multiprocessing_is_disabled():
         assert manager.jobs == 0
 
 
-def test_make_checkers():
-    """Verify that we create a list of FileChecker instances."""
+def test_shared_pool_is_used_and_left_running():
+    """Verify that a pool we were given outlives checking the files."""
+    pool = mock.Mock(jobs=4, busy=False)
+    pool.check.return_value = []
+    manager = checker.Manager(style_guide_mock(), [], mock.Mock(),
+                              pool=pool)
+    assert manager.pool is pool
+    assert manager.owns_pool is False
+
+    manager.filenames = ['file.py']
+    with mock.patch.object(manager, '_estimate_costs',
+                           return_value={'file.py': 1.0}):
+        manager.run()
+
+    assert pool.check.called
+    assert not pool.close.called
+    assert not pool.terminate.called
+
+
+def test_shared_pool_is_terminated_when_interrupted():
+    """Verify that a pool we were given stops checking our files."""
+    pool = mock.Mock(jobs=4, busy=True)
+    pool.check.side_effect = KeyboardInterrupt
+    manager = checker.Manager(style_guide_mock(), [], mock.Mock(),
+                              pool=pool)
+    manager.filenames = ['file.py']
+    with mock.patch.object(manager, '_estimate_costs',
+                           return_value={'file.py': 1.0}):
+        with pytest.raises(exceptions.EarlyQuit):
+            manager.run()
+
+    pool.terminate.assert_called_once_with()
+
+
+def test_shared_pool_with_other_job_count_is_not_used():
+    """Verify that we start our own workers if the pool has too few."""
+    pool = mock.Mock(jobs=2)
     style_guide = style_guide_mock()
+    checks = mock.Mock()
+    with mock.patch('flake8.checker.WorkerPool') as WorkerPool:
+        manager = checker.Manager(style_guide, [], checks, pool=pool)
+
+    WorkerPool.assert_called_once_with(4, (
+        checks.to_dictionary.return_value, style_guide.options, manager.cache,
+    ))
+    assert manager.pool is WorkerPool.return_value
+    assert manager.owns_pool is True
+
+
+def test_worker_pool_starts_again_after_closing():
+    """Verify that a pool can be used again after it was closed."""
+    with checker.WorkerPool(2) as pool:
+        assert sorted(pool.imap_unordered(abs, [-1, 2])) == [1, 2]
+        pool.close()
+        assert pool.running is False
+        assert sorted(pool.imap_unordered(abs, [-3])) == [3]
+        assert pool.running is True
+        assert pool.busy is False
+    assert pool.running is False
+
+
+def test_worker_pool_starts_again_with_other_options():
+    """Verify that the workers are only started again when needed."""
+    options = optparse.Values({'max_line_length': 79})
+    with mock.patch('multiprocessing.Pool') as Pool:
+        pool = checker.WorkerPool(2, ({}, options, None))
+        list(pool.check([], {}, optparse.Values({'max_line_length': 79})))
+        assert Pool.call_count == 1
+
+        list(pool.check([], {}, optparse.Values({'max_line_length': 100})))
+        assert Pool.call_count == 2
+        Pool.assert_called_with(2, checker._pool_init, (
+            ({}, optparse.Values({'max_line_length': 100}), None),
+        ))
+
+
+def test_shared_pool_keeps_its_workers_for_other_reporting_options():
+    """Verify that only changing how results are reported reuses workers."""
+    def make_style_guide(**kwargs):
+        options = dict(
+            diff=False, jobs='2', benchmark=False, profile_plugins=False,
+            respect_gitignore=False, show_source=False, no_cache=True,
+            max_line_length=79, daemon=False, format='default',
+            _running_from_vcs=False,
+        )
+        options.update(kwargs)
+        return mock.Mock(options=optparse.Values(options))
+
+    def run_manager(style_guide, pool):
+        manager = checker.Manager(style_guide, [], checks, pool=pool)
+        manager.run()
+        return sorted(process.pid for process in pool._pool._pool)
+
+    checks = mock.Mock(**{'to_dictionary.return_value': {}})
+    first_manager = checker.Manager(make_style_guide(daemon=True), [],
+                                    checks)
+    pool = first_manager.pool
+    try:
+        pids = sorted(process.pid for process in pool._pool._pool)
+        with mock.patch.object(pool, 'close') as close:
+            assert run_manager(make_style_guide(), pool) == pids
+            assert run_manager(
+                make_style_guide(format='pylint', show_source=True), pool,
+            ) == pids
+        close.assert_not_called()
+    finally:
+        pool.terminate()
+
+
+def test_worker_pool_without_context_starts_when_first_used():
+    """Verify that a pool without a context starts its workers only once."""
+    options = optparse.Values({'select': ['E']})
+    with mock.patch('multiprocessing.Pool') as Pool:
+        pool = checker.WorkerPool(2)
+        assert pool.running is False
+        Pool.assert_not_called()
+
+        list(pool.check([], {}, options))
+        Pool.assert_called_once_with(2, checker._pool_init, (
+            ({}, options, None),
+        ))
+
+
+def test_workers_check_files_with_their_context():
+    """Verify that only the names of the files are sent to the workers."""
+    options = mock.Mock()
+    with mock.patch('signal.signal'):
+        checker._pool_init(({'checks': True}, options, None))
+    try:
+        with mock.patch('flake8.checker._run_checks') as _run_checks:
+            results = checker._run_checks_in_worker(['file.py'])
+    finally:
+        checker._worker_context = None
+
+    _run_checks.assert_called_once_with(
+        'file.py', {'checks': True}, options, None, {},
+    )
+    assert results == [('file.py', _run_checks.return_value)]
+
+
+def test_compact_results():
+    """Verify that lines from the file are sent as references."""
+    lines = ['x = 1  \n', 'y = """\n', '"""\n']
+    strings = {}
+    results = checker.compact_results([
+        ('W291', 1, 5, 'trailing whitespace', 'x = 1  \n'),
+        ('E501', 2, 80, 'line too long', 'y = """\n"""\n'),
+        ('E902', 0, 0, 'IOError', None),
+    ], lines, strings)
+    assert results == [
+        ('W291', 1, 5, 'trailing whitespace', None),
+        ('E501', 2, 80, 'line too long', 'y = """\n"""\n'),
+        ('E902', 0, 0, 'IOError', None),
+    ]
+
+    code = ''.join(['W', '291'])
+    other_results = checker.compact_results(
+        [(code, 1, 5, 'trailing whitespace', None)], lines, strings,
+    )
+    assert other_results[0][0] is results[0][0]
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_stored_results_resolve_physical_lines(tmpdir, stream):
+    """Verify that lines left out by the workers are read to show them."""
+    filename = tmpdir.join('t.py')
+    filename.write('import os\nx = 1  \n')
+    results = [('W291', 2, 5, 'trailing whitespace', None),
+               ('E501', 1, 80, 'line too long', 'from file\n')]
+    style_guide = style_guide_mock(show_source=True)
+    style_guide.processing_file = mock.MagicMock()
+    style_guide.handle_error.return_value = 1
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+    if stream:
+        manager.stream_results()
+    manager._store_results([
+        (str(filename), (str(filename), results, {}, {})),
+    ])
+    filename.remove()
+    manager.report()
+
+    physical_lines = [
+        call[1]['physical_line']
+        for call in style_guide.handle_error.call_args_list
+    ]
+    assert physical_lines == ['from file\n', 'x = 1  \n']
+
+
+@pytest.mark.parametrize('needs_physical_lines', [False, True])
+def test_stored_results_only_read_lines_when_needed(
+        tmpdir, needs_physical_lines):
+    """Verify that lines are not read unless something will show them."""
+    filename = str(tmpdir.join('t.py'))
+    results = [('W291', 2, 5, 'trailing whitespace', None)]
+    style_guide = style_guide_mock()
+    style_guide.formatter.needs_physical_lines = needs_physical_lines
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+
+    with mock.patch('flake8.processor.FileProcessor') as FileProcessor:
+        manager._store_results([(filename, (filename, results, {}, {}))])
+
+    assert FileProcessor.called is needs_physical_lines
+    if not needs_physical_lines:
+        assert manager.results == [(filename, results, {}, {})]
+
+
+def test_make_checkers():
+    """Verify that we only find the names of the files to check."""
+    style_guide = style_guide_mock(exclude=[], filename=['*.py'],
+                                   _running_from_vcs=False)
     files = ['file1', 'file2']
     checkplugins = mock.Mock()
-    checkplugins.to_dictionary.return_value = {
-        'ast_plugins': [],
-        'logical_line_plugins': [],
-        'physical_line_plugins': [],
-    }
     with mock.patch('flake8.checker.multiprocessing', None):
         manager = checker.Manager(style_guide, files, checkplugins)
 
-    with mock.patch('flake8.utils.filenames_from') as filenames_from:
-        filenames_from.side_effect = [['file1'], ['file2']]
-        with mock.patch('flake8.utils.fnmatch', return_value=True):
-            with mock.patch('flake8.processor.FileProcessor'):
-                manager.make_checkers()
+    with mock.patch('os.path.exists', return_value=True):
+        with mock.patch('flake8.processor.FileProcessor') as fp:
+            manager.make_checkers()
+
+    assert manager.filenames == files
+    fp.assert_not_called()
+
+
+def test_run_serial_skips_ignored_files():
+    """Verify that files ignored with ``flake8: noqa`` have no results."""
+    style_guide = style_guide_mock()
+    checkplugins = mock.Mock()
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], checkplugins)
+    manager.filenames = ['file2', 'ignored', 'file1']
+
+    def make_checker(filename, checks, options, cache):
+        file_checker = mock.Mock(display_name=filename,
+                                 results=[], statistics={},
+                                 noqa_line_mapping={})
+        file_checker.should_process = filename != 'ignored'
+        return file_checker
+
+    with mock.patch('flake8.checker.FileChecker', side_effect=make_checker):
+        manager.run_serial()
+
+    statistics = {'seconds elapsed': mock.ANY}
+    assert manager.results == [
+        ('file1', [], statistics, {}),
+        ('file2', [], statistics, {}),
+    ]
+
+
+@pytest.mark.parametrize('costs, num_jobs, expected_chunks', [
+    # A large file is checked on its own while the small ones are grouped
+    ({'a': 1, 'b': 100, 'c': 1, 'd': 1, 'e': 1}, 1,
+     [['b'], ['a', 'c'], ['d', 'e']]),
+    # Files are never grouped beyond calculate_pool_chunksize
+    (dict((str(i), 0) for i in range(8)), 2,
+     [['0', '1'], ['2', '3'], ['4', '5'], ['6', '7']]),
+    # Several large files are each sent first and separately
+    ({'a': 50, 'b': 1, 'c': 60, 'd': 1, 'e': 1, 'f': 1, 'g': 1, 'h': 1}, 1,
+     [['c'], ['a'], ['b', 'd', 'e', 'f'], ['g', 'h']]),
+])
+def test_schedule_chunks(costs, num_jobs, expected_chunks):
+    """Verify that we schedule the most expensive files first."""
+    filenames = sorted(costs)
+    assert checker.schedule_chunks(
+        filenames, costs, num_jobs,
+    ) == expected_chunks
+
+
+def test_estimate_costs_uses_previous_timings(tmpdir):
+    """Verify that timings from previous runs are preferred to sizes."""
+    style_guide = style_guide_mock()
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+    small = tmpdir.join('small.py')
+    small.write('x = 1\n' * 10)
+    large = tmpdir.join('large.py')
+    large.write('x = 1\n' * 20)
+    manager.filenames = [str(small), str(large)]
+    manager.cache = mock.Mock()
+    manager.cache.get_timings.return_value = {
+        str(small): (30, 2.0),
+    }
+
+    assert manager._estimate_costs() == {
+        str(small): 4.0,
+        str(large): pytest.approx(120 * 2.0 / 30),
+    }
+
+
+@pytest.mark.parametrize('completed, buffer_size, expected', [
+    # Files finishing early are held back until the earlier ones finish
+    ('cab', 5, 'abc'),
+    ('bca', 5, 'abc'),
+    # Too many files finished early so we stop waiting for "a"
+    ('bcda', 1, 'bcad'),
+    ('cbda', 2, 'bacd'),
+    ('dcba', 2, 'bacd'),
+])
+def test_reorder_results(completed, buffer_size, expected):
+    """Verify that we reorder results with a bounded buffer."""
+    reordered = checker.reorder_results(
+        ((filename, filename.upper()) for filename in completed),
+        sorted(completed),
+        buffer_size,
+    )
+    assert list(reordered) == [(filename, filename.upper())
+                               for filename in expected]
+
+
+def test_stream_results_reports_files_as_they_are_checked():
+    """Verify that streamed results are reported before we return."""
+    style_guide = mock.MagicMock(**{'options.jobs': 1})
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+    manager.filenames = ['file2', 'file1']
+    manager.stream_results()
+    results = {
+        'file1': ('file1', [('E111', 2, 1, 'text', None)], {}, {}),
+        'file2': ('file2', [('E112', 1, 1, 'text', None)], {}, {}),
+    }
+    reported = []
+
+    def run_checks(filename, checks, options, cache):
+        # Each file is reported before the next one is checked
+        assert reported == manager.filenames[:len(reported)]
+        assert filename not in reported
+        return results[filename]
+
+    def handle_results(filename, results, noqa_line_mapping):
+        reported.append(filename)
+        return len(results)
+
+    with mock.patch('flake8.checker._run_checks', side_effect=run_checks):
+        with mock.patch.object(manager, '_handle_results',
+                               side_effect=handle_results):
+            manager.run_serial()
+
+    assert reported == ['file2', 'file1']
+    assert manager.report() == (2, 2)
+    assert manager.results == [('file2', [], {}, None),
+                               ('file1', [], {}, None)]
+
+
+def run_serial_and_report(stream, buffer_size=None):
+    """Check three files in serial and return the order they are reported."""
+    style_guide = mock.MagicMock(**{'options.jobs': 1})
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+    manager.filenames = ['file2', 'file3', 'file1']
+    if stream:
+        manager.stream_results(buffer_size)
+    reported = []
+
+    def run_checks(filename, checks, options, cache):
+        return (filename, [('E111', 1, 1, 'text', None)], {}, {})
+
+    def handle_results(filename, results, noqa_line_mapping):
+        reported.append(filename)
+        return len(results)
+
+    with mock.patch('flake8.checker._run_checks', side_effect=run_checks):
+        with mock.patch.object(manager, '_handle_results',
+                               side_effect=handle_results):
+            manager.run_serial()
+            manager.report()
+    return reported
+
+
+@pytest.mark.parametrize('buffer_size', [0, 1, 10])
+def test_stream_buffer_reports_in_order_when_serial(buffer_size):
+    """Verify that streaming in serial keeps the order we report without."""
+    expected = run_serial_and_report(stream=False)
+    assert expected == ['file1', 'file2', 'file3']
+    assert run_serial_and_report(True, buffer_size) == expected
+
+
+def test_process_statistics_adds_up_timings():
+    """Verify that the time spent in each plugin is summed across files."""
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide_mock(), [], mock.Mock())
+    statistics = {'tokens': 1, 'logical lines': 1, 'physical lines': 1}
+    manager.results = [
+        ('file1', [], dict(statistics, plugins={
+            'F': ['ast', 0.5, 1], 'E1': ['physical line', 0.25, 2],
+        }, phases={'read': 0.5, 'tokenize': 1.0}), {}),
+        ('file2', [], dict(statistics, plugins={'F': ['ast', 1.0, 1]}), {}),
+        ('file3', [], statistics, {}),
+    ]
+
+    manager._process_statistics()
+
+    assert manager.plugin_statistics == {
+        'F': ['ast', 1.5, 2],
+        'E1': ['physical line', 0.25, 2],
+    }
+    assert manager.phase_statistics['read'] == 0.5
+    assert manager.phase_statistics['tokenize'] == 1.0
+    assert manager.statistics['files'] == 3
+
+
+def test_slowest_files():
+    """Verify that we find the files which took the longest to check."""
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide_mock(), [], mock.Mock())
+    manager.results = [
+        ('fast.py', [], {'seconds elapsed': 0.5}, {}),
+        ('slowest.py', [], {'seconds elapsed': 3.0}, {}),
+        ('untimed.py', [], {}, {}),
+        ('slow.py', [], {'seconds elapsed': 1.0}, {}),
+    ]
+
+    assert [filename for filename, _ in manager.slowest_files(2)] == [
+        'slowest.py', 'slow.py',
+    ]
+
+
+def test_make_checkers_walks_directories(tmpdir):
+    """Verify that we find the files matching our patterns when walking."""
+    tmpdir.join('a.py').ensure()
+    tmpdir.join('a.pyc').ensure()
+    tmpdir.join('sub', 'b.py').ensure()
+    tmpdir.join('sub', 'skip.py').ensure()
+    tmpdir.join('excluded', 'c.py').ensure()
+    style_guide = style_guide_mock(
+        exclude=['skip.py', str(tmpdir.join('excluded'))],
+        filename=['*.py'],
+        _running_from_vcs=False,
+    )
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+
+    with tmpdir.as_cwd():
+        manager.make_checkers(['.', 'a.pyc', 'sub/skip.py'])
+
+    assert sorted(manager.filenames) == [
+        os.path.join('.', 'a.py'), os.path.join('.', 'sub', 'b.py'), 'a.pyc',
+    ]
+
+
+def test_make_checkers_skips_what_git_ignores(tmpdir):
+    """Verify that git's ignored paths are pruned but explicit files kept."""
+    tmpdir.join('a.py').ensure()
+    tmpdir.join('build', 'b.py').ensure()
+    tmpdir.join('sub', 'generated.py').ensure()
+    style_guide = style_guide_mock(exclude=[], filename=['*.py'],
+                                   _running_from_vcs=False,
+                                   respect_gitignore=True)
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+
+    ignored = {
+        str(tmpdir.join('build')), str(tmpdir.join('sub', 'generated.py')),
+    }
+    with tmpdir.as_cwd():
+        with mock.patch('flake8.utils.git_ignored_paths',
+                        return_value=ignored) as git_ignored_paths:
+            manager.make_checkers(['.', 'build/b.py'])
+
+    git_ignored_paths.assert_called_once_with('.')
+    assert manager.filenames == [os.path.join('.', 'a.py'), 'build/b.py']
+
+
+def test_make_checkers_outside_a_git_work_tree(tmpdir):
+    """Verify that nothing is ignored when git can not tell us anything."""
+    tmpdir.join('a.py').ensure()
+    style_guide = style_guide_mock(exclude=[], filename=['*.py'],
+                                   _running_from_vcs=False,
+                                   respect_gitignore=True)
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+
+    with tmpdir.as_cwd():
+        with mock.patch('flake8.utils.git_ignored_paths', return_value=None):
+            manager.make_checkers(['.'])
 
-    for file_checker in manager.checkers:
-        assert file_checker.filename in files
+    assert manager.filenames == [os.path.join('.', 'a.py')]
@@ -0,0 +1,88 @@
+"""Tests for the thin client of the Flake8 daemon."""
+import os
+import socket
+
+import mock
+import pytest
+
+from flake8.main import client
+
+
+def test_default_socket_path_depends_on_the_directory():
+    """Verify each directory is served by a different daemon."""
+    with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': 'runtime'}):
+        first = client.default_socket_path('/project/one')
+        assert first == client.default_socket_path('/project/one')
+        assert first != client.default_socket_path('/project/two')
+    assert os.path.dirname(first) == 'runtime'
+
+
+@pytest.mark.parametrize('argv, expected', [
+    (['file.py'], None),
+    (['--daemon-socket=/tmp/f.sock', 'file.py'], '/tmp/f.sock'),
+    (['--daemon-socket', '/tmp/f.sock', 'file.py'], '/tmp/f.sock'),
+    (['--daemon-socket'], None),
+])
+def test_socket_path_from(argv, expected):
+    """Verify we find the socket the user asked for."""
+    assert client.socket_path_from(argv) == expected
+
+
+@pytest.mark.skipif(not hasattr(socket, 'socketpair'),
+                    reason='socket.socketpair is unavailable')
+def test_messages_round_trip():
+    """Verify that a sent message is received intact."""
+    sender, receiver = socket.socketpair()
+    message = {'argv': ['-'], 'stdin': u'import os\n'}
+    try:
+        client.send_message(sender, message)
+        assert client.receive_message(receiver) == message
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_run_with_daemon_returns_none_without_a_daemon(tmpdir):
+    """Verify that we do not fail when no daemon is listening."""
+    socket_path = str(tmpdir.join('missing.sock'))
+    assert client.run_with_daemon(['file.py'], socket_path) is None
+
+
+def test_run_with_daemon_returns_none_for_errors():
+    """Verify that requests the daemon refused are run locally."""
+    with mock.patch.object(client, 'request',
+                           return_value={'error': 'wrong directory'}):
+        assert client.run_with_daemon(['file.py'], 'daemon.sock') is None
+
+
+def test_run_with_daemon_retries_after_a_restart():
+    """Verify that we resend the request once the daemon restarted."""
+    response = {'status': 0, 'stdout': '', 'stderr': ''}
+    with mock.patch.object(client, 'request',
+                           side_effect=[{'restarting': True}, response]):
+        with mock.patch.object(client, 'wait_for_daemon',
+                               return_value=True) as wait_for_daemon:
+            assert client.run_with_daemon(['file.py'],
+                                          'daemon.sock') == response
+
+    wait_for_daemon.assert_called_once_with('daemon.sock')
+
+
+def test_main_falls_back_to_running_locally():
+    """Verify that we run Flake8 ourselves when there is no daemon."""
+    with mock.patch.object(client, 'run_with_daemon', return_value=None):
+        with mock.patch('flake8.main.cli.main') as main:
+            client.main(['file.py'])
+
+    main.assert_called_once_with(['file.py'])
+
+
+def test_main_exits_with_the_daemon_status(capsys):
+    """Verify that we reproduce the output of the daemon."""
+    response = {'status': 1, 'stdout': 'file.py:1:1: F401\n', 'stderr': ''}
+    with mock.patch.object(client, 'run_with_daemon', return_value=response):
+        with pytest.raises(SystemExit) as excinfo:
+            client.main(['file.py'])
+
+    assert excinfo.value.code == 1
+    assert capsys.readouterr()[0] == 'file.py:1:1: F401\n'
@@ -0,0 +1,127 @@
+"""Tests for the Flake8 daemon."""
+from __future__ import print_function
+
+import optparse
+import os
+import sys
+
+import mock
+import pytest
+
+from flake8 import utils
+from flake8.main import daemon
+
+
+class FakeApplication(object):
+    """Application recording how it was run."""
+
+    program = 'flake8'
+    version = '0.0.0'
+
+    def __init__(self, program, version):
+        """Initialize the fake application."""
+        self.local_plugins = None
+        self.check_plugins = None
+        self.listening_plugins = None
+        self.formatting_plugins = None
+        self.argv = None
+        self.stdin = None
+
+    def run(self):
+        """Pretend to run Flake8."""
+        self.argv = sys.argv[1:]
+        if utils.is_using_stdin(self.argv):
+            self.stdin = utils.stdin_get_value()
+        print('file.py:1:1: F401')
+        print('warning', file=sys.stderr)
+
+    def exit(self):
+        """Pretend to have found violations."""
+        raise SystemExit(True)
+
+
+def make_daemon(tmpdir, watched_paths=()):
+    """Create a daemon for the fake application in a temporary directory."""
+    application = FakeApplication('flake8', '0.0.0')
+    application.config_finder = mock.Mock(project_filenames=())
+    application.config_finder.user_config_file.return_value = str(
+        tmpdir.join('user-config')
+    )
+    application.config_finder.extra_config_files = list(watched_paths)
+    application.prelim_opts = optparse.Values({'config': None})
+    application.check_plugins = mock.Mock(plugins={})
+    application.formatting_plugins = mock.Mock(plugins={})
+    return daemon.Daemon(application, ['--daemon'],
+                         str(tmpdir.join('daemon.sock')))
+
+
+def test_run_captures_output_and_status(tmpdir):
+    """Verify that the output and the exit status are sent back."""
+    flake8_daemon = make_daemon(tmpdir)
+    response = flake8_daemon.run({
+        'argv': ['-'], 'cwd': flake8_daemon.directory, 'stdin': 'x = 1\n',
+    })
+
+    assert response == {
+        'status': 1,
+        'stdout': 'file.py:1:1: F401\n',
+        'stderr': 'warning\n',
+    }
+    assert getattr(utils.stdin_get_value, 'cached_stdin', None) is None
+
+
+def test_run_provides_stdin_and_arguments(tmpdir):
+    """Verify the application sees the client's arguments and stdin."""
+    flake8_daemon = make_daemon(tmpdir)
+    application = FakeApplication('flake8', '0.0.0')
+    with mock.patch.object(flake8_daemon, 'make_application',
+                           return_value=application):
+        flake8_daemon.run({
+            'argv': ['--select', 'F', '-'],
+            'cwd': flake8_daemon.directory,
+            'stdin': 'x = 1\n',
+        })
+
+    assert application.argv == ['--select', 'F', '-']
+    assert application.stdin == 'x = 1\n'
+
+
+@pytest.mark.parametrize('message', [
+    {'cwd': 'somewhere'},
+    {'argv': ['file.py'], 'cwd': os.path.join('some', 'other', 'project')},
+    {'argv': ['--daemon']},
+    {'argv': ['--watch', 'file.py']},
+    {'argv': ['--install-hook', 'git']},
+    {'argv': ['--install-hook=git']},
+])
+def test_run_refuses_requests_it_can_not_handle(tmpdir, message):
+    """Verify that we refuse requests the client must run itself."""
+    flake8_daemon = make_daemon(tmpdir)
+    message.setdefault('cwd', flake8_daemon.directory)
+
+    assert 'error' in flake8_daemon.run(message)
+
+
+def test_needs_restart_when_watched_files_change(tmpdir):
+    """Verify that creating a config file restarts the daemon."""
+    config_file = tmpdir.join('setup.cfg')
+    flake8_daemon = make_daemon(tmpdir, [str(config_file)])
+    flake8_daemon.stamp = flake8_daemon.current_stamp()
+    assert flake8_daemon.needs_restart() is False
+
+    config_file.write('[flake8]\n')
+    assert flake8_daemon.needs_restart() is True
+
+
+def test_handle_asks_the_client_to_retry_before_restarting(tmpdir):
+    """Verify that the client is told to wait for the new daemon."""
+    flake8_daemon = make_daemon(tmpdir)
+    connection = mock.Mock()
+    with mock.patch('flake8.main.client.receive_message',
+                    return_value={'argv': []}):
+        with mock.patch('flake8.main.client.send_message') as send_message:
+            with mock.patch.object(flake8_daemon, 'needs_restart',
+                                   return_value=True):
+                assert flake8_daemon.handle(connection) is True
+
+    send_message.assert_called_once_with(connection, {'restarting': True})
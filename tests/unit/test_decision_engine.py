@@ -181,3 +181,42 @@ def test_more_specific_decision_for_logic(select, ignore, extend_select,
     )
 
     assert decider.more_specific_decision_for(error_code) is expected
+
+
+@pytest.mark.parametrize('select,ignore,extend_select,code,expected', [
+    (['E', 'E1', 'E12'], ['E121'], [], 'E121', ('E12', None, 'E121')),
+    (['E', 'E1', 'E12'], ['E2'], [], 'E131', ('E1', None, None)),
+    ([], ['E2', 'E'], ['E2', 'E21'], 'E211', (None, 'E21', 'E2')),
+    (['W'], ['E'], ['I'], 'F401', (None, None, None)),
+])
+def test_find_matches(select, ignore, extend_select, code, expected):
+    """Verify we find the most specific entry from each list."""
+    decider = style_guide.DecisionEngine(
+        create_options(select=select, ignore=ignore,
+                       extended_default_select=extend_select),
+    )
+
+    assert decider.find_matches(code) == expected
+
+
+@pytest.mark.parametrize('select,ignore,extend_select,prefix,expected', [
+    (defaults.SELECT, defaults.IGNORE, ['B'], 'B', False),
+    (['E', 'W'], defaults.IGNORE, ['B'], 'B', True),
+    (defaults.SELECT, ['B'], ['B'], 'B', True),
+    (defaults.SELECT, ['B'], ['B'], 'E', False),
+    (['E', 'W', 'B901'], defaults.IGNORE, ['B'], 'B', False),
+    (['E', 'W', 'B901'], defaults.IGNORE, ['B9'], 'B', False),
+    (['E', 'W'], ['C'], ['C90'], 'C90', True),
+    (['E'], ['E1', 'E2', 'E3'], [], 'E', False),
+    (['E1', 'E2'], ['E'], [], 'E3', True),
+    (['E1', 'E2'], ['E'], [], 'E2', False),
+    (['E1', 'E21'], ['E2'], [], 'E2', False),
+])
+def test_is_prefix_ignored(select, ignore, extend_select, prefix, expected):
+    """Verify we know when no code with a prefix can be selected."""
+    decider = style_guide.DecisionEngine(
+        create_options(select=select, ignore=ignore,
+                       extended_default_select=extend_select),
+    )
+
+    assert decider.is_prefix_ignored(prefix) is expected
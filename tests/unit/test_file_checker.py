@@ -1,7 +1,13 @@
 """Unit tests for the FileChecker class."""
+import collections
+import itertools
+
 import mock
+import pytest
 
 from flake8 import checker
+from flake8 import defaults
+from flake8 import exceptions
 
 
 @mock.patch('flake8.processor.FileProcessor')
@@ -32,3 +38,282 @@ def test_repr(*args):
         'example.py', checks={}, options=object(),
     )
     assert repr(file_checker) == 'FileChecker for example.py'
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_run_checks_uses_cached_results(FileProcessor):
+    """Verify that cached results are used instead of running checks."""
+    FileProcessor.return_value = mock.Mock(lines=['x = 1\n'],
+                                           filename='example.py')
+    results = [('E501', 1, 80, 'line too long', 'x = 1\n')]
+    statistics = {'tokens': 4, 'logical lines': 1, 'physical lines': 1}
+    result_cache = mock.Mock()
+    noqa_line_mapping = {1: None}
+    result_cache.get.return_value = (results, statistics, noqa_line_mapping)
+    file_checker = checker.FileChecker(
+        'example.py', checks={}, options=object(), cache=result_cache,
+    )
+
+    with mock.patch.object(file_checker, 'process_tokens') as process_tokens:
+        assert file_checker.run_checks() == ('example.py', results, statistics)
+
+    process_tokens.assert_not_called()
+    result_cache.get.assert_called_once_with(
+        result_cache.key_for.return_value
+    )
+    result_cache.key_for.assert_called_once_with('example.py', ['x = 1\n'])
+    assert statistics['cached files'] == 1
+    assert file_checker.noqa_line_mapping == noqa_line_mapping
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_run_checks_stores_results_on_cache_miss(FileProcessor):
+    """Verify that results are stored in the cache after running checks."""
+    FileProcessor.return_value = mock.Mock(
+        lines=['x = 1\n'], filename='example.py',
+        statistics={'logical lines': 1},
+    )
+    result_cache = mock.Mock()
+    result_cache.get.return_value = None
+    file_checker = checker.FileChecker(
+        'example.py', checks={}, options=object(), cache=result_cache,
+    )
+
+    with mock.patch.object(file_checker, 'process_tokens'):
+        with mock.patch.object(file_checker, 'run_ast_checks'):
+            file_checker.run_checks()
+
+    result_cache.set.assert_called_once_with(
+        result_cache.key_for.return_value,
+        file_checker.results,
+        file_checker.statistics,
+        FileProcessor.return_value.noqa_line_mapping.return_value,
+    )
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_run_physical_checks_records_plugin_timings(FileProcessor):
+    """Verify that we time each plugin when profiling plugins."""
+    FileProcessor.return_value = mock.Mock(lines=['x = 1\n'], line_number=1)
+    plugin = {'name': 'E1', 'parameters': {'physical_line': True},
+              'plugin': mock.Mock(return_value=None)}
+    file_checker = checker.FileChecker(
+        'example.py', checks={'physical_line_plugins': [plugin]},
+        options=object(),
+    )
+
+    file_checker.run_physical_checks('x = 1\n')
+    assert file_checker.plugin_timings is None
+
+    file_checker.plugin_timings = {}
+    file_checker.run_physical_checks('x = 1\n')
+    file_checker.run_physical_checks('x = 1\n')
+    assert file_checker.plugin_timings == {
+        'E1': ['physical line', mock.ANY, 2],
+    }
+    assert plugin['plugin'].call_count == 3
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_run_checks_records_phase_timings(FileProcessor):
+    """Verify that the checks are not counted as tokenizing or parsing."""
+    processor = mock.Mock(lines=['x = 1\n'], statistics={'logical lines': 1})
+    FileProcessor.return_value = processor
+    file_checker = checker.FileChecker(
+        'example.py', checks={}, options=object(),
+    )
+    file_checker.phase_timings = dict.fromkeys(
+        (phase for phase, _ in defaults.PHASES), 0.0
+    )
+
+    def process_tokens():
+        file_checker.run_physical_checks('x = 1\n')
+        file_checker.run_logical_checks()
+
+    def run_ast_checks():
+        processor.build_ast()
+
+    with mock.patch.object(file_checker, 'process_tokens',
+                           side_effect=process_tokens), \
+            mock.patch.object(file_checker, 'run_physical_checks'), \
+            mock.patch.object(file_checker, 'run_physical_lines_checks'), \
+            mock.patch.object(file_checker, 'run_logical_checks'), \
+            mock.patch.object(file_checker, 'run_logical_lines_checks'), \
+            mock.patch.object(file_checker, 'run_ast_checks',
+                              side_effect=run_ast_checks), \
+            mock.patch('timeit.default_timer',
+                       side_effect=itertools.count()):
+        file_checker.run_checks()
+
+    assert file_checker.phase_timings == {
+        'read': 0,
+        'tokenize': 3,
+        'physical line checks': 2,
+        'logical line checks': 2,
+        'ast build': 1,
+        'ast checks': 2,
+    }
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_run_physical_lines_checks_reports_each_error(FileProcessor):
+    """Verify that batched plugins are given every line at once."""
+    lines = ['x = 1 \n', 'y = 2\n', '\t\n']
+    FileProcessor.return_value = mock.Mock(
+        lines=lines, line_for=lambda line_number: lines[line_number - 1],
+    )
+    plugin = {'name': 'W2', 'parameters': {'physical_lines': True},
+              'plugin': mock.Mock(return_value=iter([
+                  (1, 5, 'W291 trailing whitespace'),
+                  (3, 0, 'W293 blank line contains whitespace'),
+              ]))}
+    file_checker = checker.FileChecker(
+        'example.py', checks={'physical_lines_plugins': [plugin]},
+        options=object(),
+    )
+    file_checker.plugin_timings = {}
+
+    file_checker.run_physical_lines_checks()
+
+    plugin['plugin'].assert_called_once_with(physical_lines=lines)
+    assert file_checker.results == [
+        ('W291', 1, 5, 'trailing whitespace', 'x = 1 \n'),
+        ('W293', 3, 0, 'blank line contains whitespace', '\t\n'),
+    ]
+    assert file_checker.plugin_timings == {
+        'W2': ['physical lines', mock.ANY, 1],
+    }
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_run_physical_lines_checks_without_plugins(FileProcessor):
+    """Verify that files are not checked without batched plugins."""
+    FileProcessor.return_value = mock.Mock(lines=['x = 1\n'])
+    file_checker = checker.FileChecker(
+        'example.py', checks={'physical_line_plugins': []},
+        options=object(),
+    )
+
+    file_checker.run_physical_lines_checks()
+
+    assert file_checker.results == []
+    assert file_checker.bound_plugins == {}
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_run_logical_lines_checks_reports_each_error(FileProcessor):
+    """Verify that batched plugins are given every logical line at once."""
+    lines = ['x = [1 ]\n', 'y = (\n', '    2 )\n']
+    logical_lines = [
+        mock.Mock(mapping=[(0, (1, 0)), (4, (1, 5)), (7, (1, 8))]),
+        mock.Mock(mapping=[(0, (2, 0)), (5, (3, 5)), (7, (3, 7))]),
+    ]
+    FileProcessor.return_value = mock.Mock(
+        lines=lines, logical_lines=logical_lines,
+        line_for=lambda line_number: lines[line_number - 1],
+    )
+    plugin = {'name': 'E2', 'parameters': {'logical_lines': True},
+              'plugin': mock.Mock(return_value=iter([
+                  (logical_lines[0], 5, "E202 whitespace before ']'"),
+                  (logical_lines[1], (3, 5), "E202 whitespace before ')'"),
+              ]))}
+    file_checker = checker.FileChecker(
+        'example.py', checks={'logical_lines_plugins': [plugin]},
+        options=object(),
+    )
+    file_checker.plugin_timings = {}
+
+    file_checker.run_logical_lines_checks()
+
+    plugin['plugin'].assert_called_once_with(logical_lines=logical_lines)
+    assert file_checker.results == [
+        ('E202', 1, 6, "whitespace before ']'", 'x = [1 ]\n'),
+        ('E202', 3, 5, "whitespace before ')'", '    2 )\n'),
+    ]
+    assert file_checker.plugin_timings == {
+        'E2': ['logical lines', mock.ANY, 1],
+    }
+
+
+def make_plugin(parameters, name='P1', return_value=None):
+    """Create a plugin taking the parameters in order."""
+    return {'name': name, 'parameters': parameters,
+            'plugin': mock.Mock(return_value=return_value)}
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_bind_plugin_fetches_only_requested_attributes(FileProcessor):
+    """Verify that a bound plugin is given what it asks for."""
+    processor = mock.Mock(lines=[], indent_level=4, noqa=False)
+    FileProcessor.return_value = processor
+    file_checker = checker.FileChecker('example.py', checks={},
+                                       options=object())
+    plugin = make_plugin(collections.OrderedDict([
+        ('logical_line', True), ('indent_level', True), ('noqa', False),
+    ]), return_value=[(0, 'P101 message')])
+
+    run_plugin = file_checker.bind_plugin(plugin, 'logical_line')
+    assert run_plugin('x = 1') == [(0, 'P101 message')]
+    processor.indent_level = 8
+    run_plugin('y = 2')
+
+    assert plugin['plugin'].call_args_list == [
+        mock.call(logical_line='x = 1', indent_level=4, noqa=False),
+        mock.call(logical_line='y = 2', indent_level=8, noqa=False),
+    ]
+    processor.update_checker_state_for.assert_not_called()
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_bind_plugin_updates_the_checker_state(FileProcessor):
+    """Verify that plugins using checker_state get their own state."""
+    processor = mock.Mock(lines=[])
+    FileProcessor.return_value = processor
+    file_checker = checker.FileChecker('example.py', checks={},
+                                       options=object())
+    plugin = make_plugin(collections.OrderedDict([
+        ('physical_line', True), ('checker_state', True),
+    ]))
+
+    file_checker.bind_plugin(plugin, 'physical_line')('x = 1\n')
+
+    processor.update_checker_state_for.assert_called_once_with(plugin)
+    plugin['plugin'].assert_called_once_with(
+        physical_line='x = 1\n', checker_state=processor.checker_state,
+    )
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_bind_plugin_with_unknown_parameters(FileProcessor):
+    """Verify that unknown parameters are handled like run_check does."""
+    processor = mock.Mock(spec=['filename', 'lines', 'should_ignore_file',
+                                'keyword_arguments_for'], lines=[])
+    processor.keyword_arguments_for.side_effect = AttributeError('unknown')
+    FileProcessor.return_value = processor
+    file_checker = checker.FileChecker('example.py', checks={},
+                                       options=object())
+    plugin = make_plugin(collections.OrderedDict([
+        ('tree', True), ('unknown', True),
+    ]))
+
+    with pytest.raises(exceptions.PluginRequestedUnknownParameters):
+        file_checker.bind_plugin(plugin, 'tree')(None)
+    plugin['plugin'].assert_not_called()
+
+
+@mock.patch('flake8.processor.FileProcessor')
+def test_bind_plugins_binds_each_plugin_once(FileProcessor):
+    """Verify that plugins are bound once per file."""
+    FileProcessor.return_value = mock.Mock(lines=[])
+    plugins = [make_plugin({'physical_line': True}, name)
+               for name in ('P1', 'P2')]
+    file_checker = checker.FileChecker(
+        'example.py', checks={'physical_line_plugins': plugins},
+        options=object(),
+    )
+
+    bound = file_checker.bind_plugins('physical_line_plugins',
+                                      'physical_line')
+    assert [plugin for plugin, _ in bound] == plugins
+    assert file_checker.bind_plugins('physical_line_plugins',
+                                     'physical_line') is bound
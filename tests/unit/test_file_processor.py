@@ -3,6 +3,7 @@ import ast
 import optparse
 import tokenize
 
+from flake8 import exceptions
 from flake8 import processor
 
 import mock
@@ -190,6 +191,124 @@ def test_split_line(unsplit_line, expected_lines):
     assert len(actual_lines) == file_processor.line_number
 
 
+def test_file_tokens_reuses_generated_tokens():
+    """Verify that the file is only tokenized once."""
+    file_processor = processor.FileProcessor('-', options_from(), lines=[
+        'a = 1\n',
+        'b = """\n',
+        'c"""\n',
+    ])
+
+    with mock.patch('tokenize.generate_tokens',
+                    wraps=tokenize.generate_tokens) as generate_tokens:
+        generated = list(file_processor.generate_tokens())
+        file_tokens = file_processor.file_tokens
+
+    assert generate_tokens.call_count == 1
+    assert file_tokens[:len(generated)] == generated
+
+
+def test_generate_tokens_after_file_tokens_tracks_line_numbers():
+    """Verify replayed tokens advance the line number like the tokenizer."""
+    lines = ['a = 1\n', 'if a:\n', '\tb = 2\n']
+    expected = processor.FileProcessor('-', options_from(), lines=lines[:])
+    expected_states = [
+        (token, expected.line_number, expected.indent_char)
+        for token in expected.generate_tokens()
+    ]
+
+    file_processor = processor.FileProcessor('-', options_from(), lines=lines)
+    assert file_processor.file_tokens
+    assert file_processor.line_number == 0
+    assert file_processor.indent_char is None
+    states = [
+        (token, file_processor.line_number, file_processor.indent_char)
+        for token in file_processor.generate_tokens()
+    ]
+
+    assert states == expected_states
+
+
+def test_file_tokens_raises_invalid_syntax():
+    """Verify tokenizer errors are reported consistently."""
+    file_processor = processor.FileProcessor('-', options_from(), lines=[
+        'a = (\n',
+    ])
+
+    with pytest.raises(exceptions.InvalidSyntax):
+        file_processor.file_tokens
+    with pytest.raises(exceptions.InvalidSyntax):
+        list(file_processor.generate_tokens())
+
+
+def test_noqa_line_mapping():
+    """Verify that we map lines to the codes ignored by ``# noqa``."""
+    file_processor = processor.FileProcessor('-', options_from(), lines=[
+        'import os  # noqa\n',
+        'x = "# noqa"\n',
+        'y = """\n',
+        'long string\n',
+        '"""  # noqa: E501,W291\n',
+        'z = 1  # NOQA: E225\n',
+    ])
+
+    assert file_processor.noqa_line_mapping() == {
+        1: None,
+        3: ('E501', 'W291'),
+        4: ('E501', 'W291'),
+        5: ('E501', 'W291'),
+        6: ('E225',),
+    }
+
+
+def test_noqa_line_mapping_inside_docstrings():
+    """Verify that ``# noqa`` in a docstring ignores codes on its line."""
+    file_processor = processor.FileProcessor('-', options_from(), lines=[
+        'def f():\n',
+        '    """Read the documentation.\n',
+        '\n',
+        '    https://example.com/a/very/long/url  # noqa\n',
+        '    https://example.com/another/url  # noqa: E501\n',
+        '    """\n',
+        'x = """\n',
+        'text  # noqa: W291\n',
+        '"""  # noqa: E501\n',
+    ])
+
+    assert file_processor.noqa_line_mapping() == {
+        4: None,
+        5: ('E501',),
+        7: ('E501',),
+        8: ('W291',),
+        9: ('E501',),
+    }
+
+
+def test_noqa_line_mapping_with_invalid_syntax():
+    """Verify that we search each line if the file can not be tokenized."""
+    file_processor = processor.FileProcessor('-', options_from(), lines=[
+        'a = (  # noqa: E201\n',
+        'b = 1\n',
+    ])
+
+    assert file_processor.noqa_line_mapping() == {1: ('E201',)}
+
+
+def test_multiline_string_ranges():
+    """Verify that we record where each multi-line string starts and ends."""
+    file_processor = processor.FileProcessor('-', options_from(), lines=[
+        'x = """\n',
+        'first\n',
+        '"""\n',
+        'y = "short"\n',
+        "z = '''second\n",
+        "'''\n",
+    ])
+    file_processor.file_tokens
+
+    assert file_processor.multiline_string_ranges == [(1, 3), (5, 6)]
+
+
 def test_build_ast():
     """Verify the logic for how we build an AST for plugins."""
     file_processor = processor.FileProcessor('-', options_from(), lines=[
@@ -198,6 +317,33 @@ def test_build_ast():
 
     module = file_processor.build_ast()
     assert isinstance(module, ast.Module)
+    assert file_processor.build_ast() is module
+
+
+def test_ast_context():
+    """Verify that the tree is analyzed once for every plugin."""
+    file_processor = processor.FileProcessor('-', options_from(), lines=[
+        'import os\n',
+        'def f(x):\n',
+        '    return os.path.join(x, str(x))\n',
+    ])
+
+    context = file_processor.ast_context
+    assert file_processor.ast_context is context
+    assert context.tree is file_processor.build_ast()
+    assert context.nodes == list(ast.walk(context.tree))
+
+    outer_call, inner_call = context.nodes_of_type(ast.Call)
+    assert inner_call.func.id == 'str'
+    assert [type(node) for node in context.ancestors_of(inner_call)] == [
+        ast.Call, ast.Return, ast.FunctionDef, ast.Module,
+    ]
+    assert context.parent_of(inner_call) is outer_call
+    assert context.parent_of(context.tree) is None
+    assert [type(node) for node in context.nodes_of_type(ast.stmt)] == [
+        ast.Import, ast.FunctionDef, ast.Return,
+    ]
+    assert context.nodes_of_type(ast.ClassDef) == []
 
 
 def test_next_logical_line_updates_the_previous_logical_line():
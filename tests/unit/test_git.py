@@ -2,6 +2,7 @@
 import mock
 import pytest
 
+from flake8 import checker
 from flake8.main import git
 
 
@@ -27,3 +28,33 @@ def test_find_modified_files(lazy):
         git.find_modified_files(lazy)
 
     piped_process.assert_called_once_with(call)
+
+
+def test_update_paths_keeps_the_staged_physical_lines(tmpdir):
+    """Verify that we report the lines that were staged, not the work tree."""
+    tmpdir.join('t.py').write('x = 1\n')
+    tempdir = tmpdir.mkdir('staged')
+    staged_file = tempdir.join('t.py')
+    staged_file.write('x = 1  \n')
+    style_guide = mock.Mock()
+    style_guide.options.show_source = False
+    style_guide.options._running_from_vcs = True
+    style_guide.formatter.needs_physical_lines = False
+    style_guide.processing_file = mock.MagicMock()
+    style_guide.handle_error.return_value = 1
+    with mock.patch('flake8.checker.multiprocessing', None):
+        manager = checker.Manager(style_guide, [], mock.Mock())
+    # The workers leave out the physical lines which are in the file
+    results = [('W291', 1, 6, 'trailing whitespace', None)]
+    manager._store_results([
+        (str(staged_file), (str(staged_file), results, {}, {})),
+    ])
+    tempdir.remove()
+
+    with tmpdir.as_cwd():
+        git.update_paths(manager, str(tempdir))
+        manager.report()
+
+    _, kwargs = style_guide.handle_error.call_args
+    assert not kwargs['filename'].startswith(str(tempdir))
+    assert kwargs['physical_line'] == 'x = 1  \n'
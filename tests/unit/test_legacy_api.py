@@ -28,6 +28,20 @@ def test_get_style_guide():
     assert isinstance(style_guide, api.StyleGuide)
 
 
+def test_get_style_guide_with_pool():
+    """Verify that a pool is given to the Application, not the options."""
+    mockedapp = mock.Mock(worker_pool=None)
+    mockedapp.prelim_opts.verbose = 0
+    mockedapp.prelim_opts.output_file = None
+    pool = mock.Mock()
+    with mock.patch('flake8.main.application.Application') as Application:
+        Application.return_value = mockedapp
+        api.get_style_guide(pool=pool)
+
+    assert mockedapp.worker_pool is pool
+    assert mockedapp.options.pool is not pool
+
+
 def test_styleguide_options():
     """Show tha we proxy the StyleGuide.options attribute."""
     app = mock.Mock()
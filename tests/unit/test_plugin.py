@@ -187,3 +187,18 @@ def test_enable_without_providing_parsed_options():
     plugin.enable(optmanager)
 
     optmanager.remove_from_default_ignore.assert_called_once_with(['U4'])
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('X', 'X'),
+    ('X10', 'X10'),
+    ('ABC123', 'ABC123'),
+    ('pycodestyle.break_around_binary_operator', None),
+    ('default', None),
+    ('X1000', None),
+])
+def test_code_prefix(name, expected):
+    """Verify we only trust entry-point names which look like codes."""
+    plugin = manager.Plugin(name, mock.Mock(spec=[]))
+
+    assert plugin.code_prefix == expected
@@ -1,5 +1,6 @@
 """Tests for flake8.plugins.manager.PluginManager."""
 import mock
+import pytest
 
 from flake8.plugins import manager
 
@@ -60,3 +61,98 @@ def test_local_plugins(iter_entry_points):
     )
 
     assert plugin_mgr.plugins['X'].entry_point.module_name == 'path.to'
+
+
+@mock.patch('pkg_resources.iter_entry_points')
+def test_without_leaves_out_plugins(iter_entry_points):
+    """Verify we can leave some plugins out without changing the original."""
+    iter_entry_points.return_value = [
+        create_entry_point_mock('T100'),
+        create_entry_point_mock('T200'),
+    ]
+    plugin_mgr = manager.PluginManager(namespace='testing.pkg_resources')
+    fewer_plugins = plugin_mgr.without(['T100'])
+
+    assert fewer_plugins.names == ['T200']
+    assert list(fewer_plugins.plugins) == ['T200']
+    assert fewer_plugins.plugins['T200'] is plugin_mgr.plugins['T200']
+    assert plugin_mgr.names == ['T100', 'T200']
+
+
+@pytest.mark.parametrize('text, module_name, attrs, extras', [
+    ('X = path.to:Plugin', 'path.to', ('Plugin',), ()),
+    ('X=path.to', 'path.to', (), ()),
+    ('X = path.to:Outer.Plugin [one, two]', 'path.to', ('Outer', 'Plugin'),
+     ('one', 'two')),
+])
+def test_entry_point_parse(text, module_name, attrs, extras):
+    """Verify we parse entry-points like setuptools does."""
+    entry_point = manager.EntryPoint.parse(text)
+
+    assert entry_point.name == 'X'
+    assert entry_point.module_name == module_name
+    assert entry_point.attrs == attrs
+    assert entry_point.extras == extras
+    assert manager.EntryPoint.parse(str(entry_point)).attrs == attrs
+
+
+def test_entry_point_parse_rejects_invalid_entry_points():
+    """Verify we do not accept something which is not an entry-point."""
+    with pytest.raises(ValueError):
+        manager.EntryPoint.parse('path.to:Plugin')
+
+
+def test_entry_point_resolve():
+    """Verify we import the object the entry-point refers to."""
+    entry_point = manager.EntryPoint.parse(
+        'X = flake8.plugins.manager:EntryPoint.parse'
+    )
+    assert entry_point.resolve() == manager.EntryPoint.parse
+
+    with pytest.raises(ImportError):
+        manager.EntryPoint.parse('X = flake8.plugins:Missing').resolve()
+
+
+@mock.patch('pkg_resources.iter_entry_points')
+def test_registry_reuses_cached_entry_points(iter_entry_points):
+    """Verify we do not need pkg_resources when the cache is up to date."""
+    entry_point_cache = mock.Mock()
+    entry_point_cache.get.return_value = [
+        ['flake8.extension', 'T100', 'example', ['T100'], [],
+         ['flake8-example', '1.0']],
+        ['flake8.report', 'example', 'example', ['Report'], [], None],
+    ]
+    registry = manager.EntryPointRegistry(entry_point_cache)
+    plugin_mgr = manager.PluginManager(namespace='flake8.extension',
+                                       registry=registry)
+
+    assert plugin_mgr.names == ['T100']
+    entry_point = plugin_mgr.plugins['T100'].entry_point
+    assert str(entry_point) == 'T100 = example:T100'
+    assert entry_point.dist == ('flake8-example', '1.0')
+    assert iter_entry_points.called is False
+    assert entry_point_cache.set.called is False
+
+
+@mock.patch('pkg_resources.iter_entry_points')
+def test_registry_stores_the_entry_points_it_finds(iter_entry_points):
+    """Verify we find every namespace at once and remember them."""
+    entry_point = mock.Mock(module_name='example', attrs=('T100',),
+                            extras=(), dist=None)
+    entry_point.name = 'T100'
+    iter_entry_points.side_effect = lambda namespace: (
+        [entry_point] if namespace == 'flake8.extension' else []
+    )
+    entry_point_cache = mock.Mock()
+    entry_point_cache.get.return_value = None
+    registry = manager.EntryPointRegistry(entry_point_cache)
+
+    assert [str(ep) for ep in registry.entry_points('flake8.extension')] == [
+        'T100 = example:T100',
+    ]
+    assert registry.entry_points('flake8.report') == []
+    assert iter_entry_points.call_count == len(registry.namespaces)
+    entry_point_cache.set.assert_called_once_with(
+        entry_point_cache.get.call_args[0][0],
+        [['flake8.extension', 'T100', 'example', ['T100'], [], None]],
+    )
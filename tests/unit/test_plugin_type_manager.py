@@ -53,7 +53,8 @@ def test_instantiates_a_manager(PluginManager):
     """Verify we create a PluginManager on instantiation."""
     FakeTestType()
 
-    PluginManager.assert_called_once_with(TEST_NAMESPACE, local_plugins=None)
+    PluginManager.assert_called_once_with(TEST_NAMESPACE, local_plugins=None,
+                                          registry=None)
 
 
 @mock.patch('flake8.plugins.manager.PluginManager')
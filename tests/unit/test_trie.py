@@ -51,6 +51,28 @@ class TestTrie(object):
         assert tree.find('A').data == ['A']
         assert tree.find('X') is None
 
+    def test_find_prefixes(self):
+        """Verify we find every prefix with data from shortest to longest."""
+        tree = trie.Trie()
+        tree.add('E', 'E')
+        tree.add('E12', 'E12')
+        tree.add('E121', 'E121')
+        tree.add('W', 'W')
+
+        assert [node.data for node in tree.find_prefixes('E123')] == [
+            ['E'], ['E12'],
+        ]
+        assert [node.data for node in tree.find_prefixes('F401')] == []
+
+    def test_find_prefixes_includes_empty_prefix(self):
+        """Verify data added for the empty path matches everything."""
+        tree = trie.Trie()
+        tree.add('', 'everything')
+
+        assert [node.data for node in tree.find_prefixes('E1')] == [
+            ['everything'],
+        ]
+
 
 class TestTrieNode(object):
     """Collection of tests for the TrieNode class."""
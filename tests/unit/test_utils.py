@@ -120,6 +120,89 @@ def test_filenames_from_exclude_doesnt_exclude_directory_names(tmpdir):
     assert filenames == [os.path.join('.', '2', '1', 'return_me.py')]
 
 
+@pytest.mark.parametrize('name,patterns', [
+    ('foo.py', ['*.pyc']),
+    ('foo.pyc', ['*.pyc']),
+    ('foo.pyc', ['*.swp', '*.pyc', '*.py']),
+    ('.tox', ['.svn', '.tox', '*.egg']),
+    ('.toxic', ['.svn', '.tox', '*.egg']),
+    ('/path/to/build/file.py', ['*/build/*']),
+    ('file[1].py', ['file[1].py', 'file[0-9].py']),
+    ('file1.py', ['file[1].py', 'file[0-9].py']),
+    ('file?.py', ['file?.py']),
+])
+def test_compile_patterns_matches_like_fnmatch(name, patterns):
+    """Verify that compiled patterns agree with our fnmatch wrapper."""
+    matches = utils.compile_patterns(patterns)
+    assert matches(name) is utils.fnmatch(name, patterns)
+
+
+def test_walk_files(tmpdir):
+    """Verify that we walk directories without following symbolic links."""
+    tmpdir.join('a.py').ensure()
+    tmpdir.join('sub', 'b.py').ensure()
+    tmpdir.join('sub', 'deeper', 'c.py').ensure()
+    tmpdir.join('other', 'd.py').ensure()
+    if hasattr(os, 'symlink'):
+        tmpdir.join('linked').mksymlinkto(tmpdir.join('sub'))
+        tmpdir.join('broken.py').mksymlinkto(tmpdir.join('missing.py'))
+
+    with tmpdir.as_cwd():
+        filenames = list(utils.walk_files('.'))
+
+    assert sorted(filenames) == [
+        os.path.join('.', 'a.py'),
+        os.path.join('.', 'other', 'd.py'),
+        os.path.join('.', 'sub', 'b.py'),
+        os.path.join('.', 'sub', 'deeper', 'c.py'),
+    ]
+
+
+def test_walk_files_with_a_predicate(tmpdir):
+    """Verify that the predicate sees absolute paths and prunes directories."""
+    tmpdir.join('a.py').ensure()
+    tmpdir.join('sub', 'b.py').ensure()
+    tmpdir.join('sub', 'deeper', 'c.py').ensure()
+    seen = []
+
+    def predicate(path, absolute_path):
+        seen.append((path, absolute_path))
+        return os.path.basename(path) == 'deeper'
+
+    with tmpdir.as_cwd():
+        filenames = list(utils.walk_files('sub', predicate))
+
+    assert filenames == [os.path.join('sub', 'b.py')]
+    assert sorted(seen) == [
+        (os.path.join('sub', 'b.py'), str(tmpdir.join('sub', 'b.py'))),
+        (os.path.join('sub', 'deeper'), str(tmpdir.join('sub', 'deeper'))),
+    ]
+
+
+def test_git_ignored_paths(tmpdir):
+    """Verify that we make the paths git reports absolute."""
+    process = mock.Mock(returncode=0)
+    process.communicate.return_value = (b'build/\0sub/generated.py\0', b'')
+    with mock.patch('subprocess.Popen', return_value=process) as popen:
+        ignored = utils.git_ignored_paths(str(tmpdir))
+
+    assert ignored == {
+        str(tmpdir.join('build')), str(tmpdir.join('sub', 'generated.py')),
+    }
+    assert popen.call_args[1]['cwd'] == str(tmpdir)
+
+
+@pytest.mark.parametrize('popen_kwargs', [
+    {'side_effect': OSError},
+    {'return_value': mock.Mock(returncode=128,
+                               **{'communicate.return_value': (b'', b'')})},
+])
+def test_git_ignored_paths_without_git(popen_kwargs):
+    """Verify that we return None without git or outside a work tree."""
+    with mock.patch('subprocess.Popen', **popen_kwargs):
+        assert utils.git_ignored_paths('.') is None
+
+
 def test_parameters_for_class_plugin():
     """Verify that we can retrieve the parameters for a class plugin."""
     class FakeCheck(object):
@@ -29,6 +29,28 @@ def test_is_inline_ignored(error_code, physical_line, expected_result):
         assert error.is_inline_ignored(False) is expected_result
 
 
+@pytest.mark.parametrize('error_code,line_number,expected_result', [
+    ('E111', 1, True),
+    ('E111', 2, True),
+    ('E121', 2, False),
+    ('W123', 2, True),
+    ('E111', 3, False),
+])
+def test_is_inline_ignored_with_noqa_line_mapping(error_code, line_number,
+                                                  expected_result):
+    """Verify that we use the noqa mapping instead of the physical line."""
+    error = style_guide.Violation(
+        error_code, 'filename.py', line_number, 1, 'error text', None)
+    noqa_line_mapping = {1: None, 2: ('E11', 'W123')}
+
+    with mock.patch('linecache.getline') as getline:
+        assert error.is_inline_ignored(
+            False, noqa_line_mapping,
+        ) is expected_result
+
+    assert getline.called is False
+
+
 def test_disable_is_inline_ignored():
     """Verify that is_inline_ignored exits immediately if disabling NoQA."""
     error = style_guide.Violation(
@@ -0,0 +1,71 @@
+"""Tests for checking files again whenever they change."""
+import os
+
+import mock
+import pytest
+
+from flake8 import exceptions
+from flake8.main import watch
+
+
+def make_watcher(filenames=(), args=None):
+    """Create a watcher for a fake application finding some files."""
+    application = mock.Mock(args=args or ['.'], running_against_diff=False)
+    application.options.stream = False
+    manager = application.file_checker_manager
+    manager.filenames = list(filenames)
+    return watch.Watcher(application, interval=0)
+
+
+def test_changed_files_finds_new_and_modified_files(tmpdir):
+    """Verify that only files which are new or were modified are found."""
+    first = tmpdir.join('first.py')
+    second = tmpdir.join('second.py')
+    first.write('x = 1\n')
+    second.write('y = 2\n')
+    watcher = make_watcher([str(first)])
+    watcher.stamps = watcher.current_stamps()
+
+    watcher.application.file_checker_manager.filenames.append(str(second))
+    assert watcher.changed_files() == [str(second)]
+    assert watcher.changed_files() == []
+
+    first.write('x = 10\n')
+    assert watcher.changed_files() == [str(first)]
+
+
+def test_current_stamps_skips_removed_files(tmpdir):
+    """Verify that files removed after they were found are ignored."""
+    watcher = make_watcher([str(tmpdir.join('missing.py'))])
+    assert watcher.current_stamps() == {}
+
+
+def test_watch_checks_changed_files_until_interrupted():
+    """Verify that we check everything once and then only what changed."""
+    watcher = make_watcher()
+    application = watcher.application
+    changed = [[], ['changed.py']]
+    with mock.patch.object(watcher, 'changed_files',
+                           side_effect=lambda: changed.pop(0)):
+        with mock.patch('time.sleep',
+                        side_effect=[None, None, KeyboardInterrupt]):
+            watcher.watch()
+
+    assert application.run_checks.call_args_list == [
+        mock.call(None), mock.call(['changed.py']),
+    ]
+    assert application.report.call_count == 2
+    assert application.file_checker_manager.using_multiprocessing is False
+
+
+@pytest.mark.parametrize('args, running_against_diff', [
+    (['-'], False),
+    ([os.curdir], True),
+])
+def test_watch_refuses_what_can_not_change(args, running_against_diff):
+    """Verify that standard in and diffs can not be watched."""
+    watcher = make_watcher(args=args)
+    watcher.application.running_against_diff = running_against_diff
+
+    with pytest.raises(exceptions.ExecutionError):
+        watcher.watch()